@@ -7,29 +7,63 @@ AI 分析模块
 - 地区趋势：各地区规律或差异
 - 品类动向：品类走势分析
 - 行业动态：相关行业背景
+
+每日结构化分析会持久化到 data/analysis/daily/，周报、月报基于已存储的
+日报/周报分层汇总，无需重新扫描原始异动数据。
 """
 
+import hashlib
 import os
 import json
-import requests
-from collections import defaultdict
+import time
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime
+from pathlib import Path
+
+from pipeline import codec, metrics, sessions
+from scrapers.chart_index import ChartIndex
 
 MINIMAX_API_KEY = os.environ.get("MINIMAX_API_KEY", "")
 MINIMAX_API_URL = "https://api.minimax.chat/v1/text/chatcompletion_v2"
+LLM_MODEL = "abab6.5s-chat"
+LLM_CACHE_SIZE = 64
+
+_llm_cache: OrderedDict | None = None  # 提示哈希 → 回复；enable_cache 后启用
+_llm_cache_size = LLM_CACHE_SIZE
+
+ANALYSIS_DIR = Path(__file__).parent.parent / "data" / "analysis"
+
+
+def enable_cache(size: int = LLM_CACHE_SIZE):
+    """
+    缓存成功的 LLM 回复（按模型、系统提示与提示词），常驻调度下重跑同一天的分析不再重复请求
+    失败的调用不缓存
+    """
+    global _llm_cache, _llm_cache_size
+    if _llm_cache is None:
+        _llm_cache = OrderedDict()
+    _llm_cache_size = size
 
 
 def call_minimax(prompt: str, system_prompt: str = "") -> str:
-    """调用 MiniMax API"""
+    """调用 MiniMax API；未配置或调用失败时返回以 "[" 开头的占位文本（见 llm_failed）"""
     if not MINIMAX_API_KEY:
         return "[未配置 MINIMAX_API_KEY，跳过 AI 分析]"
+    cache_key = None
+    if _llm_cache is not None:
+        cache_key = hashlib.sha256(f"{LLM_MODEL}\0{system_prompt}\0{prompt}".encode("utf-8")).hexdigest()
+        if cache_key in _llm_cache:
+            _llm_cache.move_to_end(cache_key)
+            metrics.count("llm.cache_hits")
+            return _llm_cache[cache_key]
 
     headers = {
         "Authorization": f"Bearer {MINIMAX_API_KEY}",
         "Content-Type": "application/json",
     }
+    model = LLM_MODEL
     payload = {
-        "model": "abab6.5s-chat",
+        "model": model,
         "messages": [
             {"role": "system", "content": system_prompt or "你是一位专业的手游市场分析师。"},
             {"role": "user", "content": prompt},
@@ -37,13 +71,22 @@ def call_minimax(prompt: str, system_prompt: str = "") -> str:
         "temperature": 0.5,
         "max_tokens": 2000,
     }
+    start = time.perf_counter()
     try:
-        resp = requests.post(MINIMAX_API_URL, headers=headers, json=payload, timeout=60)
+        with metrics.span("llm"):
+            resp = sessions.session().post(MINIMAX_API_URL, headers=headers, json=payload, timeout=60)
         resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["message"]["content"]
+        data = codec.loads(resp.content)
+        metrics.observe_llm(model, time.perf_counter() - start, data.get("usage"))
+        content = data["choices"][0]["message"]["content"]
     except Exception as e:
+        metrics.observe_llm(model, time.perf_counter() - start, None, ok=False)
         return f"[AI 分析失败: {e}]"
+    if cache_key is not None:
+        _llm_cache[cache_key] = content
+        while len(_llm_cache) > _llm_cache_size:
+            _llm_cache.popitem(last=False)
+    return content
 
 
 def build_chart_summary(chart_data: list[dict]) -> str:
@@ -51,35 +94,23 @@ def build_chart_summary(chart_data: list[dict]) -> str:
     构建第一部分：各渠道 Top5 榜单概要文本（供 AI 扩写）
     格式：地区 > 榜单类型 > Top5
     """
-    # 按 (store, chart_name, region_name) 分组，取 Top5
-    groups = defaultdict(list)
-    for app in chart_data:
-        key = (app.get("store", "appstore"), app.get("chart_name", ""), app.get("region_name", ""))
-        groups[key].append(app)
-
+    # 按商店、榜单类型、地区排序输出各组 Top5
+    index = ChartIndex.of(chart_data)
     lines = []
-    # 按商店、榜单类型、地区排序输出
-    store_order = {"appstore": 0, "google_play": 1}
-    chart_order = {"免费游戏榜": 0, "付费游戏榜": 1, "畅销榜": 2}
-
-    sorted_keys = sorted(
-        groups.keys(),
-        key=lambda k: (store_order.get(k[0], 9), chart_order.get(k[1], 9), k[2])
-    )
-
-    for store, chart_name, region in sorted_keys:
-        store_label = "App Store" if store == "appstore" else "Google Play"
-        apps = sorted(groups[(store, chart_name, region)], key=lambda x: x.get("rank", 999))[:5]
-        top5 = " / ".join([f"#{a['rank']} {a['name']}" for a in apps])
+    for key in index.sorted_keys():
+        store_label = "App Store" if key[0] == "appstore" else "Google Play"
+        region, chart_name = index.names(key)
+        top5 = " / ".join([f"#{a['rank']} {a['name']}" for a in index.top(key, 5)])
         lines.append(f"[{store_label}·{region}·{chart_name}] {top5}")
 
     return "\n".join(lines)
 
 
-def analyze_changes(changes: list[dict], news_list: list = None) -> dict:
+def analyze_changes(changes: list[dict], news_list: list = None, share_text: str = "") -> dict:
     """
     生成结构化的异动分析报告
     返回包含模块的字典：rising, falling, new_entries, regions, categories, industry
+    share_text 为开发商 / 品类份额摘要（scrapers.aggregates.prompt_text），品类判断以它为准
     """
     if not changes:
         return {
@@ -123,12 +154,17 @@ def analyze_changes(changes: list[dict], news_list: list = None) -> dict:
 {news_text}
 """ if news_text else ""
 
+    share_section = f"""
+**开发商 / 品类份额（按排名加权的曝光占比，全部榜单平均）：**
+{share_text}
+""" if share_text else ""
+
     prompt = f"""
 请根据以下 {today} 手游榜单异动数据及行业新闻，生成结构化的异动分析。
 
 **今日榜单异动：**
 {changes_text}
-{news_section}
+{share_section}{news_section}
 ---
 
 请严格按照以下 JSON 格式输出，不要输出其他内容：
@@ -176,7 +212,7 @@ def analyze_changes(changes: list[dict], news_list: list = None) -> dict:
    - 每个要点之间用"\\n\\n"分隔（空一行）
    - 每个模块 2-3 个要点，每个要点不超过 30 字
 6. regions 要提炼各地区的共性和差异
-7. categories 要指出哪些品类在上升/下降
+7. categories 要指出哪些品类在上升/下降；提供了份额数据时以份额数字及其变化为依据，引用具体百分比
 8. 只输出 JSON，不要有其他文字
 """
 
@@ -192,7 +228,7 @@ def analyze_changes(changes: list[dict], news_list: list = None) -> dict:
         elif "```" in result:
             result = result.split("```")[1].split("```")[0]
         
-        parsed = json.loads(result.strip())
+        parsed = codec.loads(result.strip())
         return {
             "rising": parsed.get("rising", []),
             "falling": parsed.get("falling", []),
@@ -219,8 +255,11 @@ def analyze_changes_text(changes: list[dict], news_list: list = None) -> str:
     """
     生成纯文本格式的异动分析（用于 Excel 和企业微信）
     """
-    analysis = analyze_changes(changes, news_list)
-    
+    return format_analysis_text(analyze_changes(changes, news_list))
+
+
+def format_analysis_text(analysis: dict) -> str:
+    """将 analyze_changes 返回的结构化字典渲染为纯文本，不再重复调用 AI"""
     lines = ["## 异动分析（对比昨日）\n"]
     
     # 上升
@@ -277,11 +316,10 @@ def generate_chart_summary_text(chart_data: list[dict], news_list: list = None)
     直接基于数据生成，不调用 AI（节省 token）
     """
     today = datetime.now().strftime("%Y年%m月%d日")
-    summary = build_chart_summary(chart_data)
-
+    index = ChartIndex.of(chart_data)
     # 统计基本数字
-    stores = set(a.get("store") for a in chart_data)
-    regions = set(a.get("region_name") for a in chart_data)
+    stores = {key[0] for key in index.keys()}
+    regions = {index.names(key)[0] for key in index.keys()}
     total = len(chart_data)
 
     header = f"""## 第一部分：{today} 榜单概要
@@ -295,49 +333,29 @@ def generate_chart_summary_text(chart_data: list[dict], news_list: list = None)
 """
     # 格式化为可读表格文本
     lines = []
-    from collections import defaultdict
-    groups = defaultdict(list)
-    for app in chart_data:
-        key = (app.get("store", ""), app.get("chart_name", ""), app.get("region_name", ""))
-        groups[key].append(app)
-
-    store_order = {"appstore": 0, "google_play": 1}
-    chart_order = {"免费游戏榜": 0, "付费游戏榜": 1, "畅销榜": 2}
-    sorted_keys = sorted(
-        groups.keys(),
-        key=lambda k: (store_order.get(k[0], 9), chart_order.get(k[1], 9), k[2])
-    )
-
     current_store = ""
     current_chart = ""
-    for store, chart_name, region in sorted_keys:
-        store_label = "App Store" if store == "appstore" else "Google Play"
+    for key in index.sorted_keys():
+        store_label = "App Store" if key[0] == "appstore" else "Google Play"
+        region, chart_name = index.names(key)
         if store_label != current_store or chart_name != current_chart:
             lines.append(f"\n**{store_label} · {chart_name}**")
             current_store = store_label
             current_chart = chart_name
 
-        apps = sorted(groups[(store, chart_name, region)], key=lambda x: x.get("rank", 999))[:5]
-        top5 = "、".join([f"#{a['rank']}{a['name']}" for a in apps])
+        top5 = "、".join([f"#{a['rank']}{a['name']}" for a in index.top(key, 5)])
         lines.append(f"- {region}：{top5}")
 
     return header + "\n".join(lines)
 
 
 def generate_weekly_summary(all_week_changes: list[dict], top_charts: list[dict]) -> str:
-    """生成周报摘要"""
-    from collections import Counter
+    """生成周报摘要（旧版：基于原始异动计数，无已存储日报时的兜底方案）"""
     app_counter = Counter(c["name"] for c in all_week_changes)
     top_movers = app_counter.most_common(10)
     movers_text = "\n".join([f"- 《{name}》: 出现 {count} 次异动" for name, count in top_movers])
 
-    region_tops = defaultdict(list)
-    for app in top_charts:
-        if app.get("rank", 999) <= 3:
-            region = app.get("region_name", "")
-            region_tops[region].append(f"#{app['rank']} {app['name']}")
-
-    region_text = "\n".join([f"**{r}**: {', '.join(tops)}" for r, tops in region_tops.items()])
+    region_text = _region_top3_text(top_charts)
 
     prompt = f"""
 本周手游市场数据摘要：
@@ -357,3 +375,195 @@ def generate_weekly_summary(all_week_changes: list[dict], top_charts: list[dict]
 """
     system = "你是一位专业的手游市场周报分析师。"
     return call_minimax(prompt, system)
+
+
+# ─── 分层汇总：日报 → 周报 → 月报 ───────────────────────────
+
+def _summarize_changes(changes: list[dict]) -> dict:
+    """统计异动数量，随日报一起存储，供周报/月报做定量汇总"""
+    by_type = Counter(c.get("change_type", "") for c in changes)
+    by_region = Counter(c.get("region_name", "") for c in changes)
+    top_movers = Counter(c.get("name", "") for c in changes).most_common(10)
+    return {
+        "total": len(changes),
+        "by_type": dict(by_type),
+        "by_region": dict(by_region),
+        "top_movers": [[name, count] for name, count in top_movers],
+    }
+
+
+def save_daily_analysis(analysis: dict, date_str: str, changes: list[dict] = None) -> Path:
+    """保存当日结构化分析结果（analyze_changes 的返回值）到 data/analysis/daily/"""
+    daily_dir = ANALYSIS_DIR / "daily"
+    daily_dir.mkdir(parents=True, exist_ok=True)
+    filepath = daily_dir / f"{date_str}.json"
+    record = {
+        "date": date_str,
+        "analysis": analysis,
+        "stats": _summarize_changes(changes or []),
+    }
+    codec.dump(record, filepath, indent=2)
+    print(f"[AI] 已保存日报分析到 {filepath}")
+    return filepath
+
+
+def load_daily_analysis(date_str: str) -> dict | None:
+    """读取指定日期的日报分析，不存在时返回 None"""
+    filepath = ANALYSIS_DIR / "daily" / f"{date_str}.json"
+    if not filepath.exists():
+        return None
+    return codec.load(filepath)
+
+
+def llm_failed(text: str) -> bool:
+    """call_minimax 返回的是占位文本（未配置 / 调用失败）而不是模型输出"""
+    return not (text or "").strip() or text.lstrip().startswith("[")
+
+
+def save_period_summary(kind: str, summary: str, date_str: str, covered: list[str]) -> Path | None:
+    """
+    保存周报/月报文本（kind 为 weekly 或 monthly），供上一层汇总复用
+    AI 调用失败（占位文本）时不保存，返回 None，避免占位文本被当作周报写进月报提示词
+    """
+    if llm_failed(summary):
+        print(f"[AI] {kind} 摘要生成失败，不保存：{summary[:60]}")
+        return None
+    period_dir = ANALYSIS_DIR / kind
+    period_dir.mkdir(parents=True, exist_ok=True)
+    filepath = period_dir / f"{date_str}.json"
+    codec.dump({"date": date_str, "covers": covered, "summary": summary}, filepath, indent=2)
+    return filepath
+
+
+def load_period_summaries(kind: str, start: str, end: str) -> list[dict]:
+    """读取 [start, end] 日期范围内已存储的周报/月报，按日期升序"""
+    period_dir = ANALYSIS_DIR / kind
+    if not period_dir.exists():
+        return []
+    records = []
+    for filepath in sorted(period_dir.glob("*.json")):
+        if start <= filepath.stem <= end:
+            record = codec.load(filepath)
+            if not llm_failed(record.get("summary", "")):  # 旧版本保存下来的失败占位文本
+                records.append(record)
+    return records
+
+
+def _clip(text: str, limit: int) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _digest_daily(record: dict) -> str:
+    """将一天的结构化分析压缩成几行，作为周报 prompt 的输入"""
+    analysis = record.get("analysis", {})
+    stats = record.get("stats", {})
+    by_type = stats.get("by_type", {})
+    lines = [
+        f"### {record.get('date', '')}"
+        f"（异动 {stats.get('total', 0)} 个：新进榜 {by_type.get('新进榜', 0)} / "
+        f"上升 {by_type.get('上升', 0)} / 下降 {by_type.get('下降', 0)}）"
+    ]
+    for label, key in (("上升", "rising"), ("下降", "falling"), ("新进榜", "new_entries")):
+        items = analysis.get(key) or []
+        if items:
+            games = "；".join(
+                f"《{h.get('game', '')}》{h.get('change', '')}（{h.get('region', '')}）" for h in items[:3]
+            )
+            lines.append(f"- {label}：{games}")
+    if analysis.get("regions"):
+        lines.append(f"- 地区：{_clip(analysis['regions'].replace(chr(10), ' '), 120)}")
+    if analysis.get("categories"):
+        lines.append(f"- 品类：{_clip(analysis['categories'].replace(chr(10), ' '), 120)}")
+    return "\n".join(lines)
+
+
+def _region_top3_text(top_charts: list[dict]) -> str:
+    region_tops = defaultdict(list)
+    index = ChartIndex.of(top_charts)
+    for key in index.keys():
+        for app in index.up_to_rank(key, 3):
+            region_tops[app.get("region_name", "")].append(f"#{app['rank']} {app['name']}")
+    return "\n".join([f"**{r}**: {', '.join(tops)}" for r, tops in region_tops.items()])
+
+
+def generate_weekly_summary_from_daily(daily_records: list[dict], top_charts: list[dict]) -> str:
+    """
+    基于已存储的每日结构化分析生成周报
+    输入是 7 份压缩后的日报摘要，比原始异动小得多
+    """
+    daily_records = sorted(daily_records, key=lambda r: r.get("date", ""))
+    digest = "\n\n".join(_digest_daily(r) for r in daily_records)
+
+    movers = Counter()
+    for r in daily_records:
+        for name, count in r.get("stats", {}).get("top_movers", []):
+            movers[name] += count
+    movers_text = "\n".join([f"- 《{name}》: 出现 {count} 次异动" for name, count in movers.most_common(10)])
+
+    prompt = f"""
+以下是本周每日榜单异动分析的摘要（共 {len(daily_records)} 天）：
+
+{digest}
+
+**本周异动最频繁的游戏：**
+{movers_text}
+
+**各地区当前 Top3：**
+{_region_top3_text(top_charts)}
+
+请在每日分析的基础上归纳，生成一份简洁的**周报**（约600字），包含：
+1. **本周市场总结**（整体趋势，2-3段）
+2. **重点关注产品**（3-5款值得持续跟踪的游戏及原因）
+3. **下周预判**
+
+语言：中文，Markdown 格式，适合发送给游戏公司产品/市场团队阅读。
+"""
+    system = "你是一位专业的手游市场周报分析师。请基于已有的每日分析做归纳，不要编造数据。"
+    return call_minimax(prompt, system)
+
+
+def generate_monthly_summary(weekly_records: list[dict], daily_records: list[dict], month_label: str) -> str:
+    """
+    基于已存储的周报 + 日报统计生成月报
+    周报提供定性结论，日报 stats 提供全月定量数字
+    """
+    weekly_text = "\n\n".join(
+        f"### 周报 {w.get('date', '')}\n{_clip(w.get('summary', ''), 800)}" for w in weekly_records
+    ) or "（本月暂无已存储的周报）"
+
+    type_totals = Counter()
+    region_totals = Counter()
+    movers = Counter()
+    for r in daily_records:
+        stats = r.get("stats", {})
+        type_totals.update(stats.get("by_type", {}))
+        region_totals.update(stats.get("by_region", {}))
+        for name, count in stats.get("top_movers", []):
+            movers[name] += count
+
+    stats_text = "\n".join([
+        f"- 覆盖天数：{len(daily_records)} 天",
+        "- 异动类型：" + " / ".join(f"{k} {v}" for k, v in type_totals.most_common()),
+        "- 异动最多的地区：" + " / ".join(f"{k} {v}" for k, v in region_totals.most_common(5)),
+        "- 异动最频繁的游戏：" + " / ".join(f"《{k}》{v}次" for k, v in movers.most_common(10)),
+    ])
+
+    prompt = f"""
+以下是 {month_label} 手游市场的各周周报与全月统计：
+
+{weekly_text}
+
+**全月统计：**
+{stats_text}
+
+请归纳生成一份**月报**（约800字），包含：
+1. **本月市场总结**（整体趋势与各地区差异）
+2. **本月重点产品**（3-5款，说明持续表现）
+3. **品类与发行商动向**
+4. **下月展望**
+
+语言：中文，Markdown 格式，适合发送给游戏公司产品/市场团队阅读。
+"""
+    system = "你是一位专业的手游市场月报分析师。请基于已有的周报和统计做归纳，不要编造数据。"
+    return call_minimax(prompt, system)
@@ -0,0 +1,181 @@
+"""
+流水线基准测试
+用 bench/synthetic.py 生成的数据，对核心函数测量耗时与峰值内存，保存基线并做回归比较
+全程离线：所有输出写到临时目录（offline/sandbox.py），不访问网络、不改动 data/
+
+    python -m bench.run                          # 默认规模，打印结果
+    python -m bench.run --scale large --save     # 保存为 bench/baselines/large.json
+    python -m bench.run --compare                # 与基线比较，超出容差时退出码为 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.synthetic import generate_days
+from offline.sandbox import data_root
+from scrapers.records import ChartSnapshot
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+SCALES = {
+    "small":  {"regions": 3,  "charts": 3, "ranks": 50,  "days": 3},
+    "medium": {"regions": 10, "charts": 3, "ranks": 100, "days": 30},   # 与线上规模相当
+    "large":  {"regions": 40, "charts": 3, "ranks": 200, "days": 30},
+}
+DEFAULT_TOLERANCE = 0.25   # 耗时 / 内存超出基线 25% 视为回归
+NOISE_FLOOR_S = 0.005      # 过短的耗时不参与回归判断
+
+
+def _prepare(scale: dict, seed: int) -> dict:
+    """生成数据：最后两天的快照 + 之前的历史（写入临时数据目录供排名序列回填）"""
+    days = [(day, ChartSnapshot.from_rows(rows, day)) for day, rows in generate_days(seed=seed, **scale)]
+    return {"days": days, "today": days[-1], "yesterday": days[-2] if len(days) > 1 else days[-1]}
+
+
+def _cases(ctx: dict) -> dict:
+    """基准用例：名称 → (准备函数, 被测函数)；准备函数在计时外执行"""
+    from analyzer.ai_analyzer import build_chart_summary
+    from reporter.dashboard_writer import write_dashboard_json
+    from reporter.excel_writer import write_daily_excel
+    from scrapers.change_detector import detect_changes, get_top_movers, load_chart_data, save_chart_data
+
+    date_str, today = ctx["today"]
+    _, yesterday = ctx["yesterday"]
+    changes = detect_changes(today, yesterday)
+    top = get_top_movers(changes)
+    summary = build_chart_summary(today)
+    analysis = {"highlights": [], "regions": "", "categories": "", "industry": ""}
+
+    def seed_history():
+        for day, rows in ctx["days"][:-1]:
+            save_chart_data(rows, day)
+
+    def history_roundtrip():
+        save_chart_data(today, date_str)
+        return load_chart_data(date_str)
+
+    return {
+        "history_io": (None, history_roundtrip),
+        "detect_changes": (None, lambda: detect_changes(today, yesterday)),
+        "build_chart_summary": (None, lambda: build_chart_summary(today)),
+        "write_daily_excel": (None, lambda: write_daily_excel(today, top, summary, date_str)),
+        "write_dashboard_json": (seed_history, lambda: write_dashboard_json(today, top, analysis, summary, date_str)),
+    }
+
+
+def _measure(setup, func, repeat: int) -> dict:
+    """每次在全新的临时数据目录中执行；先计时 repeat 次取中位数，再单独跑一次测峰值内存"""
+    times = []
+    quiet = io.StringIO()
+    for _ in range(repeat):
+        with data_root(), contextlib.redirect_stdout(quiet):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+
+    with data_root(), contextlib.redirect_stdout(quiet):
+        if setup:
+            setup()
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "median_s": round(statistics.median(times), 4),
+        "min_s": round(min(times), 4),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def run_suite(scale_name: str, repeat: int, seed: int, only: list[str] | None = None) -> dict:
+    scale = SCALES[scale_name]
+    print(f"[Bench] 规模 {scale_name}: {scale}，seed={seed}，重复 {repeat} 次")
+    ctx = _prepare(scale, seed)
+    print(f"[Bench] 今日快照 {len(ctx['today'][1])} 行")
+    results = {}
+    for name, (setup, func) in _cases(ctx).items():
+        if only and name not in only:
+            continue
+        results[name] = _measure(setup, func, repeat)
+        r = results[name]
+        print(f"  {name:<24} {r['median_s'] * 1000:9.1f} ms  (min {r['min_s'] * 1000:.1f})  峰值 {r['peak_mb']:.1f} MB")
+    return {
+        "scale": scale_name,
+        "params": scale,
+        "seed": seed,
+        "rows": len(ctx["today"][1]),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """返回回归描述列表"""
+    regressions = []
+    print(f"[Bench] 对比基线（{baseline.get('recorded_at', '?')}，容差 {tolerance:.0%}）")
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"  {name:<24} 无基线")
+            continue
+        t_ratio = cur["median_s"] / base["median_s"] if base["median_s"] else 1.0
+        m_ratio = cur["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+        flags = []
+        if t_ratio > 1 + tolerance and cur["median_s"] - base["median_s"] > NOISE_FLOOR_S:
+            flags.append(f"耗时 +{t_ratio - 1:.0%}")
+        if m_ratio > 1 + tolerance:
+            flags.append(f"内存 +{m_ratio - 1:.0%}")
+        print(f"  {name:<24} 耗时 ×{t_ratio:.2f}  内存 ×{m_ratio:.2f}" + (f"  ⚠ {'，'.join(flags)}" if flags else ""))
+        if flags:
+            regressions.append(f"{name}: {'，'.join(flags)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线基准测试（离线）")
+    parser.add_argument("--scale", choices=list(SCALES), default="medium")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", action="append", help="只运行指定用例，可重复")
+    parser.add_argument("--save", action="store_true", help="保存为该规模的基线")
+    parser.add_argument("--compare", action="store_true", help="与基线比较，有回归时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--output", help="结果另存为 JSON")
+    args = parser.parse_args()
+
+    result = run_suite(args.scale, args.repeat, args.seed, args.only)
+    baseline_file = BASELINE_DIR / f"{args.scale}.json"
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.compare:
+        if not baseline_file.exists():
+            print(f"[Bench] 基线不存在：{baseline_file}，先用 --save 生成")
+            sys.exit(2)
+        baseline = json.loads(baseline_file.read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print("[Bench] 发现回归：\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("[Bench] 无回归")
+    if args.save:
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        baseline_file.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[Bench] 基线已保存：{baseline_file}")
+
+
+if __name__ == "__main__":
+    main()
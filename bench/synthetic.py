@@ -0,0 +1,163 @@
+"""
+合成榜单数据生成器
+按 地区 × 榜单 × 排名 × 天数 生成与真实采集结构一致的每日快照（字段同 appstore_scraper / googleplay_scraper.js）
+- 每个 (商店, 地区, 榜单) 维护一个应用热度池，每天热度随机游走 → 排名漂移
+- 少量应用热度突变（活动、版本更新）→ 大幅上升 / 下降
+- 每天按比例加入新游戏、淘汰长尾 → 新进榜 / 退榜
+同一 seed 生成的数据完全一致，可离线重复使用
+
+    python -m bench.synthetic --days 7 --out /tmp/history   # 写成 history/YYYY-MM-DD.json
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pipeline import codec
+from scrapers.appstore_scraper import CHART_TYPES as AS_CHARTS, REGIONS
+
+GP_CHARTS = {"TOP_FREE": "免费游戏榜", "TOP_PAID": "付费游戏榜", "GROSSING": "畅销榜"}
+STORE_CHARTS = {"appstore": AS_CHARTS, "google_play": GP_CHARTS}
+
+GP_GENRES = ["Action", "Adventure", "Arcade", "Board", "Card", "Casual", "Puzzle",
+             "Racing", "Role Playing", "Simulation", "Sports", "Strategy", "Word"]
+APPSTORE_GENRES = [g for g in GP_GENRES if g != "Casual"]  # App Store 没有 Casual 子类
+SYLLABLES = ["ka", "ro", "mi", "zen", "tal", "vor", "lu", "shi", "dra", "gon", "pix", "el",
+             "nova", "ster", "qu", "est", "bit", "fy", "ar", "cade"]
+SUFFIXES = ["Legends", "Saga", "Rush", "Merge", "Tycoon", "Quest", "Heroes", "Puzzle", "Idle",
+            "Arena", "Kingdom", "Match", "Run", "Story", "Wars"]
+CJK_NAMES = ["王者", "原神", "幻塔", "三国", "江湖", "星穹", "冒险", "消除", "卡牌", "物语"]
+
+# 每天热度变化参数
+DRIFT_SIGMA = 0.08       # 常规随机游走
+SHOCK_RATE = 0.02        # 突变概率
+SHOCK_SIGMA = 0.8
+NEW_ENTRY_RATE = 0.04    # 每天新游戏占榜单长度的比例
+POOL_FACTOR = 1.6        # 热度池大小 / 榜单长度，池外应用即未上榜
+
+
+def _name(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return "".join(rng.sample(CJK_NAMES, 2))
+    word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{word} {rng.choice(SUFFIXES)}"
+
+
+class _AppFactory:
+    """生成应用与发行商，发行商按长尾分布复用"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.publishers = [f"{_name(rng).split()[0]} Games" for _ in range(400)]
+        self.seq = 0
+
+    def new_app(self, store: str, day: str) -> dict:
+        rng = self.rng
+        self.seq += 1
+        name = _name(rng)
+        publisher = self.publishers[min(int(rng.paretovariate(1.2)) - 1, len(self.publishers) - 1)]
+        if store == "appstore":
+            app_id = str(1_000_000_000 + self.seq)
+            genre, genre_id = "Games", "6014"
+            subgenre = APPSTORE_GENRES[self.seq % len(APPSTORE_GENRES)]  # 线上由 enrichment 补充
+            url = f"https://apps.apple.com/app/id{app_id}"
+        else:
+            app_id = f"com.{publisher.split()[0].lower()}.game{self.seq}"
+            genre = rng.choice(GP_GENRES)
+            genre_id = "GAME_" + genre.upper().replace(" ", "_")
+            subgenre = genre
+            url = f"https://play.google.com/store/apps/details?id={app_id}"
+        return {
+            "app_id": app_id, "name": name, "artist": publisher, "genre": genre, "genre_id": genre_id,
+            "subgenre": subgenre,
+            "url": url, "artwork": f"https://example.invalid/icons/{app_id}.png",
+            "release_date": day, "heat": rng.gauss(0, 1),
+        }
+
+
+def generate_days(regions: int = 10, charts: int = 3, ranks: int = 100, days: int = 30,
+                  stores: tuple = ("appstore", "google_play"), seed: int = 42,
+                  end_date: str = "2026-01-31"):
+    """
+    逐日生成快照，yield (date_str, rows)
+    regions 超过真实地区数时补充虚拟地区 r10、r11…
+    """
+    rng = random.Random(seed)
+    factory = _AppFactory(rng)
+    region_codes = list(REGIONS)[:regions] + [f"r{i}" for i in range(len(REGIONS), regions)]
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    dates = [(end - timedelta(days=days - 1 - i)).strftime("%Y-%m-%d") for i in range(days)]
+    pool_size = int(ranks * POOL_FACTOR)
+
+    pools = {}
+    for store in stores:
+        for region in region_codes:
+            for chart_type in list(STORE_CHARTS[store])[:charts]:
+                pools[(store, region, chart_type)] = [factory.new_app(store, dates[0]) for _ in range(pool_size)]
+
+    for day in dates:
+        fetch_ts = f"{day}T01:00:00+00:00"
+        rows = []
+        for (store, region, chart_type), pool in pools.items():
+            for app in pool:
+                app["heat"] += rng.gauss(0, DRIFT_SIGMA)
+                if rng.random() < SHOCK_RATE:
+                    app["heat"] += rng.gauss(0, SHOCK_SIGMA)
+            # 新游戏替换热度最低的长尾
+            pool.sort(key=lambda a: a["heat"], reverse=True)
+            n_new = max(1, int(ranks * NEW_ENTRY_RATE * rng.uniform(0.5, 1.5)))
+            for i in range(n_new):
+                app = factory.new_app(store, day)
+                app["heat"] = pool[rng.randrange(ranks)]["heat"] + abs(rng.gauss(0, 0.3))
+                pool[-1 - i] = app
+            pool.sort(key=lambda a: a["heat"], reverse=True)
+
+            chart_name = STORE_CHARTS[store][chart_type]
+            for rank, app in enumerate(pool[:ranks], start=1):
+                row = {k: v for k, v in app.items() if k != "heat"}
+                row.update({
+                    "rank": rank,
+                    "price": "0" if "PAID" not in chart_type.upper() else "4.99",
+                    "region": region,
+                    "region_name": REGIONS.get(region, region.upper()),
+                    "chart_type": chart_type,
+                    "chart_name": chart_name,
+                    "store": store,
+                    "fetch_date": day,
+                    "fetch_ts": fetch_ts,
+                })
+                if store == "google_play":
+                    row["score"] = round(3.5 + 1.5 * rng.random(), 2)
+                rows.append(row)
+        yield day, rows
+
+
+def write_history(out_dir, **kwargs) -> list[str]:
+    """把生成的快照写成 {out_dir}/YYYY-MM-DD.json，返回日期列表"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dates = []
+    for day, rows in generate_days(**kwargs):
+        codec.dump(rows, out_dir / f"{day}.json", indent=2)
+        dates.append(day)
+    return dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成榜单快照")
+    parser.add_argument("--regions", type=int, default=10)
+    parser.add_argument("--charts", type=int, default=3)
+    parser.add_argument("--ranks", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default="2026-01-31")
+    parser.add_argument("--out", required=True, help="输出目录")
+    args = parser.parse_args()
+    dates = write_history(args.out, regions=args.regions, charts=args.charts, ranks=args.ranks,
+                          days=args.days, seed=args.seed, end_date=args.end_date)
+    print(f"[Synthetic] 已生成 {len(dates)} 天：{dates[0]} ~ {dates[-1]} → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 由 GitHub Actions 每天自动运行
 """
 
+import argparse
 import sys
 import os
 from datetime import datetime, timezone, timedelta
@@ -16,54 +17,96 @@ except ImportError:
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from scrapers.appstore_scraper import fetch_all_appstore_charts
-from scrapers.googleplay_scraper import fetch_all_googleplay_charts
+from scrapers.appstore_scraper import fetch_all_appstore_charts, iter_appstore_charts
+from scrapers.googleplay_scraper import fetch_all_googleplay_charts, iter_googleplay_charts
 from scrapers.news_scraper import fetch_all_news
+from scrapers.records import ChartSnapshot
+from scrapers import aggregates, enrichment, intraday
 from scrapers.change_detector import (
-    load_chart_data, save_chart_data, detect_changes, get_top_movers
+    DATA_DIR as HISTORY_DIR, load_chart_data, save_chart_data, detect_changes, get_top_movers
+)
+from analyzer.ai_analyzer import (
+    analyze_changes, format_analysis_text, generate_chart_summary_text, save_daily_analysis
 )
-from analyzer.ai_analyzer import analyze_changes, analyze_changes_text, generate_chart_summary_text
 from reporter.excel_writer import write_daily_excel
 from reporter.dashboard_writer import write_dashboard_json
 from reporter.notifier import send_daily_wecom
+from reporter.subscriptions import send_subscription_digests
+from reporter import artifacts, icon_cache
+from pipeline import metrics, profiling
+from pipeline.streaming import StreamingDetector, stream_changes
 
 UTC = timezone.utc
 
 
-def run_daily():
+def _log_group(key, apps, changes):
+    """流式模式的下游示例：逐组打印异动数（按地区的下游处理可按同样签名接入）"""
+    if changes:
+        print(f"  [Stream] {key[0]} {key[1]} {key[2]}：{len(apps)} 条，异动 {len(changes)} 个")
+
+
+def run_daily(stream: bool = False):
     today     = datetime.now(UTC).strftime("%Y-%m-%d")
     yesterday = (datetime.now(UTC) - timedelta(days=1)).strftime("%Y-%m-%d")
 
     print(f"\n{'='*50}")
     print(f"  手游信息池 · 每日采集  {today}")
     print(f"{'='*50}\n")
+    metrics.reset("daily")
+    metrics.instrument_requests()
 
     # ── 1. 采集榜单 ──────────────────────────────────────
-    print("[Step 1] 采集 App Store 榜单...")
-    appstore_data = fetch_all_appstore_charts()
-    for app in appstore_data:
-        app["store"] = "appstore"
-    print(f"  App Store 共 {len(appstore_data)} 条\n")
-
-    print("[Step 1] 采集 Google Play 榜单...")
-    gplay_data = fetch_all_googleplay_charts()
-    print(f"  Google Play 共 {len(gplay_data)} 条\n")
-
-    all_data = appstore_data + gplay_data
+    if stream:
+        # 流式：边拉取边逐组检测异动（第 4 步直接使用结果）
+        metrics.stage("scrape+detect")
+        print("[Step 1] 流式采集 App Store / Google Play 榜单并逐组检测异动...")
+        detector = StreamingDetector(yesterday)
+        data, changes = stream_changes(
+            {"appstore": iter_appstore_charts(), "google_play": iter_googleplay_charts()},
+            detector, consumers=[_log_group],
+        )
+        appstore_data, gplay_data = data["appstore"], data["google_play"]
+        print(f"  App Store 共 {len(appstore_data)} 条，Google Play 共 {len(gplay_data)} 条\n")
+    else:
+        metrics.stage("scrape.appstore")
+        print("[Step 1] 采集 App Store 榜单...")
+        appstore_data = fetch_all_appstore_charts()
+        for app in appstore_data:
+            app["store"] = "appstore"
+        print(f"  App Store 共 {len(appstore_data)} 条\n")
+
+        metrics.stage("scrape.googleplay")
+        print("[Step 1] 采集 Google Play 榜单...")
+        gplay_data = fetch_all_googleplay_charts()
+        print(f"  Google Play 共 {len(gplay_data)} 条\n")
+
+    all_data = ChartSnapshot(appstore_data + gplay_data, today)
+    metrics.count("rows.appstore", len(appstore_data))
+    metrics.count("rows.googleplay", len(gplay_data))
+
+    metrics.stage("enrich")
+    print("[Step 1] 补充应用元数据（只查询新上榜或缓存过期的应用）...")
+    enrichment.enrich(all_data, today)
 
     # ── 2. 抓取行业新闻 ──────────────────────────────────
+    metrics.stage("news")
     print("[Step 2] 抓取行业新闻...")
     news_list = fetch_all_news(hours=48)
+    metrics.count("rows.news", len(news_list))
 
     # ── 3. 保存今日 JSON ──────────────────────────────────
+    metrics.stage("save_history")
     print("\n[Step 3] 保存今日数据...")
     save_chart_data(all_data, today)
+    intraday.rollup_pending(today)  # 把前一天的小时级快照汇总进其日快照（未启用 intraday 时无操作）
 
     # ── 4. 检测异动 ──────────────────────────────────────
+    metrics.stage("detect")
     print("\n[Step 4] 检测榜单异动...")
-    yesterday_data = load_chart_data(yesterday)
+    yesterday_data = detector.yesterday if stream else load_chart_data(yesterday)
     if yesterday_data:
-        changes    = detect_changes(all_data, yesterday_data)
+        if not stream:
+            changes = detect_changes(all_data, yesterday_data)
         top_changes = get_top_movers(changes)
         print(f"  检测到 {len(changes)} 个异动，重点关注 {len(top_changes)} 个")
     else:
@@ -71,31 +114,60 @@ def run_daily():
         top_changes = []
         print("  无昨日数据，跳过异动检测（首次运行正常）")
 
+    metrics.count("changes.total", len(changes))
+    metrics.count("changes.top", len(top_changes))
+
     # ── 5. AI 分析 ──────────────────────────────────────────
+    metrics.stage("analyze")
     print("\n[Step 5] 生成 AI 分析...")
     chart_summary = generate_chart_summary_text(all_data)
-    ai_analysis   = analyze_changes(top_changes, news_list=news_list)  # 返回结构化字典
-    ai_analysis_text = analyze_changes_text(top_changes, news_list=news_list)  # 纯文本版本
+    share_text    = aggregates.prompt_text(today)  # 开发商 / 品类份额（保存日快照时已物化）
+    ai_analysis   = analyze_changes(top_changes, news_list=news_list, share_text=share_text)  # 返回结构化字典
+    ai_analysis_text = format_analysis_text(ai_analysis)  # 纯文本版本（复用同一次 AI 结果）
+    analysis_path = save_daily_analysis(ai_analysis, today, changes)  # 供周报/月报分层汇总
     print(f"  榜单概要 {len(chart_summary)} 字，异动解读已生成")
 
     # ── 6. 生成 Excel ────────────────────────────────────────
+    metrics.stage("excel")
     print("\n[Step 6] 生成 Excel 报告...")
     full_analysis = chart_summary + "\n\n" + ai_analysis_text
     excel_path = write_daily_excel(all_data, top_changes, full_analysis, today)
     print(f"  已输出：{excel_path}")
 
     # ── 7. 生成仪表盘 JSON ────────────────────────────────────
+    if icon_cache.FETCH_ENABLED:
+        metrics.stage("icons")
+        print("\n[Step 7] 下载新上榜应用的图标...")
+        icon_cache.update(all_data, today)
+
+    metrics.stage("dashboard")
     print("\n[Step 7] 生成仪表盘 JSON...")
     write_dashboard_json(all_data, top_changes, ai_analysis, chart_summary, today)
 
     # ── 8. 推送企业微信 ──────────────────────────────────────
+    metrics.stage("notify.wecom")
     print("\n[Step 8] 推送企业微信（两条）...")
     send_daily_wecom(all_data, top_changes, chart_summary, ai_analysis_text, today)
 
+    # ── 9. 订阅推送 ────────────────────────────────────────
+    metrics.stage("notify.subscriptions")
+    print("\n[Step 9] 按订阅推送异动摘要...")
+    send_subscription_digests(changes, today, excel_path)
+
+    # ── 10. 汇总变化文件 ──────────────────────────────────────
+    artifacts.record(HISTORY_DIR / f"{today}.json")
+    artifacts.record(analysis_path)
+    metrics.write_report()
+    artifacts.save()
+
     print(f"\n{'='*50}")
     print("  每日采集完成！")
     print(f"{'='*50}\n")
 
 
 if __name__ == "__main__":
-    run_daily()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stream", action="store_true", help="边采集边逐组检测异动")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.run(lambda: run_daily(stream=args.stream), args)
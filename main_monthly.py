@@ -0,0 +1,74 @@
+"""
+主入口：每月报告生成与推送
+每月1日运行，基于已存储的周报和日报分析分层汇总上个月
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from analyzer.ai_analyzer import (
+    generate_monthly_summary, load_daily_analysis, load_period_summaries, save_period_summary,
+)
+from reporter.notifier import send_wecom_markdown, send_email, _markdown_to_html, GITHUB_PAGES_URL
+
+
+def run_monthly():
+    today = datetime.utcnow()
+    # 上个月的第一天和最后一天
+    month_end = today.replace(day=1) - timedelta(days=1)
+    month_start = month_end.replace(day=1)
+    month_label = month_start.strftime("%Y年%m月")
+    start_str = month_start.strftime("%Y-%m-%d")
+    end_str = month_end.strftime("%Y-%m-%d")
+
+    print(f"\n{'='*50}")
+    print(f"  手游信息池 · 月报生成  {month_label}")
+    print(f"{'='*50}\n")
+
+    # ── 读取已存储的日报和周报 ──────────────────────────
+    print("[Step 1] 读取本月已存储的分析...")
+    daily_records = []
+    day = month_start
+    while day <= month_end:
+        record = load_daily_analysis(day.strftime("%Y-%m-%d"))
+        if record:
+            daily_records.append(record)
+        day += timedelta(days=1)
+    weekly_records = load_period_summaries("weekly", start_str, end_str)
+    print(f"  日报 {len(daily_records)} 天，周报 {len(weekly_records)} 份")
+
+    if not daily_records and not weekly_records:
+        print("  本月无已存储分析，跳过月报")
+        return
+
+    # ── 生成 AI 月报 ─────────────────────────────────────
+    print("\n[Step 2] AI 生成月报...")
+    monthly_summary = generate_monthly_summary(weekly_records, daily_records, month_label)
+    save_period_summary("monthly", monthly_summary, month_start.strftime("%Y-%m"),
+                        [r["date"] for r in daily_records])
+    print(f"  月报生成完成（{len(monthly_summary)} 字）")
+
+    # ── 推送 ─────────────────────────────────────────────
+    print("\n[Step 3] 推送月报...")
+    link_line = f"\n\n[📊 查看完整仪表盘]({GITHUB_PAGES_URL})" if GITHUB_PAGES_URL else ""
+    summary_short = monthly_summary[:1800] + "..." if len(monthly_summary) > 1800 else monthly_summary
+    send_wecom_markdown(f"## 📅 手游市场月报 · {month_label}\n\n{summary_short}{link_line}\n")
+    send_email(f"手游市场月报 · {month_label}", _markdown_to_html(monthly_summary))
+
+    print(f"\n{'='*50}")
+    print("  月报完成！")
+    print(f"{'='*50}\n")
+
+
+if __name__ == "__main__":
+    run_monthly()
@@ -3,6 +3,7 @@
 每周一 UTC 01:00（北京时间 09:00）运行
 """
 
+import argparse
 import sys
 import os
 from datetime import datetime, timedelta
@@ -16,10 +17,16 @@ except ImportError:
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from scrapers import aggregates
 from scrapers.change_detector import load_chart_data, detect_changes, get_top_movers
-from analyzer.ai_analyzer import generate_weekly_summary
+from analyzer.ai_analyzer import (
+    generate_weekly_summary, generate_weekly_summary_from_daily,
+    load_daily_analysis, save_period_summary,
+)
 from reporter.excel_writer import write_weekly_excel
 from reporter.notifier import send_wecom_markdown, build_weekly_wecom_message, send_weekly_email
+from reporter import artifacts
+from pipeline import metrics, profiling
 
 
 def run_weekly():
@@ -28,11 +35,15 @@ def run_weekly():
     print(f"\n{'='*50}")
     print(f"  手游信息池 · 周报生成  {today}")
     print(f"{'='*50}\n")
+    metrics.reset("weekly")
+    metrics.instrument_requests()
 
     # ── 收集过去7天的异动数据 ────────────────────────────
+    metrics.stage("collect")
     print("[Step 1] 收集过去7天异动数据...")
     all_week_changes = []
     latest_data = []
+    daily_records = []
 
     for i in range(7):
         date = (datetime.utcnow() - timedelta(days=i)).strftime("%Y-%m-%d")
@@ -48,23 +59,42 @@ def run_weekly():
         if i == 0 and today_data:
             latest_data = today_data
 
-    print(f"  本周共 {len(all_week_changes)} 个异动事件")
+        daily = load_daily_analysis(date)
+        if daily:
+            daily_records.append(daily)
+
+    metrics.count("changes.total", len(all_week_changes))
+    print(f"  本周共 {len(all_week_changes)} 个异动事件，已存储日报分析 {len(daily_records)} 天")
 
     # ── 生成 AI 周报 ─────────────────────────────────────
+    metrics.stage("analyze")
     print("\n[Step 2] AI 生成周报...")
-    weekly_summary = generate_weekly_summary(all_week_changes, latest_data)
+    if daily_records:
+        # 基于已存储的每日分析分层汇总
+        weekly_summary = generate_weekly_summary_from_daily(daily_records, latest_data)
+    else:
+        # 无日报分析（功能上线前的历史数据），退回基于原始异动生成
+        weekly_summary = generate_weekly_summary(all_week_changes, latest_data)
+    summary_path = save_period_summary("weekly", weekly_summary, today, sorted(r["date"] for r in daily_records))
+    if summary_path:
+        artifacts.record(summary_path)
     print(f"  周报生成完成（{len(weekly_summary)} 字）")
 
     # ── 生成 Excel ───────────────────────────────────────
+    metrics.stage("excel")
     print("\n[Step 3] 生成 Excel 周报...")
-    excel_path = write_weekly_excel(all_week_changes, latest_data, weekly_summary, today)
+    share_rows = aggregates.region_shares(today, days=7)  # 保存日快照时已物化，不再扫描一周榜单
+    excel_path = write_weekly_excel(all_week_changes, latest_data, weekly_summary, today, share_rows)
     print(f"  已输出：{excel_path}")
 
     # ── 推送 ─────────────────────────────────────────────
+    metrics.stage("notify")
     print("\n[Step 4] 推送周报...")
     wecom_msg = build_weekly_wecom_message(weekly_summary, today)
     send_wecom_markdown(wecom_msg)
-    send_weekly_email(weekly_summary, today)
+    send_weekly_email(weekly_summary, today, excel_path)
+    metrics.write_report()
+    artifacts.save()
 
     print(f"\n{'='*50}")
     print("  周报完成！")
@@ -72,4 +102,6 @@ def run_weekly():
 
 
 if __name__ == "__main__":
-    run_weekly()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    profiling.add_arguments(parser)
+    profiling.run(run_weekly, parser.parse_args())
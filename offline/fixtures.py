@@ -0,0 +1,192 @@
+"""
+合成夹具
+在没有录制数据（或无法联网）时，用 bench/synthetic.py 的合成榜单生成全部上游接口的夹具：
+iTunes RSS、iTunes lookup、Google Play（Node 输出）、4 个新闻 RSS、MiniMax、World Bank、企业微信 Webhook
+榜单与异动前后一致，今日快照来自合成数据的最后一天，之前的天数供离线演练写入 history/
+
+    python -m offline.fixtures --out .offline_fixtures --date 2026-03-01
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from analyzer.ai_analyzer import MINIMAX_API_URL
+from bench.synthetic import generate_days
+from offline.replay import FIXTURE_DIR, GOOGLEPLAY_FIXTURE_URL, save_fixture
+from scrapers.appstore_scraper import GAME_GENRE_ID
+from scrapers.change_detector import detect_changes, get_top_movers
+from scrapers.enrichment import LOOKUP_URL, SUBGENRES
+from scrapers.market_scraper import INDICATORS, REGIONS as WB_REGIONS, _ISO3_MAP
+from scrapers.news_scraper import NEWS_SOURCES
+
+WECOM_SEND_URL = "https://qyapi.weixin.qq.com/cgi-bin/webhook/send"
+JSON_HEADERS = {"content-type": "application/json; charset=utf-8"}
+
+
+def _json(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _itunes_feed(apps: list[dict]) -> dict:
+    entries = []
+    for app in apps:
+        entries.append({
+            "im:name": {"label": app["name"]},
+            "im:image": [{"label": app["artwork"], "attributes": {"height": "100"}}],
+            "im:price": {"label": app["price"]},
+            "id": {"label": app["url"], "attributes": {"im:id": app["app_id"]}},
+            "im:artist": {"label": app["artist"]},
+            "category": {"attributes": {"im:id": app["genre_id"], "label": app["genre"]}},
+            "im:releaseDate": {"label": app["release_date"]},
+            "link": {"attributes": {"rel": "alternate", "type": "text/html", "href": app["url"]}},
+        })
+    return {"feed": {"entry": entries}}
+
+
+def _itunes_lookup(apps: list[dict]) -> dict:
+    """一个包含全部 App Store 应用的 lookup 响应（替身服务器按路径匹配，任意 id 批次都返回它）"""
+    results = {}
+    for app in apps:
+        n = int(app["app_id"])
+        results.setdefault(n, {
+            "trackId": n,
+            "releaseDate": app["release_date"],
+            "userRatingCount": n % 50000,
+            "averageUserRating": 3.5 + (n % 15) / 10,
+            "fileSizeBytes": str((50 + n % 1500) << 20),
+            "trackContentRating": ("4+", "9+", "12+", "17+")[n % 4],
+            "currentVersionReleaseDate": app["release_date"],
+            "genreIds": ["6014", *[k for k, v in SUBGENRES.items() if v == app.get("subgenre")][:1]],
+        })
+    return {"resultCount": len(results), "results": list(results.values())}
+
+
+def _rss(source_name: str, now: datetime, n: int = 8) -> bytes:
+    items = []
+    for i in range(n):
+        pub = now - timedelta(hours=3 * i + 1)
+        items.append(
+            f"<item><title>{escape(source_name)} 行业动态 {i + 1}：新品上线与买量观察</title>"
+            f"<link>https://example.invalid/{i}</link>"
+            f"<description>{escape('<p>合成新闻摘要，用于离线演练。</p>')}</description>"
+            f"<pubDate>{format_datetime(pub)}</pubDate></item>"
+        )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{escape(source_name)}</title>{''.join(items)}</channel></rss>").encode("utf-8")
+
+
+def _analysis_entries(changes: list[dict], change_type: str) -> list[dict]:
+    picked = [c for c in changes if c["change_type"] in change_type][:3]
+    return [{
+        "game": c["name"],
+        "change": (f"新进榜 #{c['rank_today']}" if c["change_type"] == "新进榜"
+                   else f"{c['change_type']}{abs(c['rank_delta'])}位（#{c['rank_yesterday']}→#{c['rank_today']}）"),
+        "region": c["region_name"],
+        "store": "Google Play" if c["store"] == "google_play" else "App Store",
+        "analysis": "合成数据：版本更新叠加买量投放带动排名变化。",
+    } for c in picked]
+
+
+def _minimax_response(content: str) -> dict:
+    prompt_tokens = 1800
+    return {
+        "choices": [{"message": {"role": "assistant", "content": content}, "finish_reason": "stop", "index": 0}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 2,
+                  "total_tokens": prompt_tokens + len(content) // 2},
+    }
+
+
+def _worldbank(indicator: str, seed: int) -> list:
+    entries = []
+    for i, iso2 in enumerate(WB_REGIONS):
+        iso3 = next(k for k, v in _ISO3_MAP.items() if v == iso2)
+        base = {"SP.POP.TOTL": 5e7 * (i + 1), "NY.GDP.PCAP.CD": 5000 + 4000 * i}.get(indicator, 60 + 3 * i)
+        entries.append({
+            "indicator": {"id": indicator, "value": indicator},
+            "country": {"id": iso2, "value": iso2},
+            "countryiso3code": iso3, "date": "2023", "value": base + seed % 7,
+        })
+    return [{"page": 1, "pages": 1, "per_page": 20, "total": len(entries)}, entries]
+
+
+def write_static_fixtures(fixture_dir):
+    """与榜单无关的夹具：企业微信 Webhook"""
+    save_fixture("POST", WECOM_SEND_URL, None, 200, JSON_HEADERS, _json({"errcode": 0, "errmsg": "ok"}), fixture_dir)
+
+
+def synthesize(fixture_dir=None, date_str: str | None = None, days: int = 8, seed: int = 42,
+               ranks: int = 100) -> list[tuple[str, list[dict]]]:
+    """
+    生成夹具，返回合成的全部快照 [(日期, 榜单)]；最后一天即夹具中的“今日”榜单
+    """
+    fixture_dir = Path(fixture_dir or FIXTURE_DIR)
+    date_str = date_str or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    snapshots = list(generate_days(days=days, seed=seed, ranks=ranks, end_date=date_str))
+    _, today = snapshots[-1]
+    _, yesterday = snapshots[-2]
+
+    # iTunes RSS：每个地区 × 榜单一个 feed
+    groups = {}
+    for app in today:
+        if app["store"] == "appstore":
+            groups.setdefault((app["region"], app["chart_type"]), []).append(app)
+    for (region, chart_type), apps in groups.items():
+        url = f"https://itunes.apple.com/{region}/rss/{chart_type}/limit=100/genre={GAME_GENRE_ID}/json"
+        save_fixture("GET", url, None, 200, JSON_HEADERS, _json(_itunes_feed(apps)), fixture_dir)
+
+    # iTunes lookup：应用元数据补充（scrapers/enrichment.py）
+    appstore_apps = [app for app in today if app["store"] == "appstore"]
+    save_fixture("GET", LOOKUP_URL, None, 200, JSON_HEADERS, _json(_itunes_lookup(appstore_apps)), fixture_dir)
+
+    # Google Play：Node 脚本输出
+    gp_rows = [app for app in today if app["store"] == "google_play"]
+    save_fixture("GET", GOOGLEPLAY_FIXTURE_URL, None, 200, JSON_HEADERS, _json(gp_rows), fixture_dir)
+
+    # 新闻 RSS
+    now = datetime.now(timezone.utc)
+    for source in NEWS_SOURCES:
+        save_fixture("GET", source["url"], None, 200, {"content-type": "application/rss+xml"},
+                     _rss(source["name"], now), fixture_dir)
+
+    # MiniMax：结构化异动分析（请求体含 "rising"）+ 其余文本类请求
+    top = get_top_movers(detect_changes(today, yesterday))
+    analysis = {
+        "rising": _analysis_entries(top, "上升"),
+        "falling": _analysis_entries(top, "下降"),
+        "new_entries": _analysis_entries(top, "新进榜"),
+        "regions": "• 欧美市场头部稳定\n\n• 东南亚新品活跃",
+        "categories": "• 休闲品类持续上升\n\n• 重度 RPG 畅销榜稳定",
+        "industry": "• 合成数据，无真实新闻",
+    }
+    save_fixture("POST", MINIMAX_API_URL, None, 200, JSON_HEADERS,
+                 _json(_minimax_response(json.dumps(analysis, ensure_ascii=False))), fixture_dir, match="rising")
+    summary = "## 本期市场总结\n\n合成数据生成的离线周报/月报内容。\n\n## 重点关注产品\n\n- 示例产品\n\n## 下期预判\n\n- 保持观察"
+    save_fixture("POST", MINIMAX_API_URL, None, 200, JSON_HEADERS, _json(_minimax_response(summary)), fixture_dir)
+
+    # World Bank
+    codes = ";".join(WB_REGIONS)
+    for indicator in INDICATORS:
+        url = f"https://api.worldbank.org/v2/country/{codes}/indicator/{indicator}?format=json&mrv=1&per_page=20"
+        save_fixture("GET", url, None, 200, JSON_HEADERS, _json(_worldbank(indicator, seed)), fixture_dir)
+
+    write_static_fixtures(fixture_dir)
+    print(f"[Fixtures] 已生成 {date_str} 的合成夹具（{len(today)} 条榜单）→ {fixture_dir}")
+    return snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成夹具")
+    parser.add_argument("--out", default=str(FIXTURE_DIR))
+    parser.add_argument("--date", default=None, help="“今日”日期，默认当天（UTC）")
+    parser.add_argument("--days", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    synthesize(args.out, args.date, args.days, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+离线演练
+在本地替身服务器上完整跑一遍 run_daily / run_weekly，不访问任何线上服务、不改动仓库的 data/：
+- HTTP 请求经 offline/replay.py 改写到 offline/standin.py（延迟、抖动、错误率、限流可调）
+- Google Play 从替身服务器读取录制 / 合成的 Node 输出
+- 企业微信指向替身服务器，邮件发到 offline/smtp_server.py
+- 数据写到临时目录（offline/sandbox.py），运行指标照常输出，可直接比较并发、重试策略的效果
+
+    python -m offline.harness daily                         # 合成夹具，默认网络条件
+    python -m offline.harness weekly --latency 300 --error-rate 0.05 --throttle 20
+    python -m offline.harness daily --fixtures .offline_fixtures --keep /tmp/offline-run
+    python -m offline.harness daily --record                # 联网录制夹具（不推送企业微信/邮件）
+    python -m offline.harness static                        # 静态数据增量构建（第二遍应全部跳过）
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+OFFLINE_WEBHOOK = "https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=offline"
+
+
+def _configure_env(smtp_port: int | None):
+    """在导入流水线模块前设置环境变量（多个模块在导入时读取配置）"""
+    os.environ["WECOM_WEBHOOK_URL"] = OFFLINE_WEBHOOK if smtp_port else ""
+    os.environ["WECOM_WEBHOOK_URLS"] = ""
+    os.environ.setdefault("SUBSCRIPTIONS_FILE", str(ROOT_DIR / "subscriptions.example.json"))
+    # 每次演练的缓存都是空的，按线上限额查询 lookup 要等一分钟以上；限流效果用 --throttle 演练
+    os.environ.setdefault("ENRICH_LOOKUP_RATE", "600")
+    os.environ["ICON_FETCH"] = ""  # 替身服务器没有图标夹具，icons 阶段不运行
+    if smtp_port:
+        os.environ["MINIMAX_API_KEY"] = "offline"
+        os.environ.update({
+            "EMAIL_SMTP_HOST": "127.0.0.1", "EMAIL_SMTP_PORT": str(smtp_port),
+            "EMAIL_USER": "", "EMAIL_PASS": "",
+            "EMAIL_FROM": "bot@offline.test", "EMAIL_TO": "team@offline.test",
+        })
+    else:
+        # 录制模式：真实访问数据源，但不向企业微信 / 邮箱推送
+        os.environ["EMAIL_TO"] = ""
+        os.environ["SUBSCRIPTIONS_JSON"] = "[]"
+
+
+def _seed_history(snapshots: list, kind: str):
+    """把合成快照中“今日”之前的天数写入 history/，周报时同时包含今日"""
+    from scrapers.change_detector import save_chart_data
+
+    seeded = snapshots if kind == "weekly" else snapshots[:-1]
+    for day, rows in seeded:
+        save_chart_data(rows, day)
+
+
+def _run_static(root: Path):
+    """把仓库的 *_static.json 复制进临时数据目录，连续构建两遍（第二遍输入未变，应全部跳过）"""
+    from pipeline import static_build
+
+    for path in (ROOT_DIR / "data").glob("*_static.json"):
+        shutil.copy2(path, root / "data" / path.name)
+    static_build.build_all()
+    rebuilt = static_build.build_all()
+    print(f"[Offline] 第二遍重建 {len(rebuilt)} 个产物" + ("（预期为 0）" if rebuilt else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线演练 run_daily / run_weekly / 静态数据构建")
+    parser.add_argument("flow", choices=["daily", "weekly", "static"])
+    parser.add_argument("--record", action="store_true", help="联网录制夹具到 --fixtures")
+    parser.add_argument("--keep", default=None, help="数据目录保留到此路径（默认运行后删除）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stream", action="store_true", help="daily 使用流式采集 + 异动检测")
+    from offline.standin import add_arguments
+    add_arguments(parser)
+    parser.set_defaults(fixtures=None)
+    args = parser.parse_args()
+
+    smtp = None
+    if not args.record:
+        from offline.smtp_server import OfflineSMTPServer
+        smtp = OfflineSMTPServer().start()
+    _configure_env(smtp.port if smtp else None)
+
+    from offline import replay
+    from offline.sandbox import data_root
+
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    fixture_dir = Path(args.fixtures) if args.fixtures else None
+    standin = None
+    snapshots = []
+    if args.record:
+        replay.install("record", fixture_dir or replay.FIXTURE_DIR)
+    else:
+        from offline.fixtures import synthesize, write_static_fixtures
+        from offline.standin import StandinServer
+
+        if fixture_dir is None:
+            fixture_dir = Path(tempfile.mkdtemp(prefix="gameinfo-fixtures-"))
+        if not any(fixture_dir.glob("*/*.json")):
+            snapshots = synthesize(fixture_dir, today, days=8, seed=args.seed)
+        else:
+            write_static_fixtures(fixture_dir)
+        standin = StandinServer(fixture_dir=fixture_dir, latency_ms=args.latency, jitter_ms=args.jitter,
+                                error_rate=args.error_rate, throttle_per_min=args.throttle).start()
+        print(f"[Offline] 替身服务器 {standin.base_url}，夹具 {len(standin.store)} 个，"
+              f"延迟 {args.latency}±{args.jitter}ms，错误率 {args.error_rate:.0%}，限流 {args.throttle or '无'}/分钟")
+        replay.install("replay", fixture_dir, standin.base_url)
+
+    with data_root(args.keep, keep=bool(args.keep)) as root:
+        if snapshots and args.flow != "static":
+            _seed_history(snapshots, args.flow)
+        if args.flow == "static":
+            _run_static(root)
+        elif args.flow == "daily":
+            from main_daily import run_daily
+            run_daily(stream=args.stream)
+        else:
+            from main_weekly import run_weekly
+            run_weekly()
+
+        from pipeline import metrics
+        run = metrics.report()
+        print(f"\n[Offline] 完成，总耗时 {run['duration_s']:.1f}s，数据目录 {root}"
+              + ("" if args.keep else "（已删除）"))
+
+    if standin:
+        print("[Offline] 替身服务器统计：\n" + standin.summary())
+        standin.shutdown()
+    if smtp:
+        print(f"[Offline] SMTP 替身收到 {len(smtp.messages)} 封邮件")
+        smtp.shutdown()
+
+
+if __name__ == "__main__":
+    main()
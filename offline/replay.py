@@ -0,0 +1,160 @@
+"""
+HTTP 录制 / 回放层
+挂到 requests.Session.send 上，覆盖所有经 requests 发出的请求（iTunes、新闻、World Bank、MiniMax、企业微信）
+- record：照常访问线上，把响应保存为夹具（只存响应，不存请求头，URL 中的 key/token 脱敏）
+- replay：把请求改写到本地替身服务器 offline/standin.py，由其按夹具应答并模拟延迟、错误与限流
+Google Play 由 Node 脚本采集，录制时保存脚本输出，回放时经 GOOGLEPLAY_CHARTS_URL 从替身服务器读取
+
+夹具格式：{fixture_dir}/{host}/{key}.json
+    {"method", "url", "body_sha", "match", "status", "headers", "body_b64"}
+匹配顺序：方法+URL+请求体 → 方法+URL → 方法+域名+路径（忽略查询串）；
+夹具可带 match 字段，要求请求体包含该子串（如区分 MiniMax 的结构化分析与周报）
+"""
+
+import base64
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+ROOT_DIR = Path(__file__).parent.parent
+FIXTURE_DIR = Path(os.environ.get("OFFLINE_FIXTURE_DIR", "") or ROOT_DIR / ".offline_fixtures")
+
+# Node 采集结果的伪 URL，录制与回放共用
+GOOGLEPLAY_FIXTURE_URL = "https://play.google.com/__offline__/charts.json"
+
+# URL 中需要脱敏的查询参数（如企业微信 Webhook 的 key）
+SECRET_PARAMS = {"key", "token", "access_token", "api_key", "apikey"}
+
+# 只保留这些响应头
+KEPT_HEADERS = {"content-type", "retry-after", "etag", "last-modified"}
+
+_installed_mode = None
+_fixture_dir = None
+
+
+def _body_bytes(body) -> bytes:
+    if body is None:
+        return b""
+    return body.encode("utf-8") if isinstance(body, str) else bytes(body)
+
+
+def redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [(k, "REDACTED" if k.lower() in SECRET_PARAMS else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def fixture_key(method: str, url: str, body=None, match: str | None = None) -> str:
+    h = hashlib.sha256(f"{method.upper()} {url} {match or ''}\n".encode("utf-8"))
+    h.update(_body_bytes(body))
+    return h.hexdigest()[:20]
+
+
+def save_fixture(method: str, url: str, body, status: int, headers: dict, content: bytes,
+                 fixture_dir=None, match: str | None = None) -> Path:
+    fixture_dir = Path(fixture_dir or FIXTURE_DIR)
+    url = redact_url(url)
+    host = urlsplit(url).hostname or "unknown"
+    path = fixture_dir / host / f"{fixture_key(method, url, body, match)}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "method": method.upper(),
+        "url": url,
+        "body_sha": hashlib.sha256(_body_bytes(body)).hexdigest(),
+        "status": status,
+        "headers": {k.lower(): v for k, v in headers.items() if k.lower() in KEPT_HEADERS},
+        "body_b64": base64.b64encode(content).decode("ascii"),
+    }
+    if match:
+        record["match"] = match
+    path.write_text(json.dumps(record, ensure_ascii=False, indent=1), encoding="utf-8")
+    return path
+
+
+class FixtureStore:
+    """加载夹具目录并按请求查找"""
+
+    def __init__(self, fixture_dir=None):
+        self.fixture_dir = Path(fixture_dir or FIXTURE_DIR)
+        self.exact, self.by_url, self.by_path = {}, {}, {}
+        for path in sorted(self.fixture_dir.glob("*/*.json")):
+            record = json.loads(path.read_text(encoding="utf-8"))
+            method, url = record["method"], record["url"]
+            parts = urlsplit(url)
+            if not record.get("match"):
+                self.exact[(method, url, record["body_sha"])] = record
+            self.by_url.setdefault((method, url), []).append(record)
+            self.by_path.setdefault((method, parts.hostname, parts.path), []).append(record)
+
+    def __len__(self):
+        return sum(len(records) for records in self.by_url.values())
+
+    def find(self, method: str, url: str, body: bytes = b"") -> dict | None:
+        method = method.upper()
+        url = redact_url(url)
+        record = self.exact.get((method, url, hashlib.sha256(body).hexdigest()))
+        if record:
+            return record
+        parts = urlsplit(url)
+        for candidates in (self.by_url.get((method, url)), self.by_path.get((method, parts.hostname, parts.path))):
+            if not candidates:
+                continue
+            text = body.decode("utf-8", errors="ignore")
+            matched = [r for r in candidates if r.get("match") and r["match"] in text]
+            plain = [r for r in candidates if not r.get("match")]
+            if matched or plain:
+                return (matched or plain)[0]
+        return None
+
+
+def standin_url(base: str, url: str) -> str:
+    """https://itunes.apple.com/us/rss?x=1 → {base}/https/itunes.apple.com/us/rss?x=1"""
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{base.rstrip('/')}/{parts.scheme}/{parts.netloc}{parts.path or '/'}{query}"
+
+
+def install(mode: str, fixture_dir=None, standin_base: str | None = None):
+    """
+    mode: record（保存线上响应）/ replay（改写到替身服务器 standin_base）
+    幂等；需在 pipeline.metrics.instrument_requests 之前调用，指标中记录的仍是原始域名
+    """
+    global _installed_mode, _fixture_dir
+    import requests
+
+    if _installed_mode:
+        return
+    if mode == "replay" and not standin_base:
+        raise ValueError("replay 模式需要替身服务器地址")
+    original = requests.Session.send
+
+    def send(self, request, **kwargs):
+        if mode == "replay":
+            original_url = request.url
+            request.url = standin_url(standin_base, original_url)
+            try:
+                return original(self, request, **kwargs)
+            finally:
+                request.url = original_url
+        resp = original(self, request, **kwargs)
+        save_fixture(request.method, request.url, request.body, resp.status_code,
+                     dict(resp.headers), resp.content, fixture_dir)
+        return resp
+
+    requests.Session.send = send
+    _installed_mode = mode
+    _fixture_dir = fixture_dir
+    os.environ["OFFLINE_MODE"] = mode
+    if mode == "replay":
+        os.environ["GOOGLEPLAY_CHARTS_URL"] = GOOGLEPLAY_FIXTURE_URL
+    print(f"[Offline] 已启用 {mode} 模式，夹具目录 {Path(fixture_dir or FIXTURE_DIR)}")
+
+
+def record_googleplay(stdout: str, fixture_dir=None):
+    """录制模式下保存 Node 脚本的输出"""
+    save_fixture("GET", GOOGLEPLAY_FIXTURE_URL, None, 200, {"content-type": "application/json"},
+                 stdout.encode("utf-8"), fixture_dir or _fixture_dir)
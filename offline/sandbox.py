@@ -0,0 +1,65 @@
+"""
+临时数据目录
+把各模块的数据目录常量指向指定目录（默认新建临时目录），退出时恢复
+基准测试、离线演练用它隔离输出，不会改动仓库里的 data/
+"""
+
+import contextlib
+import shutil
+import tempfile
+from pathlib import Path
+
+
+def _patches(root: Path) -> list[tuple]:
+    from analyzer import ai_analyzer
+    from pipeline import metrics
+    from reporter import artifacts, dashboard_writer, delivery, excel_writer, icon_cache, rank_series
+    from scrapers import aggregates, casual_scraper, change_detector, device_scraper, enrichment, intraday, market_scraper
+
+    data = root / "data"
+    return [
+        (artifacts, "ROOT_DIR", root), (artifacts, "DATA_DIR", data),
+        (artifacts, "MANIFEST_FILE", data / "artifacts.json"),
+        (artifacts, "CHANGED_LIST", root / "changed_files.txt"),
+        (artifacts, "_manifest", None), (artifacts, "_changed", {}),
+        (change_detector, "DATA_DIR", data / "history"), (aggregates, "DATA_DIR", data / "aggregates"),
+        (intraday, "DATA_DIR", data / "intraday"), (intraday, "STATE_FILE", data / "intraday" / "state.json"),
+        (enrichment, "DATA_DIR", data / "enrichment"), (enrichment, "CACHE_FILE", data / "enrichment" / "apps.json"),
+        (excel_writer, "DATA_DIR", data),
+        (dashboard_writer, "DATA_DIR", data), (dashboard_writer, "DASHBOARD_DIR", data / "dashboard"),
+        (dashboard_writer, "SHARD_DIR", data / "dashboard" / "shards"),
+        (icon_cache, "DATA_DIR", data / "icons"), (icon_cache, "INDEX_FILE", data / "icons" / "index.json"),
+        (icon_cache, "OBJECT_DIR", data / "icons" / "objects"),
+        (rank_series, "DATA_DIR", data), (rank_series, "STATE_FILE", data / "history" / "rank_series.json"),
+        (ai_analyzer, "ANALYSIS_DIR", data / "analysis"),
+        (metrics, "DATA_DIR", data), (metrics, "METRICS_DIR", data / "metrics"),
+        (metrics, "RUN_FILE", data / "metrics" / "run_metrics.json"),
+        (metrics, "HISTORY_FILE", data / "metrics" / "history.json"),
+        (delivery, "DATA_DIR", data), (delivery, "OUTBOX_FILE", data / "outbox" / "wecom_pending.json"),
+        *[(module, "DATA_DIR", data) for module in (market_scraper, device_scraper, casual_scraper)],
+        *[(module, attr, data / getattr(module, attr).name)
+          for module in (market_scraper, device_scraper, casual_scraper)
+          for attr in ("STATIC_FILE", "OUTPUT_FILE")],
+    ]
+
+
+@contextlib.contextmanager
+def data_root(root=None, keep: bool = False):
+    """
+    yield 新的仓库根目录（其下 data/ 为数据目录）
+    root 为空时新建临时目录，keep=False 时退出后删除
+    """
+    created = root is None
+    root = Path(tempfile.mkdtemp(prefix="gameinfo-")) if created else Path(root)
+    (root / "data").mkdir(parents=True, exist_ok=True)
+    patches = _patches(root)
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr(module, name, value)
+    try:
+        yield root
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+        if created and not keep:
+            shutil.rmtree(root, ignore_errors=True)
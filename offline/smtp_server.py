@@ -0,0 +1,171 @@
+"""
+本地 SMTP 替身服务器
+用于在没有真实邮箱的环境下演练邮件发送（reporter/mailer.py）
+- 支持 EHLO/HELO、AUTH PLAIN/LOGIN、MAIL、RCPT、DATA、RSET、NOOP、QUIT（不支持 STARTTLS）
+- 收到的邮件保存在内存（server.messages），也可写入目录为 .eml 文件
+- 可按比例注入 451 临时错误、或在 DATA 后直接断开连接，用于验证重试逻辑
+
+用法：
+    python -m offline.smtp_server --port 2525 --out-dir /tmp/mails --fail-rate 0.2
+    EMAIL_SMTP_HOST=127.0.0.1 EMAIL_SMTP_PORT=2525 EMAIL_FROM=bot@example.com python main_weekly.py
+"""
+
+import argparse
+import base64
+import random
+import socketserver
+import threading
+from pathlib import Path
+
+
+def _address(arg: str) -> str:
+    """FROM:<a@b.com> SIZE=123 → a@b.com"""
+    value = arg.split(":", 1)[-1].strip()
+    if value.startswith("<"):
+        return value[1:value.find(">")]
+    return value.split(" ")[0]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode("utf-8"))
+
+    def _readline(self) -> str | None:
+        raw = self.rfile.readline()
+        if not raw:
+            return None
+        return raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self._reply("220 localhost offline SMTP ready")
+        sender, recipients = None, []
+        while True:
+            line = self._readline()
+            if line is None:
+                return
+            verb, _, arg = line.partition(" ")
+            verb = verb.upper()
+
+            if verb in ("EHLO", "HELO"):
+                if verb == "EHLO":
+                    self._reply("250-localhost")
+                    self._reply("250-AUTH PLAIN LOGIN")
+                    self._reply("250 8BITMIME")
+                else:
+                    self._reply("250 localhost")
+            elif verb == "AUTH":
+                mech, _, initial = arg.partition(" ")
+                if mech.upper() == "PLAIN":
+                    if not initial:
+                        self._reply("334 ")
+                        initial = self._readline() or ""
+                    parts = base64.b64decode(initial).split(b"\0")
+                    user, password = parts[-2].decode(), parts[-1].decode()
+                elif mech.upper() == "LOGIN":
+                    self._reply("334 VXNlcm5hbWU6")
+                    user = base64.b64decode(self._readline() or "").decode()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    password = base64.b64decode(self._readline() or "").decode()
+                else:
+                    self._reply("504 Unrecognized authentication type")
+                    continue
+                if server.credentials and server.credentials != (user, password):
+                    self._reply("535 Authentication failed")
+                else:
+                    server.logins += 1
+                    self._reply("235 Authentication successful")
+            elif verb == "MAIL":
+                sender, recipients = _address(arg), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(_address(arg))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self._readline()
+                    if data_line is None:
+                        return
+                    if data_line == ".":
+                        break
+                    lines.append(data_line[1:] if data_line.startswith("..") else data_line)
+                roll = random.random()
+                if roll < server.drop_rate:
+                    return  # 模拟连接中断
+                if roll < server.drop_rate + server.fail_rate:
+                    self._reply("451 Temporary local problem, try again")
+                    continue
+                server.store(sender, recipients, "\r\n".join(lines))
+                self._reply("250 OK queued")
+                sender, recipients = None, []
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class OfflineSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, out_dir=None,
+                 fail_rate: float = 0.0, drop_rate: float = 0.0, credentials: tuple | None = None):
+        super().__init__((host, port), _SMTPHandler)
+        self.out_dir = Path(out_dir) if out_dir else None
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.credentials = credentials
+        self.messages: list[dict] = []
+        self.connections = 0
+        self.logins = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def store(self, sender: str, recipients: list[str], data: str):
+        with self._lock:
+            self.messages.append({"from": sender, "to": recipients, "data": data})
+            if self.out_dir:
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                (self.out_dir / f"{len(self.messages):04d}.eml").write_text(data, encoding="utf-8")
+
+    def start(self) -> "OfflineSMTPServer":
+        """后台线程运行，返回自身"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 SMTP 替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--out-dir", default=None, help="收到的邮件保存为 .eml 的目录")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="DATA 后返回 451 的比例")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="DATA 后直接断开的比例")
+    args = parser.parse_args()
+
+    server = OfflineSMTPServer(args.host, args.port, args.out_dir, args.fail_rate, args.drop_rate)
+    print(f"[SMTP] 监听 {args.host}:{server.port}，Ctrl+C 退出")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[SMTP] 共收到 {len(server.messages)} 封邮件")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+上游服务替身服务器
+按夹具应答经 offline/replay.py 改写过来的请求（路径形如 /https/itunes.apple.com/us/rss/...），
+并模拟真实网络条件：
+- 延迟与抖动：每个请求 latency ± jitter 毫秒（可按域名单独设置）
+- 错误率：按比例返回 503
+- 限流：每个域名滑动窗口计数，超出后返回 429 + Retry-After；
+  企业微信与真实接口一致，返回 HTTP 200 + errcode 45009
+- 没有夹具的请求返回 404，并计入 misses 方便排查
+
+    python -m offline.standin --port 8765 --latency 120 --jitter 60 --error-rate 0.02 --throttle 20
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from offline.replay import FIXTURE_DIR, FixtureStore
+
+WECOM_HOST = "qyapi.weixin.qq.com"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            if key.lower() not in ("content-length", "transfer-encoding", "content-encoding", "connection"):
+                self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        server = self.server
+        parts = self.path.lstrip("/").split("/", 2)
+        if len(parts) < 2:
+            self._send(400, b"bad stand-in path")
+            return
+        scheme, netloc = parts[0], parts[1]
+        rest = parts[2] if len(parts) > 2 else ""
+        url = f"{scheme}://{netloc}/{rest}"
+        host = urlsplit(url).hostname
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        server.wait(host)
+        server.count(host, "requests")
+        if server.throttled(host):
+            server.count(host, "throttled")
+            if host == WECOM_HOST:
+                payload = {"errcode": 45009, "errmsg": "api freq out of limit"}
+                self._send(200, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+            else:
+                self._send(429, b"Too Many Requests", {"Retry-After": "1"})
+            return
+        if random.random() < server.error_rate:
+            server.count(host, "errors")
+            self._send(503, b"Service Unavailable (injected)")
+            return
+
+        record = server.store.find(self.command, url, body)
+        if record is None:
+            server.count(host, "misses")
+            self._send(404, f"no fixture for {self.command} {url}".encode("utf-8"))
+            return
+        self._send(record["status"], base64.b64decode(record["body_b64"]), record.get("headers"))
+
+    do_GET = do_POST = do_PUT = do_HEAD = _handle
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fixture_dir=None,
+                 latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0,
+                 throttle_per_min: int = 0, host_latency: dict | None = None, verbose: bool = False):
+        super().__init__((host, port), _Handler)
+        self.store = FixtureStore(fixture_dir or FIXTURE_DIR)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_per_min = throttle_per_min
+        self.host_latency = host_latency or {}
+        self.verbose = verbose
+        self.stats: dict[str, Counter] = {}
+        self._windows: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def wait(self, host: str):
+        latency = self.host_latency.get(host, self.latency_ms)
+        delay = max(0.0, latency + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if delay:
+            time.sleep(delay)
+
+    def throttled(self, host: str) -> bool:
+        if not self.throttle_per_min:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(host, deque())
+            while window and now - window[0] >= 60:
+                window.popleft()
+            if len(window) >= self.throttle_per_min:
+                return True
+            window.append(now)
+            return False
+
+    def count(self, host: str, key: str):
+        with self._lock:
+            self.stats.setdefault(host, Counter())[key] += 1
+
+    def start(self) -> "StandinServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def summary(self) -> str:
+        lines = []
+        for host, c in sorted(self.stats.items()):
+            lines.append(f"  {host:<32} 请求 {c['requests']:4d}  限流 {c['throttled']:3d}  "
+                         f"注入错误 {c['errors']:3d}  无夹具 {c['misses']:3d}")
+        return "\n".join(lines)
+
+
+def add_arguments(parser):
+    parser.add_argument("--fixtures", default=str(FIXTURE_DIR), help="夹具目录")
+    parser.add_argument("--latency", type=float, default=80, help="平均延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=40, help="延迟抖动（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入 503 的比例")
+    parser.add_argument("--throttle", type=int, default=0, help="每个域名每分钟最多请求数，0 为不限")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上游服务替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--verbose", action="store_true")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandinServer(args.host, args.port, args.fixtures, args.latency, args.jitter,
+                           args.error_rate, args.throttle, verbose=args.verbose)
+    print(f"[Standin] 已加载 {len(server.store)} 个夹具，监听 {server.base_url}，Ctrl+C 退出")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(server.summary())
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""python -m pipeline <子命令>，见 pipeline/cli.py"""
+
+from pipeline.cli import main
+
+main()
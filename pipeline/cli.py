@@ -0,0 +1,280 @@
+"""
+统一命令行入口
+把每日流程拆成可单独执行的子命令，重依赖（requests、xlsxwriter、采集脚本）只在用到的子命令里导入，
+“对比两天榜单”“重推昨天的消息”这类快捷操作不再承担整条流水线的导入开销：
+
+    python -m pipeline scrape   [--date D]                    # 采集榜单并写入 history/
+    python -m pipeline detect   [--date D] [--against D0]     # 对比两天榜单（只读 history/）
+    python -m pipeline analyze  [--date D] [--no-news]        # 异动检测 + AI 分析，写入 analysis/daily/
+    python -m pipeline report   [--date D]                    # 用已存数据重新生成 Excel + 仪表盘
+    python -m pipeline notify   [--date D] [--subscriptions]  # 用已存数据重推企业微信（及订阅摘要）
+    python -m pipeline backfill --start D1 --end D2 [--analyze]
+    python -m pipeline intraday [--rollup D]                  # 小时级采集一次 / 汇总某天（scrapers/intraday.py）
+    python -m pipeline static   [--force] [--only market ...] # 增量重建 market/device/casual.json（pipeline/static_build.py）
+    python -m pipeline daily|weekly [--profile ...]           # 完整流程，等同 main_daily.py / main_weekly.py
+    python -m pipeline daily --stream                         # 边采集边逐组检测异动（pipeline/streaming.py）
+
+日期默认取 history/ 中最新的一天，对比日默认取前一天（与 run_daily 一致）
+导入耗时预算见 pipeline/import_budget.py
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def _load_env():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+
+def _latest_date() -> str:
+    """history/ 中最新的日期（rank_series.json 等非日期文件除外）"""
+    from scrapers import change_detector
+
+    dates = sorted(p.stem for p in change_detector.DATA_DIR.glob("????-??-??.json"))
+    if not dates:
+        sys.exit("[CLI] data/history/ 中没有榜单数据，请先运行 scrape")
+    return dates[-1]
+
+
+def _previous_day(date_str: str) -> str:
+    return (datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _load_day(date_str: str, required: bool = True) -> list[dict]:
+    from scrapers.change_detector import load_chart_data
+
+    data = load_chart_data(date_str)
+    if not data and required:
+        sys.exit(f"[CLI] 没有 {date_str} 的榜单数据")
+    return data
+
+
+def _changes_for(date_str: str, against: str | None = None) -> tuple[list[dict], list[dict], list[dict]]:
+    """返回 (当日榜单, 全部异动, 重点异动)；对比日无数据时异动为空"""
+    from scrapers.change_detector import detect_changes, get_top_movers
+
+    today_data = _load_day(date_str)
+    previous = _load_day(against or _previous_day(date_str), required=False)
+    changes = detect_changes(today_data, previous) if previous else []
+    return today_data, changes, get_top_movers(changes)
+
+
+def _stored_analysis(date_str: str) -> dict:
+    from analyzer.ai_analyzer import load_daily_analysis
+
+    record = load_daily_analysis(date_str)
+    if record is None:
+        print(f"[CLI] 没有 {date_str} 的已存分析，异动解读留空（可先运行 analyze）")
+        return {}
+    return record["analysis"]
+
+
+# ─── 子命令 ──────────────────────────────────────────────
+
+def cmd_scrape(args):
+    from scrapers.appstore_scraper import fetch_all_appstore_charts
+    from scrapers.change_detector import save_chart_data
+    from scrapers.googleplay_scraper import fetch_all_googleplay_charts
+    from scrapers.records import ChartSnapshot
+
+    date_str = args.date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    appstore_data = fetch_all_appstore_charts()
+    for app in appstore_data:
+        app["store"] = "appstore"
+    gplay_data = fetch_all_googleplay_charts()
+    save_chart_data(ChartSnapshot(appstore_data + gplay_data, date_str), date_str)
+
+
+def cmd_detect(args):
+    date_str = args.date or _latest_date()
+    against = args.against or _previous_day(date_str)
+    _, changes, top = _changes_for(date_str, against)
+    if args.json:
+        from pipeline import codec
+        print(codec.dumps_text(top[:args.top], indent=2))
+        return
+    if not changes:
+        print(f"[CLI] {date_str} 与 {against} 之间没有可对比的异动")
+        return
+    from reporter.notifier import format_change_line
+
+    print(f"{date_str} vs {against}：共 {len(changes)} 个异动，重点 {len(top)} 个")
+    for c in top[:args.top]:
+        print(format_change_line(c))
+
+
+def cmd_analyze(args):
+    from analyzer.ai_analyzer import analyze_changes, save_daily_analysis
+    from scrapers import aggregates
+
+    date_str = args.date or _latest_date()
+    _, changes, top = _changes_for(date_str)
+    news_list = []
+    if not args.no_news:
+        from scrapers.news_scraper import fetch_all_news
+        news_list = fetch_all_news(hours=48)
+    analysis = analyze_changes(top, news_list=news_list, share_text=aggregates.prompt_text(date_str))
+    save_daily_analysis(analysis, date_str, changes)
+
+
+def _report(date_str: str, dashboard: bool = True):
+    from analyzer.ai_analyzer import format_analysis_text, generate_chart_summary_text
+    from reporter.dashboard_writer import write_dashboard_json
+    from reporter.excel_writer import write_daily_excel
+
+    all_data, _, top = _changes_for(date_str)
+    analysis = _stored_analysis(date_str)
+    chart_summary = generate_chart_summary_text(all_data)
+    full_analysis = chart_summary + "\n\n" + format_analysis_text(analysis)
+    excel_path = write_daily_excel(all_data, top, full_analysis, date_str)
+    if dashboard:
+        write_dashboard_json(all_data, top, analysis, chart_summary, date_str)
+    return excel_path
+
+
+def cmd_report(args):
+    from reporter import artifacts
+
+    print(f"[CLI] 已输出：{_report(args.date or _latest_date())}")
+    artifacts.save()
+
+
+def cmd_notify(args):
+    from analyzer.ai_analyzer import format_analysis_text, generate_chart_summary_text
+    from reporter.notifier import send_daily_wecom
+
+    date_str = args.date or _latest_date()
+    all_data, changes, top = _changes_for(date_str)
+    chart_summary = generate_chart_summary_text(all_data)
+    send_daily_wecom(all_data, top, chart_summary, format_analysis_text(_stored_analysis(date_str)), date_str)
+    if args.subscriptions:
+        from reporter import excel_writer
+        from reporter.subscriptions import send_subscription_digests
+
+        excel_path = excel_writer.DATA_DIR / f"榜单日报_{date_str}.xlsx"
+        send_subscription_digests(changes, date_str, excel_path if excel_path.exists() else None)
+
+
+def cmd_backfill(args):
+    from scrapers import change_detector
+    from reporter import artifacts
+
+    dates = sorted(p.stem for p in change_detector.DATA_DIR.glob("????-??-??.json")
+                   if args.start <= p.stem <= args.end)
+    if not dates:
+        sys.exit(f"[CLI] {args.start} ~ {args.end} 没有榜单数据")
+    latest = _latest_date()
+    for date_str in dates:
+        print(f"\n[CLI] 回填 {date_str}")
+        if args.analyze:
+            cmd_analyze(argparse.Namespace(date=date_str, no_news=True))
+        # 仪表盘只反映最新一天，回填历史日期时不覆盖
+        _report(date_str, dashboard=date_str == latest)
+    artifacts.save()
+
+
+def cmd_intraday(args):
+    from reporter import artifacts
+    from scrapers import intraday
+
+    if args.rollup:
+        if intraday.rollup(args.rollup) is None:
+            print(f"[CLI] {args.rollup} 没有 intraday 数据")
+    else:
+        intraday.capture()
+    artifacts.save()
+
+
+def cmd_static(args):
+    from pipeline import static_build
+
+    static_build.main((["--force"] if args.force else []) + (["--only", *args.only] if args.only else []))
+
+
+def cmd_flow(args):
+    from pipeline import profiling
+
+    if args.command == "daily":
+        from main_daily import run_daily as func
+    else:
+        from main_weekly import run_weekly as func
+    if args.command == "daily":
+        profiling.run(lambda: func(stream=args.stream), args)
+    else:
+        profiling.run(func, args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="手游信息池命令行")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scrape", help="采集 App Store / Google Play 榜单并写入 history/")
+    p.add_argument("--date", help="保存为该日期（默认当天 UTC）")
+    p.set_defaults(func=cmd_scrape)
+
+    p = sub.add_parser("detect", help="对比两天榜单，输出重点异动")
+    p.add_argument("--date", help="默认 history/ 中最新一天")
+    p.add_argument("--against", help="对比日期，默认前一天")
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--json", action="store_true", help="输出 JSON")
+    p.set_defaults(func=cmd_detect)
+
+    p = sub.add_parser("analyze", help="异动检测 + AI 分析，结果写入 analysis/daily/")
+    p.add_argument("--date")
+    p.add_argument("--no-news", action="store_true", help="不抓取新闻")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("report", help="用已存榜单与分析重新生成 Excel + 仪表盘")
+    p.add_argument("--date")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("notify", help="用已存榜单与分析重推企业微信")
+    p.add_argument("--date")
+    p.add_argument("--subscriptions", action="store_true", help="同时重发订阅摘要")
+    p.set_defaults(func=cmd_notify)
+
+    p = sub.add_parser("backfill", help="对日期范围内已有榜单的日期重新生成报告")
+    p.add_argument("--start", required=True)
+    p.add_argument("--end", required=True)
+    p.add_argument("--analyze", action="store_true", help="同时重跑 AI 分析（不抓新闻）")
+    p.set_defaults(func=cmd_backfill)
+
+    p = sub.add_parser("intraday", help="小时级采集一次，只保存排名有变化的组")
+    p.add_argument("--rollup", metavar="DATE", help="改为把该日的小时快照汇总进日快照")
+    p.set_defaults(func=cmd_intraday)
+
+    p = sub.add_parser("static", help="重建输入有变化的市场 / 设备 / 休闲游戏数据")
+    p.add_argument("--force", action="store_true", help="忽略输入哈希，全部重建")
+    p.add_argument("--only", nargs="+", choices=["market", "device", "casual"])
+    p.set_defaults(func=cmd_static)
+
+    for name in ("daily", "weekly"):
+        p = sub.add_parser(name, help=f"完整{'每日' if name == 'daily' else '每周'}流程")
+        # 剖析参数与 pipeline/profiling.py 的 add_arguments 一致，这里不提前导入该模块
+        p.add_argument("--profile", action="append", default=[], metavar="STAGE")
+        p.add_argument("--profile-dir", default=str(ROOT_DIR / "profiles"))
+        p.add_argument("--profile-interval", type=float, default=0.005)
+        if name == "daily":
+            p.add_argument("--stream", action="store_true", help="边采集边逐组检测异动")
+        p.set_defaults(func=cmd_flow)
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    if args.command not in ("detect", "report"):
+        _load_env()
+    sys.path.insert(0, str(ROOT_DIR))
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
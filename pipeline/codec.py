@@ -0,0 +1,110 @@
+"""
+JSON 编解码层
+历史榜单、仪表盘、Google Play 输出、静态数据等所有 JSON 读写都经过这里：
+- 安装了 orjson 时用它编解码（数 MB 的日榜文件快数倍），否则回退到标准库 json
+- 输出与标准库 json.dumps(ensure_ascii=False, ...) 逐字节一致：
+  紧凑格式对应 separators=(",", ":")，indent=2 对应 OPT_INDENT_2；
+  其他缩进、超出 64 位的整数等 orjson 不支持的情况自动交给标准库
+  例外：|x| < 1e-4 或 ≥ 1e16 的浮点数写法不同（1e-05 写作 0.00001，数值相同），
+  NaN / Infinity 写作 null（标准库输出的本就不是合法 JSON），榜单与仪表盘数据中没有这类值
+- 带 to_dict() 方法的对象（如 scrapers/records.py 的 ChartRecord）按其字典形式序列化
+- 设置 GAMEINFO_JSON_BACKEND=stdlib 可强制使用标准库（排查差异时用）
+
+    python -m pipeline.codec data/latest.json data/history/*.json   # 校验两种后端输出是否一致
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.environ.get("GAMEINFO_JSON_BACKEND", "").lower() == "stdlib":
+    orjson = None
+
+BACKEND = "orjson" if orjson else "stdlib"
+
+COMPACT = (",", ":")
+
+
+def _with_records(default):
+    """先按 to_dict() 转换记录类型，其余交给调用方的 default"""
+    def convert(obj):
+        to_dict = getattr(obj, "to_dict", None)
+        if to_dict is not None:
+            return to_dict()
+        if default is not None:
+            return default(obj)
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return convert
+
+
+def _stdlib_dumps(obj, indent: int | None, sort_keys: bool, default) -> str:
+    separators = COMPACT if indent is None else None
+    return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators,
+                      sort_keys=sort_keys, default=default)
+
+
+def dumps(obj, indent: int | None = None, sort_keys: bool = False, default=None) -> bytes:
+    """序列化为 UTF-8 字节；indent=None 为紧凑格式"""
+    default = _with_records(default)
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            pass  # 如超出 64 位的整数，交给标准库
+    return _stdlib_dumps(obj, indent, sort_keys, default).encode("utf-8")
+
+
+def dumps_text(obj, indent: int | None = None, sort_keys: bool = False, default=None) -> str:
+    return dumps(obj, indent, sort_keys, default).decode("utf-8")
+
+
+def loads(data: bytes | str):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # 如 NaN / Infinity，交给标准库再试（确属非法时由标准库报错）
+    return json.loads(data)
+
+
+def load(path: Path):
+    return loads(Path(path).read_bytes())
+
+
+def dump(obj, path: Path, indent: int | None = None, sort_keys: bool = False) -> bytes:
+    """写入文件并返回写入的字节"""
+    raw = dumps(obj, indent, sort_keys)
+    Path(path).write_bytes(raw)
+    return raw
+
+
+def main():
+    """按文件现有格式（紧凑或 indent=2）分别用两种后端重新序列化，比较输出"""
+    if orjson is None:
+        sys.exit("[Codec] 未安装 orjson（或已强制 stdlib），无需校验")
+    mismatched = 0
+    for name in sys.argv[1:]:
+        raw = Path(name).read_bytes()
+        obj = json.loads(raw)
+        indent = 2 if raw[1:2] == b"\n" else None
+        fast = dumps(obj, indent)
+        slow = _stdlib_dumps(obj, indent, False, None).encode("utf-8")
+        same = fast == slow
+        mismatched += not same
+        print(f"[Codec] {'一致' if same else '不一致'}  {name}（{len(raw):,} 字节，indent={indent}）")
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+导入耗时预算
+逐个在全新的子进程里用 python -X importtime 导入快速路径涉及的模块，检查：
+- 没有提前导入重依赖（requests、xlsxwriter 等只应在真正用到的函数里导入）——硬性检查，违反时退出码为 1
+- 累计导入耗时（取多次中的最小值）不超过预算：预算按本机解释器启动耗时（python -c pass）相对
+  REFERENCE_STARTUP_MS 等比缩放，再乘 HEADROOM 余量；耗时随机器和负载波动，超出只报警告，
+  加 --strict 才计为失败
+可直接放进 CI：
+
+    python -m pipeline.import_budget            # 检查全部
+    python -m pipeline.import_budget --verbose  # 同时列出每个模块最慢的依赖
+    python -m pipeline.import_budget --strict   # 耗时超出预算也返回 1
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# 重依赖：快速路径上不允许出现
+HEAVY_MODULES = ["requests", "urllib3", "xlsxwriter", "pandas", "openpyxl", "cProfile", "tracemalloc"]
+
+# 模块 → (预算毫秒, 禁止导入的模块)
+BUDGETS = {
+    "pipeline.cli":             (15, HEAVY_MODULES),
+    "scrapers.change_detector": (15, HEAVY_MODULES),
+    "reporter.notifier":        (30, HEAVY_MODULES + ["smtplib"]),
+    "analyzer.ai_analyzer":     (25, HEAVY_MODULES),
+    "reporter.excel_writer":    (30, HEAVY_MODULES),
+    "reporter.dashboard_writer": (25, HEAVY_MODULES),
+}
+
+REPEAT = 3
+
+# 制定 BUDGETS 时所在机器的解释器启动耗时（ms），以及耗时检查的余量倍数
+REFERENCE_STARTUP_MS = 65
+HEADROOM = 1.5
+
+
+def startup_ms(repeat: int = REPEAT) -> float:
+    """本机 python -c pass 的耗时（ms，取最小值），作为机器快慢的参照"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], cwd=ROOT_DIR, check=True)
+        runs.append((time.perf_counter() - start) * 1000)
+    return min(runs)
+
+
+def measure(module: str) -> tuple[float, dict[str, float]]:
+    """返回 (模块累计导入耗时 ms, {由该模块引入的模块: 累计耗时 ms})"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败：\n{result.stderr[-2000:]}")
+    # 输出为后序遍历：import time: self [us] | cumulative | 缩进表示嵌套层级的模块名
+    # 目标模块之前、上一个顶层模块之后的条目即由它引入（site 等解释器启动时的导入不计入）
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # 表头
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((level, name.strip(), int(cumulative) / 1000))
+    for i, (level, name, ms) in enumerate(entries):
+        if level == 0 and name == module:
+            imported = {}
+            for child_level, child, child_ms in reversed(entries[:i]):
+                if child_level == 0:
+                    break
+                imported.setdefault(child, child_ms)
+            return ms, imported
+    return 0.0, {}
+
+
+def check(budgets: dict | None = None, repeat: int = REPEAT, verbose: bool = False) -> tuple[list[str], list[str]]:
+    """返回 (重依赖违规说明, 耗时超出预算说明)，均为空表示全部通过"""
+    scale = startup_ms(repeat) / REFERENCE_STARTUP_MS
+    print(f"[ImportBudget] 解释器启动耗时为参照值的 {scale:.2f} 倍，预算按此缩放并留 {HEADROOM:g} 倍余量")
+    problems, slow = [], []
+    for module, (budget_ms, forbidden) in (budgets or BUDGETS).items():
+        runs = [measure(module) for _ in range(repeat)]
+        elapsed = min(ms for ms, _ in runs)
+        imported = runs[0][1]
+        heavy = [m for m in forbidden if m in imported]
+        limit = budget_ms * scale * HEADROOM
+        status = "FAIL" if heavy else "SLOW" if elapsed > limit else "OK"
+        print(f"[ImportBudget] {status:4} {module:<28} {elapsed:7.1f}ms / 预算 {limit:.1f}ms（基准 {budget_ms}ms）")
+        if elapsed > limit:
+            slow.append(f"{module} 导入耗时 {elapsed:.1f}ms，超出预算 {limit:.1f}ms")
+        if heavy:
+            problems.append(f"{module} 导入了重依赖：{', '.join(heavy)}")
+        if verbose:
+            slowest = sorted(((ms, name) for name, ms in imported.items()), reverse=True)[:5]
+            for ms, name in slowest:
+                print(f"               {ms:7.1f}ms  {name}")
+    return problems, slow
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查快速路径的导入耗时预算")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--strict", action="store_true", help="耗时超出预算也计为失败")
+    args = parser.parse_args()
+    problems, slow = check(repeat=args.repeat, verbose=args.verbose)
+    for p in problems:
+        print(f"[ImportBudget] {p}")
+    for p in slow:
+        print(f"[ImportBudget] {'' if args.strict else '警告：'}{p}")
+    sys.exit(1 if problems or (args.strict and slow) else 0)
+
+
+if __name__ == "__main__":
+    main()
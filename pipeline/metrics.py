@@ -0,0 +1,293 @@
+"""
+运行指标模块
+轻量记录一次运行的各阶段耗时与资源占用，写出机器可读的报告：
+- 阶段（span）：耗时、CPU 时间、结束时的峰值 RSS，支持嵌套（名称以 / 连接）
+- HTTP：按域名统计请求数、失败数、响应字节数、延迟直方图与分位数
+  （instrument_requests() 挂到 requests.Session.send，覆盖 requests.get/post 与各模块的 Session）
+- 计数器：榜单条数、异动数、子进程输出字节数等
+- LLM：每次调用的 token 用量与延迟
+输出：data/metrics/run_metrics.json（本次运行）+ data/metrics/history.json（最近 RUN_HISTORY 次运行的摘要）
+
+    python -m pipeline.metrics    # 打印最近运行的阶段耗时趋势
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from pipeline import codec
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+METRICS_DIR = DATA_DIR / "metrics"
+RUN_FILE = METRICS_DIR / "run_metrics.json"
+HISTORY_FILE = METRICS_DIR / "history.json"
+
+RUN_HISTORY = 90
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_lock = threading.Lock()
+_local = threading.local()
+_installed = False
+_run: dict = {}
+
+
+def reset(kind: str = "daily"):
+    """开始一次新的运行记录"""
+    global _run
+    _run = {
+        "kind": kind,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "_t0": time.perf_counter(),
+        "spans": [],
+        "http": {},
+        "counters": {},
+        "llm": [],
+    }
+    _local.stack = []
+    _local.stage = None
+
+
+reset()
+
+
+def peak_rss_mb(children: bool = False) -> float | None:
+    """进程（或已结束子进程）的峰值 RSS，单位 MB"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux 为 KB，macOS 为字节
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+
+# ─── 阶段 ───────────────────────────────────────────────
+
+_span_hooks: list = []
+
+
+def add_span_hook(hook):
+    """注册阶段钩子：hook(name) 返回上下文管理器或 None，在阶段内生效（供 pipeline/profiling.py 使用）"""
+    _span_hooks.append(hook)
+
+
+@contextmanager
+def span(name: str):
+    """记录一个阶段，嵌套时名称为 父/子"""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    full = "/".join(stack + [name])
+    stack.append(name)
+    hooks = [cm for cm in (hook(full) for hook in _span_hooks) if cm is not None]
+    for cm in hooks:
+        cm.__enter__()
+    start, cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        record = {
+            "name": full,
+            "start_s": round(start - _run["_t0"], 3),
+            "duration_s": round(time.perf_counter() - start, 3),
+            "cpu_s": round(time.process_time() - cpu, 3),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if error:
+            record["error"] = error
+        for cm in reversed(hooks):
+            cm.__exit__(None, None, None)
+        stack.pop()
+        with _lock:
+            _run["spans"].append(record)
+
+
+def stage(name: str | None):
+    """顺序阶段：结束上一个顶层阶段并开始新阶段，传 None 只结束"""
+    current = getattr(_local, "stage", None)
+    if current is not None:
+        current.__exit__(None, None, None)
+        _local.stage = None
+    if name is not None:
+        _local.stage = span(name)
+        _local.stage.__enter__()
+
+
+# ─── 计数与 HTTP / LLM ───────────────────────────────────
+
+def count(name: str, value: int | float = 1):
+    with _lock:
+        _run["counters"][name] = _run["counters"].get(name, 0) + value
+
+
+def observe_http(url: str, status: int | None, elapsed_s: float, size: int):
+    host = urlsplit(url).hostname or "unknown"
+    ms = elapsed_s * 1000
+    with _lock:
+        stats = _run["http"].setdefault(host, {
+            "requests": 0, "errors": 0, "bytes": 0, "latencies_ms": [],
+            "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        })
+        stats["requests"] += 1
+        stats["bytes"] += size
+        if status is None or status >= 400:
+            stats["errors"] += 1
+        stats["latencies_ms"].append(round(ms, 1))
+        idx = next((i for i, edge in enumerate(LATENCY_BUCKETS_MS) if ms <= edge), len(LATENCY_BUCKETS_MS))
+        stats["buckets"][idx] += 1
+
+
+def observe_llm(model: str, latency_s: float, usage: dict | None, ok: bool = True):
+    usage = usage or {}
+    with _lock:
+        _run["llm"].append({
+            "model": model,
+            "latency_s": round(latency_s, 3),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+            "ok": ok,
+        })
+
+
+def instrument_requests():
+    """给 requests.Session.send 加计时（幂等），未安装 requests 时跳过"""
+    global _installed
+    try:
+        import requests
+    except ImportError:
+        return
+    if _installed:
+        return
+    original = requests.Session.send
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        try:
+            resp = original(self, request, **kwargs)
+        except Exception:
+            observe_http(request.url, None, time.perf_counter() - start, 0)
+            raise
+        # stream=True 时不读取正文，避免改变调用方行为
+        size = int(resp.headers.get("Content-Length") or 0) if kwargs.get("stream") else len(resp.content)
+        observe_http(request.url, resp.status_code, time.perf_counter() - start, size)
+        return resp
+
+    requests.Session.send = send
+    _installed = True
+
+
+# ─── 报告 ───────────────────────────────────────────────
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _http_summary(stats: dict) -> dict:
+    values = sorted(stats["latencies_ms"])
+    return {
+        "requests": stats["requests"],
+        "errors": stats["errors"],
+        "bytes": stats["bytes"],
+        "p50_ms": _percentile(values, 0.5),
+        "p90_ms": _percentile(values, 0.9),
+        "p99_ms": _percentile(values, 0.99),
+        "max_ms": values[-1] if values else 0.0,
+        "histogram": dict(zip([f"<={b}" for b in LATENCY_BUCKETS_MS] + ["inf"], stats["buckets"])),
+    }
+
+
+def report() -> dict:
+    """本次运行的完整指标"""
+    with _lock:
+        llm = list(_run["llm"])
+        return {
+            "kind": _run["kind"],
+            "started_at": _run["started_at"],
+            "duration_s": round(time.perf_counter() - _run["_t0"], 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_peak_rss_mb": peak_rss_mb(children=True),
+            "spans": list(_run["spans"]),
+            "http": {host: _http_summary(stats) for host, stats in sorted(_run["http"].items())},
+            "counters": dict(sorted(_run["counters"].items())),
+            "llm": {
+                "calls": len(llm),
+                "failures": sum(1 for c in llm if not c["ok"]),
+                "prompt_tokens": sum(c["prompt_tokens"] for c in llm),
+                "completion_tokens": sum(c["completion_tokens"] for c in llm),
+                "latency_s": round(sum(c["latency_s"] for c in llm), 3),
+                "calls_detail": llm,
+            },
+        }
+
+
+def _history_entry(run: dict) -> dict:
+    return {
+        "kind": run["kind"],
+        "started_at": run["started_at"],
+        "duration_s": run["duration_s"],
+        "peak_rss_mb": run["peak_rss_mb"],
+        "stages": {s["name"]: s["duration_s"] for s in run["spans"] if "/" not in s["name"]},
+        "http": {host: {k: h[k] for k in ("requests", "errors", "p90_ms")} for host, h in run["http"].items()},
+        "counters": run["counters"],
+        "llm_tokens": run["llm"]["prompt_tokens"] + run["llm"]["completion_tokens"],
+    }
+
+
+def load_history() -> list[dict]:
+    if not HISTORY_FILE.exists():
+        return []
+    return codec.load(HISTORY_FILE)
+
+
+def write_report() -> dict:
+    """结束未关闭的阶段，写出本次指标并追加到滚动历史"""
+    from reporter import artifacts
+
+    stage(None)
+    run = report()
+    artifacts.write_bytes(RUN_FILE, codec.dumps(run, indent=1))
+    history = (load_history() + [_history_entry(run)])[-RUN_HISTORY:]
+    artifacts.write_bytes(HISTORY_FILE, codec.dumps(history, indent=1))
+
+    slowest = sorted((s for s in run["spans"] if "/" not in s["name"]), key=lambda s: -s["duration_s"])[:3]
+    print(f"[Metrics] 总耗时 {run['duration_s']:.1f}s，峰值内存 {run['peak_rss_mb']} MB，"
+          f"LLM {run['llm']['calls']} 次 / {run['llm']['prompt_tokens'] + run['llm']['completion_tokens']} tokens")
+    print("[Metrics] 最慢阶段：" + "，".join(f"{s['name']} {s['duration_s']:.1f}s" for s in slowest))
+    return run
+
+
+def print_trend(kind: str = "daily", last: int = 10):
+    """打印最近几次运行的阶段耗时，并与历史中位数比较"""
+    runs = [r for r in load_history() if r["kind"] == kind]
+    if not runs:
+        print(f"[Metrics] 暂无 {kind} 运行记录")
+        return
+    stages = sorted({name for r in runs for name in r["stages"]})
+    for name in stages + ["(total)"]:
+        values = [r["duration_s"] if name == "(total)" else r["stages"].get(name) for r in runs]
+        values = [v for v in values if v is not None]
+        median = sorted(values)[len(values) // 2]
+        recent = " ".join(f"{v:6.1f}" for v in values[-last:])
+        flag = "  ⚠ 慢于中位数 50%+" if values[-1] > median * 1.5 and values[-1] - median > 1 else ""
+        print(f"{name:<24} 中位 {median:6.1f}s | {recent}{flag}")
+
+
+if __name__ == "__main__":
+    print_trend(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("METRICS_KIND", "daily"))
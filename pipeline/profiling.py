@@ -0,0 +1,155 @@
+"""
+按需性能剖析
+通过命令行参数对指定阶段（metrics.stage / metrics.span 的名称）或整个流程开启剖析，无需改代码：
+    python main_daily.py --profile excel --profile detect
+    python main_daily.py --profile all --profile-dir /tmp/prof
+每个被剖析的阶段在剖析目录下输出：
+- {阶段}.prof           cProfile 原始数据（可用 snakeviz / pstats 打开）
+- {阶段}.txt            按累计耗时排序的函数统计
+- {阶段}.alloc.txt      tracemalloc 新增内存最多的代码行
+- {阶段}.collapsed      采样得到的折叠调用栈，可直接交给 flamegraph.pl / speedscope
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from pipeline import metrics
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / "profiles"
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 60
+TOP_ALLOCATIONS = 30
+TRACEMALLOC_FRAMES = 10
+
+_active = threading.Event()
+
+
+class StackSampler:
+    """后台线程定时采样目标线程的调用栈，累计为折叠栈格式"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def _safe_name(name: str) -> str:
+    return name.replace("/", "__").replace(" ", "_")
+
+
+@contextmanager
+def profile_block(name: str, out_dir=DEFAULT_PROFILE_DIR, interval: float = SAMPLE_INTERVAL):
+    """对代码块做 cProfile + tracemalloc + 栈采样，结束后写出报告；已在剖析中时不重复开启"""
+    if _active.is_set():
+        yield
+        return
+    _active.set()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    before = tracemalloc.take_snapshot()
+    sampler = StackSampler(threading.get_ident(), interval)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - start
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        _active.clear()
+        _write_reports(_safe_name(name), out_dir, profiler, sampler, before, after, peak, elapsed)
+
+
+def _write_reports(base: str, out_dir: Path, profiler, sampler, before, after, peak: int, elapsed: float):
+    profiler.dump_stats(str(out_dir / f"{base}.prof"))
+
+    buf = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buf)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    buf.write("\n\n")
+    stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+    (out_dir / f"{base}.txt").write_text(f"# 墙钟耗时 {elapsed:.3f}s\n" + buf.getvalue(), encoding="utf-8")
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    lines = [f"# tracemalloc 峰值 {peak / 1024 / 1024:.1f} MB，以下为阶段内新增内存最多的代码行"]
+    for stat in diff[:TOP_ALLOCATIONS]:
+        lines.append(str(stat))
+    (out_dir / f"{base}.alloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    (out_dir / f"{base}.collapsed").write_text(sampler.collapsed(), encoding="utf-8")
+    print(f"[Profile] {base}: {elapsed:.2f}s，内存峰值 {peak / 1024 / 1024:.1f} MB，"
+          f"采样 {sum(sampler.stacks.values())} 次 → {out_dir}")
+
+
+def enable(stages: list[str], out_dir=DEFAULT_PROFILE_DIR, interval: float = SAMPLE_INTERVAL):
+    """对名称匹配的阶段开启剖析（如 excel、analyze/llm），"all" 由调用方用 profile_block 包住整个流程"""
+    targets = {s for s in stages if s != "all"}
+    if not targets:
+        return
+
+    def hook(name: str):
+        if name in targets:
+            return profile_block(name, out_dir, interval)
+        return None
+
+    metrics.add_span_hook(hook)
+
+
+def add_arguments(parser):
+    """给入口脚本的 argparse 加上剖析参数"""
+    parser.add_argument("--profile", action="append", default=[], metavar="STAGE",
+                        help="剖析指定阶段，可重复；all 表示整个流程")
+    parser.add_argument("--profile-dir", default=str(DEFAULT_PROFILE_DIR), help="剖析结果目录")
+    parser.add_argument("--profile-interval", type=float, default=SAMPLE_INTERVAL,
+                        help="调用栈采样间隔（秒）")
+
+
+def run(func, args):
+    """按解析后的参数执行入口函数"""
+    enable(args.profile, args.profile_dir, args.profile_interval)
+    if "all" in args.profile:
+        with profile_block("all", args.profile_dir, args.profile_interval):
+            return func()
+    return func()
@@ -0,0 +1,375 @@
+"""
+本地只读查询 API
+在 data/history/ 之上提供 JSON 查询（只绑定本机，只支持 GET / HEAD），代替翻 data/*.json 或 Excel：
+
+    GET /dates                                    可查询的日期
+    GET /snapshots/<date>?store=&region=&chart_type=
+    GET /changes?date=D | start=D1&end=D2 &type=新进榜&store=&region=&chart_type=&app_id=
+    GET /apps/<app_id>/series?start=&end=&store=&region=&chart_type=   每个 (商店, 地区, 榜单) 一条排名序列
+    GET /aggregations/publishers?date=&store=&region=&chart_type=&top=10   每组按曝光占比排序的开发商份额
+    GET /aggregations/genres?...                  同上，按细分品类（均读取 scrapers/aggregates.py 的物化聚合）
+
+- 列表结果统一分页：page（从 1 开始）、per_page（默认 50，最多 500），返回 {items, page, per_page, total, next}
+- 结果按 (路径, 查询参数) 缓存在 LRU 中；history/ 有新的一天落盘（或已有日期被改写）时整体失效
+- 响应带 ETag，客户端用 If-None-Match 重新验证，未变化时返回 304 且不重新计算
+- 日快照经 change_detector 的快照缓存读取，同一天的 ChartIndex 在不同查询间复用
+- 日期默认取最新一天；区间默认截止最新一天、向前 SERIES_DAYS 天
+
+    python -m pipeline.query_api --port 8780
+    curl 'http://127.0.0.1:8780/changes?start=2026-03-01&end=2026-03-07&region=jp&chart_type=topgrossingapplications&type=新进榜'
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from pipeline import codec
+from scrapers import aggregates, change_detector
+from scrapers.chart_index import CHART_ORDER, STORE_ORDER, ChartIndex
+
+DEFAULT_PORT = 8780
+PER_PAGE = 50
+MAX_PER_PAGE = 500
+CACHE_SIZE = 256
+SNAPSHOT_CACHE_DAYS = 32
+SERIES_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+FILTERS = ("store", "region", "chart_type")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ─── 缓存 ───────────────────────────────────────────────
+
+class ResultCache:
+    """LRU：键 → 值；history/ 版本变化时清空"""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def check_version(self, version):
+        with self._lock:
+            if version != self._version:
+                self._items.clear()
+                self._version = version
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_cache = ResultCache()
+_compute_lock = threading.Lock()  # 快照缓存与 ChartIndex 的惰性构建不是线程安全的，未命中时串行计算
+
+
+def history_version() -> tuple:
+    """(日期数, 最新日期, 各日文件最大修改时间)：新的一天落盘或旧日期被改写（如 intraday 汇总）时变化"""
+    latest, newest, count = "", 0, 0
+    if change_detector.DATA_DIR.exists():
+        for entry in os.scandir(change_detector.DATA_DIR):
+            if re.fullmatch(r"\d{4}-\d{2}-\d{2}\.json", entry.name):
+                count += 1
+                latest = max(latest, entry.name[:10])
+                newest = max(newest, entry.stat().st_mtime_ns)
+    return count, latest, newest
+
+
+# ─── 参数 ───────────────────────────────────────────────
+
+def _param(query: dict, name: str, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _int_param(query: dict, name: str, default: int, low: int, high: int) -> int:
+    raw = _param(query, name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"{name} 应为整数")
+    return max(low, min(high, value))
+
+
+def _date_param(query: dict, name: str, default: str | None) -> str | None:
+    raw = _param(query, name, default)
+    if raw is None:
+        return None
+    try:
+        datetime.strptime(raw, "%Y-%m-%d")
+    except ValueError:
+        raise ApiError(400, f"{name} 应为 YYYY-MM-DD")
+    return raw
+
+
+def _dates() -> list[str]:
+    return sorted(p.stem for p in change_detector.DATA_DIR.glob("????-??-??.json"))
+
+
+def _latest() -> str:
+    dates = _dates()
+    if not dates:
+        raise ApiError(404, "history/ 中没有榜单数据")
+    return dates[-1]
+
+
+def _range(query: dict) -> list[str]:
+    end = _date_param(query, "end", None) or _latest()
+    default_start = (datetime.strptime(end, "%Y-%m-%d") - timedelta(days=SERIES_DAYS - 1)).strftime("%Y-%m-%d")
+    start = _date_param(query, "start", default_start)
+    if start > end:
+        raise ApiError(400, "start 晚于 end")
+    days = (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days + 1
+    if days > MAX_RANGE_DAYS:
+        raise ApiError(400, f"区间最长 {MAX_RANGE_DAYS} 天")
+    return [d for d in _dates() if start <= d <= end]
+
+
+def _group_filter(query: dict):
+    wanted = {name: _param(query, name) for name in FILTERS}
+    wanted = {k: v for k, v in wanted.items() if v}
+
+    def keep(key: tuple) -> bool:
+        return all(dict(zip(FILTERS, key))[k] == v for k, v in wanted.items())
+    return keep
+
+
+def _paginate(items: list, query: dict, path: str) -> dict:
+    page = _int_param(query, "page", 1, 1, 10**6)
+    per_page = _int_param(query, "per_page", PER_PAGE, 1, MAX_PER_PAGE)
+    start = (page - 1) * per_page
+    next_url = None
+    if start + per_page < len(items):
+        params = {k: v[0] for k, v in query.items() if k != "page"}
+        params["page"] = str(page + 1)
+        next_url = path + "?" + urlencode(sorted(params.items()))
+    return {"items": items[start:start + per_page], "page": page, "per_page": per_page,
+            "total": len(items), "next": next_url}
+
+
+# ─── 数据 ───────────────────────────────────────────────
+
+def _index(date_str: str) -> ChartIndex:
+    data = change_detector.load_chart_data(date_str)
+    if not data:
+        raise ApiError(404, f"没有 {date_str} 的榜单数据")
+    return ChartIndex.of(data)
+
+
+def _changes_of(date_str: str) -> list[dict]:
+    """某天相对前一天的全部异动（缓存；前一天无数据时为空）"""
+    key = ("changes", date_str)
+    changes = _cache.get(key)
+    if changes is None:
+        previous = (datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        today_data = change_detector.load_chart_data(date_str)
+        yesterday_data = change_detector.load_chart_data(previous)
+        changes = change_detector.detect_changes(today_data, yesterday_data) if today_data and yesterday_data else []
+        _cache.put(key, changes)
+    return changes
+
+
+# ─── 路由 ───────────────────────────────────────────────
+
+def get_dates(query: dict, path: str) -> dict:
+    return {"dates": _dates()}
+
+
+def get_snapshot(query: dict, path: str, date_str: str) -> dict:
+    index = _index(date_str)
+    keep = _group_filter(query)
+    rows = [app for key in index.sorted_keys() if keep(key) for app in index.group(key)]
+    return {"date": date_str, **_paginate(rows, query, path)}
+
+
+def get_changes(query: dict, path: str) -> dict:
+    if _param(query, "date") or not (_param(query, "start") or _param(query, "end")):
+        dates = [_date_param(query, "date", None) or _latest()]
+    else:
+        dates = _range(query)
+    keep = _group_filter(query)
+    change_type = _param(query, "type")
+    app_id = _param(query, "app_id")
+    items = []
+    for d in dates:
+        for c in _changes_of(d):
+            if change_type and c["change_type"] != change_type:
+                continue
+            if app_id and c["app_id"] != app_id:
+                continue
+            if keep((c["store"], c["region"], c["chart_type"])):
+                items.append({"date": d, **c})
+    return {"dates": dates, **_paginate(items, query, path)}
+
+
+def get_app_series(query: dict, path: str, app_id: str) -> dict:
+    dates = _range(query)
+    keep = _group_filter(query)
+    series: dict[tuple, dict] = {}
+    name = None
+    for i, d in enumerate(dates):
+        index = ChartIndex.of(change_detector.load_chart_data(d))
+        for key in index.keys():
+            if not keep(key):
+                continue
+            app = index.rank_map(key).get(app_id)
+            if app is None:
+                continue
+            name = name or app.get("name")
+            entry = series.get(key)
+            if entry is None:
+                region_name, chart_name = index.names(key)
+                entry = series[key] = {
+                    **dict(zip(FILTERS, key)), "region_name": region_name, "chart_name": chart_name,
+                    "ranks": [None] * len(dates),
+                }
+            entry["ranks"][i] = app["rank"]
+    items = sorted(series.values(), key=lambda e: min(r for r in e["ranks"] if r is not None))
+    return {"app_id": app_id, "name": name, "dates": dates, **_paginate(items, query, path)}
+
+
+def _aggregate(query: dict, path: str, field: str) -> dict:
+    """读取 scrapers.aggregates 物化的当日份额，不再逐组扫描榜单（缺聚合文件时在内存中补算，不写盘）"""
+    date_str = _date_param(query, "date", None) or _latest()
+    groups = aggregates.load_day(date_str, persist=False)
+    if groups is None:
+        raise ApiError(404, f"没有 {date_str} 的榜单数据")
+    keep = _group_filter(query)
+    top = _int_param(query, "top", 10, 1, 200)
+    items = []
+    for name, group in sorted(groups.items(), key=_group_order):
+        key = tuple(name.split("|"))
+        if not keep(key):
+            continue
+        region_name, chart_name = group["names"]
+        values = [(value, stats) for value, stats in group[field].items() if value][:top]  # 空取值不占 top 名额
+        for value, (apps, share, exposure) in values:
+            items.append({**dict(zip(FILTERS, key)), "region_name": region_name, "chart_name": chart_name,
+                          field: value, "apps": apps, "share": share, "exposure": exposure})
+    return {"date": date_str, **_paginate(items, query, path)}
+
+
+def _group_order(item) -> tuple:
+    """与 ChartIndex.sorted_keys 相同的顺序：商店 → 榜单类型 → 地区名"""
+    name, group = item
+    region_name, chart_name = group["names"]
+    return STORE_ORDER.get(name.split("|")[0], 9), CHART_ORDER.get(chart_name, 9), region_name
+
+
+ROUTES = [
+    (re.compile(r"/dates"), get_dates),
+    (re.compile(r"/snapshots/(\d{4}-\d{2}-\d{2})"), get_snapshot),
+    (re.compile(r"/changes"), get_changes),
+    (re.compile(r"/apps/([^/]+)/series"), get_app_series),
+    (re.compile(r"/aggregations/publishers"), lambda q, p: _aggregate(q, p, "artist")),
+    (re.compile(r"/aggregations/genres"), lambda q, p: _aggregate(q, p, "subgenre")),
+]
+
+
+def handle(url: str) -> tuple[int, bytes, str]:
+    """处理一个 GET 请求，返回 (状态码, JSON 字节, ETag)"""
+    _cache.check_version(history_version())
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    query = parse_qs(parts.query)
+    key = ("response", path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    for pattern, func in ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            try:
+                with _compute_lock:
+                    status, payload = 200, func(query, path, *match.groups())
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            break
+    else:
+        status, payload = 404, {"error": f"未知路径 {path}"}
+    body = codec.dumps(payload)
+    result = (status, body, '"' + hashlib.sha256(body).hexdigest()[:20] + '"')
+    if status == 200:
+        _cache.put(key, result)
+    return result
+
+
+def make_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self, send_body: bool):
+            status, body, etag = handle(self.path)
+            if status == 200 and etag in (self.headers.get("If-None-Match") or ""):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 200:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")  # 每次都重新验证
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond(True)
+
+        def do_HEAD(self):
+            self._respond(False)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="history/ 只读查询 API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    change_detector.enable_cache(SNAPSHOT_CACHE_DAYS)
+    server = make_server(args.host, args.port)
+    print(f"[QueryAPI] http://{args.host}:{server.server_port}/dates（Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
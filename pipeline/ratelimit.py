@@ -0,0 +1,40 @@
+"""
+限速与重试工具
+- RateLimiter：滑动窗口限速（线程安全），如企业微信机器人 20 条/分钟
+- backoff_delays：指数退避 + 随机抖动的等待序列
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """在任意 period 秒的窗口内最多放行 rate 次"""
+
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """阻塞直到可以放行"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._stamps and now - self._stamps[0] >= self.period:
+                    self._stamps.popleft()
+                if len(self._stamps) < self.rate:
+                    self._stamps.append(now)
+                    return
+                wait = self.period - (now - self._stamps[0])
+            time.sleep(wait)
+
+
+def backoff_delays(retries: int, base: float = 1.0, cap: float = 60.0):
+    """生成 retries 个等待时间：base·2^n，带 ±50% 抖动，上限 cap"""
+    for attempt in range(retries):
+        delay = min(cap, base * (2 ** attempt))
+        yield delay * random.uniform(0.5, 1.5)
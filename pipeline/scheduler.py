@@ -0,0 +1,332 @@
+"""
+常驻调度
+GitHub Actions 每次运行都要冷启动 Python、Node 与全部连接，cron 也只能表达固定时间的任务；
+常驻模式在同一个进程里按时间表运行每日 / 每周 / 每月 / 小时级任务：
+- 时间表为 cron 表达式（分 时 日 月 周，UTC），默认与 .github/workflows/ 中的一致
+- 所有任务在一个工作线程中依次执行，不会有两个任务同时改写 data/ 或指标状态
+- 合并重叠触发：任务已在排队时新的触发直接合并；正在运行时至多再排一次
+- 任务之间保持热状态：共享 HTTP 连接池（pipeline/sessions.py）、常驻 Node 进程（Google Play）、
+  最近的日快照及其分组索引（change_detector.enable_cache）、LLM 回复缓存（ai_analyzer.enable_cache）
+- 任务状态：status()；指定 --port 时 GET http://127.0.0.1:PORT/status（单个任务 /status/<name>）
+- 任务入口沿用 main_daily.run_daily、main_weekly.run_weekly、pipeline.static_build.build_all 等，首次运行时才导入
+每个任务结束后 changed_files.txt 为该任务变化的文件，提交 / 发布仍由外部负责
+
+    python -m pipeline.scheduler                     # 前台常驻
+    python -m pipeline.scheduler --port 8765         # 同时提供状态接口
+    python -m pipeline.scheduler --run daily --once  # 立即执行一次后退出（调试用）
+"""
+
+import argparse
+import importlib
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pipeline import codec
+
+ROOT_DIR = Path(__file__).parent.parent
+UTC = timezone.utc
+
+# 任务名 → (cron 表达式, "模块:函数")
+JOBS = {
+    "daily":          ("0 0 * * *",        "main_daily:run_daily"),
+    "intraday":       ("30 * * * *",       "scrapers.intraday:capture"),
+    "weekly":         ("0 1 * * 1",        "main_weekly:run_weekly"),
+    "static":         ("0 1 1 * *",        "pipeline.static_build:build_all"),
+    "monthly_report": ("30 1 1 * *",       "main_monthly:run_monthly"),
+}
+
+# 长时间停顿（如休眠唤醒）后最多补查的分钟数
+CATCH_UP_MINUTES = 60
+
+
+# ─── cron 表达式 ─────────────────────────────────────────
+
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_field(field: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-"))
+        else:
+            start = end = int(part)
+        if not low <= start <= end <= high:
+            raise ValueError(f"cron 字段超出范围：{field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+def parse_cron(expr: str) -> tuple[frozenset, ...]:
+    """'分 时 日 月 周' → 各字段允许值集合；周 0 = 周日"""
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f"cron 表达式应有 5 个字段：{expr}")
+    return tuple(_parse_field(f, low, high) for f, (low, high) in zip(fields, _FIELD_RANGES))
+
+
+def _day_matches(spec, day: datetime) -> bool:
+    _, _, days, months, weekdays = spec
+    return day.day in days and day.month in months and (day.weekday() + 1) % 7 in weekdays
+
+
+def cron_matches(spec, t: datetime) -> bool:
+    return t.minute in spec[0] and t.hour in spec[1] and _day_matches(spec, t)
+
+
+def next_run(spec, after: datetime) -> datetime | None:
+    """after 之后（不含）下一次触发时间，逐日查找，一年内没有则返回 None"""
+    minutes, hours = sorted(spec[0]), sorted(spec[1])
+    start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    day = start.replace(hour=0, minute=0)
+    for _ in range(366):
+        if _day_matches(spec, day):
+            for h in hours:
+                for m in minutes:
+                    t = day.replace(hour=h, minute=m)
+                    if t >= start:
+                        return t
+        day += timedelta(days=1)
+    return None
+
+
+# ─── 调度器 ─────────────────────────────────────────────
+
+def _resolve(target: str):
+    module, func = target.split(":")
+    return getattr(importlib.import_module(module), func)
+
+
+def warm_up():
+    """打开任务间共享的缓存与常驻进程（可重复调用；Node 进程退出后会重新启动）"""
+    from analyzer import ai_analyzer
+    from pipeline import sessions
+    from scrapers import change_detector, googleplay_scraper
+
+    change_detector.enable_cache()
+    ai_analyzer.enable_cache()
+    sessions.session()
+    if not os.environ.get("GOOGLEPLAY_CHARTS_URL"):
+        try:
+            googleplay_scraper.start_worker()
+        except OSError as e:
+            print(f"[Scheduler] 无法启动常驻 Node 进程，Google Play 按次启动: {e}")
+
+
+def shut_down():
+    from pipeline import sessions
+    from scrapers import googleplay_scraper
+
+    googleplay_scraper.stop_worker()
+    sessions.close()
+
+
+class Scheduler:
+    """按时间表触发任务，单工作线程依次执行"""
+
+    def __init__(self, jobs: dict | None = None):
+        self.jobs = {}
+        for name, (expr, target) in (jobs or JOBS).items():
+            self.jobs[name] = {
+                "schedule": expr, "target": target, "spec": parse_cron(expr),
+                "queued": False, "running": False,
+                "runs": 0, "failures": 0, "coalesced": 0,
+                "last_started": None, "last_finished": None, "last_duration_s": None, "last_error": None,
+            }
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self.started_at = datetime.now(UTC)
+
+    # ── 触发与执行 ──
+    def trigger(self, name: str, reason: str = "manual") -> bool:
+        """排入一次运行；已在排队时合并，返回是否新排入"""
+        job = self.jobs[name]
+        with self._lock:
+            if job["queued"]:
+                job["coalesced"] += 1
+                print(f"[Scheduler] {name} 已在排队，合并本次触发（{reason}）")
+                return False
+            job["queued"] = True
+        self._queue.put(name)
+        print(f"[Scheduler] 排入 {name}（{reason}）")
+        return True
+
+    def _run(self, name: str):
+        job = self.jobs[name]
+        with self._lock:
+            job["queued"] = False
+            job["running"] = True
+            job["last_started"] = datetime.now(UTC).isoformat(timespec="seconds")
+        from reporter import artifacts
+
+        start = time.perf_counter()
+        error = None
+        try:
+            warm_up()
+            artifacts.reset()
+            _resolve(job["target"])()
+            artifacts.save()
+        except KeyboardInterrupt:
+            raise
+        except BaseException as e:  # 含入口脚本中的 sys.exit
+            error = f"{type(e).__name__}: {e}"
+            print(f"[Scheduler] {name} 失败：{error}")
+        with self._lock:
+            job["running"] = False
+            job["runs"] += 1
+            job["failures"] += error is not None
+            job["last_error"] = error
+            job["last_finished"] = datetime.now(UTC).isoformat(timespec="seconds")
+            job["last_duration_s"] = round(time.perf_counter() - start, 1)
+        print(f"[Scheduler] {name} 结束，用时 {job['last_duration_s']}s" + ("（失败）" if error else ""))
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                name = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            self._run(name)
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name="scheduler-worker", daemon=True)
+            self._worker.start()
+
+    def due(self, t: datetime) -> list[str]:
+        return [name for name, job in self.jobs.items() if cron_matches(job["spec"], t)]
+
+    def run_forever(self):
+        """每分钟检查一次时间表；停顿超过一分钟时补查错过的分钟"""
+        self.start()
+        last = datetime.now(UTC).replace(second=0, microsecond=0)
+        while not self._stop.is_set():
+            now = datetime.now(UTC)
+            self._stop.wait(60 - now.second - now.microsecond / 1e6 + 0.05)
+            if self._stop.is_set():
+                break
+            current = datetime.now(UTC).replace(second=0, microsecond=0)
+            t = max(last + timedelta(minutes=1), current - timedelta(minutes=CATCH_UP_MINUTES))
+            while t <= current:
+                for name in self.due(t):
+                    self.trigger(name, f"定时 {t:%Y-%m-%d %H:%M}")
+                t += timedelta(minutes=1)
+            last = current
+
+    def wait_idle(self):
+        """等待队列中的任务全部执行完（--once 用）"""
+        while True:
+            with self._lock:
+                busy = any(job["queued"] or job["running"] for job in self.jobs.values())
+            if not busy:
+                return
+            time.sleep(0.2)
+
+    def request_stop(self):
+        """只置停止标记（信号处理中调用），run_forever 随后退出"""
+        self._stop.set()
+
+    def stop(self):
+        """停止调度并等待当前任务结束"""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+
+    # ── 状态 ──
+    def status(self, name: str | None = None) -> dict:
+        now = datetime.now(UTC)
+        with self._lock:
+            jobs = {}
+            for job_name, job in self.jobs.items():
+                if name is not None and job_name != name:
+                    continue
+                upcoming = next_run(job["spec"], now)
+                jobs[job_name] = {
+                    "state": "running" if job["running"] else "queued" if job["queued"] else "idle",
+                    "next_run": upcoming.isoformat(timespec="minutes") if upcoming else None,
+                    **{k: v for k, v in job.items() if k not in ("spec", "queued", "running")},
+                }
+        return {"started_at": self.started_at.isoformat(timespec="seconds"),
+                "now": now.isoformat(timespec="seconds"), "jobs": jobs}
+
+
+def serve_status(scheduler: Scheduler, port: int, host: str = "127.0.0.1"):
+    """在后台线程提供 GET /status 与 /status/<name>（只读 JSON）"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            if parts[:1] != ["status"] or len(parts) > 2 or (len(parts) == 2 and parts[1] not in scheduler.jobs):
+                self.send_error(404)
+                return
+            body = codec.dumps(scheduler.status(parts[1] if len(parts) == 2 else None), indent=2)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="scheduler-status", daemon=True).start()
+    print(f"[Scheduler] 状态接口 http://{host}:{server.server_port}/status")
+    return server
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="常驻调度：按时间表运行每日 / 每周 / 每月 / 小时级任务")
+    parser.add_argument("--port", type=int, default=None, help="状态接口端口（默认不开启）")
+    parser.add_argument("--run", action="append", default=[], choices=sorted(JOBS), metavar="JOB",
+                        help="启动后立即排入该任务，可重复")
+    parser.add_argument("--once", action="store_true", help="执行完 --run 指定的任务后退出")
+    args = parser.parse_args(argv)
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    sys.path.insert(0, str(ROOT_DIR))
+
+    scheduler = Scheduler()
+    server = serve_status(scheduler, args.port) if args.port is not None else None
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.request_stop())
+    warm_up()
+    scheduler.start()
+    for name in args.run:
+        scheduler.trigger(name, "命令行")
+    try:
+        if args.once:
+            scheduler.wait_idle()
+        else:
+            for name, job in scheduler.jobs.items():
+                print(f"[Scheduler] {name:<15} {job['schedule']:<18} 下次 {next_run(job['spec'], datetime.now(UTC)):%Y-%m-%d %H:%M} UTC")
+            scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("\n[Scheduler] 收到中断，等待当前任务结束...")
+    finally:
+        scheduler.stop()
+        if server is not None:
+            server.shutdown()
+        shut_down()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+共享 HTTP 会话
+各采集模块经 session() 发请求，同一进程内复用连接池（DNS、TCP、TLS 握手只做一次）：
+单次运行的脚本行为与原来的 requests.get / post 一致，常驻调度（pipeline/scheduler.py）下连接在任务之间保持
+requests 在第一次调用时才导入（只读已存数据的子命令不受影响，见 pipeline/import_budget.py）
+"""
+
+import threading
+
+POOL_SIZE = 16
+
+_session = None
+_lock = threading.Lock()
+
+
+def session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def close():
+    """关闭连接池（调度器退出时调用）"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,75 @@
+"""
+静态数据增量构建
+data/market.json、device.json、casual.json 由对应的 *_static.json（market 另加 World Bank 指标）生成，
+原先三个月度工作流各自冷启动、重读静态文件并整份重写；这里合并为一个构建步骤：
+- 每个产物的输入哈希 = 静态文件内容 + 构建代码（scrapers/*_scraper.py）+ 上游数据
+  （World Bank 各指标的数据版本 lastupdated 及取值），与 data/artifacts.json 中上次记录的一致时跳过
+- World Bank 4 个指标并发拉取，共用一个连接池（pipeline/sessions.py）；拉取失败时保留现有 market.json
+- 只有重建且内容变化的产物列入 changed_files.txt，工作流据此决定是否提交 / 部署
+
+    python -m pipeline static                # 重建输入有变化的产物
+    python -m pipeline static --force        # 全部重建
+    python -m pipeline static --only market device
+"""
+
+import argparse
+import importlib
+from pathlib import Path
+
+from pipeline import codec
+from reporter import artifacts
+
+# 产物名 → (模块, 构建函数, 上游拉取函数)；上游拉取函数返回 (传给构建函数的数据, 数据版本)
+TARGETS = {
+    "market": ("scrapers.market_scraper", "build_market_data", "fetch_wb_indicators"),
+    "device": ("scrapers.device_scraper", "build_device_data", None),
+    "casual": ("scrapers.casual_scraper", "build_casual_data", None),
+}
+
+
+def build(name: str, force: bool = False) -> bool:
+    """按需重建一个产物，返回是否重建"""
+    module_name, build_name, fetch_name = TARGETS[name]
+    module = importlib.import_module(module_name)
+    inputs = [artifacts.content_hash(Path(module.STATIC_FILE).read_bytes()),
+              artifacts.content_hash(Path(module.__file__).read_bytes())]
+    args = ()
+    if fetch_name:
+        try:
+            upstream, vintage = getattr(module, fetch_name)()
+        except Exception as e:
+            print(f"[Static] {name} 上游数据拉取失败，保留现有产物: {e}")
+            return False
+        inputs += [vintage, upstream]
+        args = (upstream,)
+
+    digest = artifacts.inputs_hash(*inputs)
+    output = Path(module.OUTPUT_FILE)
+    if not force and artifacts.inputs_unchanged(output, digest):
+        print(f"[Static] {name} 输入未变化，跳过 {output.name}")
+        return False
+    data = getattr(module, build_name)(*args)
+    written = artifacts.write_bytes(output, codec.dumps(data, indent=2))
+    artifacts.record(output, inputs=digest)
+    print(f"[Static] {name} 已重建 {output.name}（{len(data['regions'])} 个地区{'' if written else '，内容未变'}）")
+    return True
+
+
+def build_all(force: bool = False, only=None) -> list[str]:
+    """重建输入有变化的产物，返回重建的产物名（常驻调度的 static 任务入口）"""
+    rebuilt = [name for name in (only or TARGETS) if build(name, force)]
+    print(f"[Static] 共 {len(only or TARGETS)} 个产物，重建 {len(rebuilt)} 个")
+    return rebuilt
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="静态数据增量构建")
+    parser.add_argument("--force", action="store_true", help="忽略输入哈希，全部重建")
+    parser.add_argument("--only", nargs="+", choices=list(TARGETS), help="只构建这些产物")
+    args = parser.parse_args(argv)
+    build_all(force=args.force, only=args.only)
+    artifacts.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+流式采集 + 异动检测
+批量模式要等所有商店、地区拉完才开始 detect_changes；而各 (store, region, chart_type) 组互不依赖，
+这里让各数据源在各自线程中逐个榜单拉取，每到一组就与昨日同组对比，并把该组的异动交给下游，
+计算与网络等待重叠，下游（按地区生成的提示、进度推送等）不必等最慢的地区拉完
+- 昨日榜单在第一组到达时才读取（此时其余榜单仍在拉取），之后按组经 ChartIndex 取用
+- 结果与批量 detect_changes(all_data, yesterday_data) 完全一致：
+  全部记录按数据源顺序拼接，异动按同一分组顺序收集后再按幅度稳定排序
+- 下游回调 consumer(key, apps, changes) 在调用线程中依次执行，出错只打印，不中断采集
+
+    detector = StreamingDetector(yesterday)
+    data, changes = stream_changes({"appstore": iter_appstore_charts(),
+                                    "google_play": iter_googleplay_charts()}, detector, [on_group])
+"""
+
+import queue
+import threading
+import time
+
+from pipeline import metrics
+from scrapers.change_detector import detect_group_changes, load_chart_data, sort_changes
+
+_DONE = object()
+
+
+class StreamingDetector:
+    """逐组对比昨日榜单；昨日无数据时不产生异动（与批量流程“首次运行跳过”一致）"""
+
+    def __init__(self, yesterday: str, loader=load_chart_data):
+        self.date = yesterday
+        self._loader = loader
+        self._yesterday = None
+
+    @property
+    def yesterday(self):
+        if self._yesterday is None:
+            self._yesterday = self._loader(self.date)
+        return self._yesterday
+
+    def diff(self, key: tuple, apps: list) -> list[dict]:
+        if not apps or not self.yesterday:
+            return []
+        return detect_group_changes(key, apps, self.yesterday)
+
+
+def _produce(name: str, groups, out: queue.Queue):
+    try:
+        for key, apps in groups:
+            out.put((name, key, apps))
+    except Exception as e:
+        print(f"[Stream] {name} 采集中断: {e}")
+    finally:
+        out.put((name, _DONE, None))
+
+
+def stream_changes(sources: dict, detector: StreamingDetector,
+                   consumers=()) -> tuple[dict[str, list], list[dict]]:
+    """
+    sources：数据源名称 → 产出 (key, apps) 的可迭代对象，各在一个线程中运行
+    返回 ({数据源名称: 该源全部记录（按到达顺序）}, 全部异动（已按幅度排序）)
+    """
+    arrivals = queue.Queue()
+    threads = [threading.Thread(target=_produce, args=(name, groups, arrivals),
+                                name=f"stream-{name}", daemon=True)
+               for name, groups in sources.items()]
+    for t in threads:
+        t.start()
+
+    data = {name: [] for name in sources}
+    group_changes = {name: [] for name in sources}
+    pending = len(threads)
+    start = time.perf_counter()
+    first = None
+    while pending:
+        name, key, apps = arrivals.get()
+        if key is _DONE:
+            pending -= 1
+            continue
+        changes = detector.diff(key, apps)
+        data[name].extend(apps)
+        group_changes[name].append(changes)
+        metrics.count("stream.groups")
+        if first is None:
+            first = time.perf_counter() - start
+            print(f"[Stream] 首个榜单组 {first:.1f}s 后到达并完成对比")
+        for consumer in consumers:
+            try:
+                consumer(key, apps, changes)
+            except Exception as e:
+                print(f"[Stream] 下游处理 {key} 失败: {e}")
+    for t in threads:
+        t.join()
+
+    changes = [c for name in sources for group in group_changes[name] for c in group]
+    return data, sort_changes(changes)
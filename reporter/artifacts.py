@@ -0,0 +1,135 @@
+"""
+产物清单模块
+记录 data/ 下每个生成文件的内容哈希；Excel 这类每次写出字节都不同的文件额外记录输入哈希
+- 内容（或输入）未变化时跳过写入，重跑、周末榜单不变时不产生新提交
+- 汇总本次运行实际变化的文件，写到仓库根目录 changed_files.txt，
+  工作流只提交/部署这些文件
+- 与每日采集并发提交的任务（小时级采集）用 use_manifest() 切换到自己的清单 data/artifacts_<任务>.json，
+  两个工作流不会同时改写同一个清单文件而在 rebase 时冲突
+"""
+
+import hashlib
+from pathlib import Path
+
+from pipeline import codec
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "data"
+MANIFEST_FILE = DATA_DIR / "artifacts.json"
+CHANGED_LIST = ROOT_DIR / "changed_files.txt"
+
+_manifest: dict | None = None
+_manifest_file: Path | None = None  # use_manifest() 选定的清单，None 时为 MANIFEST_FILE
+_changed: dict[str, str] = {}  # 相对路径 → "written" / "deleted"
+
+
+def _manifest_path() -> Path:
+    return _manifest_file or MANIFEST_FILE
+
+
+def _load() -> dict:
+    global _manifest
+    if _manifest is None:
+        if _manifest_path().exists():
+            _manifest = codec.load(_manifest_path())
+        else:
+            _manifest = {}
+    return _manifest
+
+
+def use_manifest(job: str):
+    """本次运行改用 data/artifacts_<job>.json（须在写出任何产物前调用；reset() 恢复默认清单）"""
+    global _manifest, _manifest_file
+    _manifest_file = MANIFEST_FILE.with_name(f"artifacts_{job}.json")
+    _manifest = None
+
+
+def _rel(path) -> str:
+    return Path(path).resolve().relative_to(ROOT_DIR.resolve()).as_posix()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def inputs_hash(*inputs) -> str:
+    """对任意可 JSON 序列化的输入求哈希（键排序，保证稳定）"""
+    h = hashlib.sha256()
+    for item in inputs:
+        h.update(codec.dumps(item, sort_keys=True, default=str))
+    return h.hexdigest()
+
+
+def write_bytes(path, data: bytes) -> bool:
+    """内容有变化时才写入，返回是否写入"""
+    path = Path(path)
+    rel = _rel(path)
+    digest = content_hash(data)
+    entry = _load().get(rel)
+    if entry and entry.get("sha256") == digest and path.exists():
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    _load()[rel] = {"sha256": digest}
+    _changed[rel] = "written"
+    return True
+
+
+def inputs_unchanged(path, digest: str) -> bool:
+    """产物已存在且上次生成时的输入哈希与本次一致"""
+    entry = _load().get(_rel(path))
+    return bool(entry) and entry.get("inputs") == digest and Path(path).exists()
+
+
+def record(path, inputs: str | None = None) -> bool:
+    """
+    登记由其他方式写出的文件（如 Excel、history JSON），按内容哈希判断是否变化
+    inputs 为该产物的输入哈希，供下次 inputs_unchanged 判断
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+    rel = _rel(path)
+    digest = content_hash(path.read_bytes())
+    entry = _load().get(rel, {})
+    changed = entry.get("sha256") != digest
+    _load()[rel] = {"sha256": digest, **({"inputs": inputs} if inputs else {})}
+    if changed:
+        _changed[rel] = "written"
+    elif inputs and entry.get("inputs") != inputs:
+        _changed[_rel(_manifest_path())] = "written"  # 产物未变但输入哈希更新，清单仍需保存
+    return changed
+
+
+def remove(path):
+    """删除产物并登记为变化"""
+    path = Path(path)
+    rel = _rel(path)
+    if path.exists():
+        path.unlink()
+        _changed[rel] = "deleted"
+    _load().pop(rel, None)
+
+
+def reset():
+    """开始新一轮记录：重新读取清单、清空变化列表（常驻调度下每个任务开始前调用）"""
+    global _manifest, _manifest_file
+    _manifest = None
+    _manifest_file = None
+    _changed.clear()
+
+
+def changed_files() -> list[str]:
+    """本次运行中写入或删除的文件（相对仓库根目录）"""
+    return sorted(_changed)
+
+
+def save():
+    """保存清单，并把变化文件列表写到 changed_files.txt"""
+    manifest = _load()
+    if _changed:
+        _manifest_path().parent.mkdir(parents=True, exist_ok=True)
+        codec.dump(manifest, _manifest_path(), indent=1, sort_keys=True)
+        _changed.setdefault(_rel(_manifest_path()), "written")
+    CHANGED_LIST.write_text("".join(f"{p}\n" for p in changed_files()), encoding="utf-8")
+    print(f"[Artifacts] 本次变化 {len(_changed)} 个文件，列表见 {CHANGED_LIST.name}")
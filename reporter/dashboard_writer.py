@@ -4,13 +4,215 @@
 - data/latest.json          榜单数据 + 元信息
 - data/latest_changes.json  异动数据
 - data/latest_analysis.json AI 异动分析（结构化）
+- data/dashboard/manifest.json  分片清单（仪表盘首屏只读它）
+- data/dashboard/shards/*.json  按 (商店, 地区, 榜单) 拆分的榜单分片，
+  文件名带内容哈希，可永久缓存；同时输出 .gz / .br 预压缩版本
+- data/dashboard/shards/index.*.json  搜索/筛选索引：名称/开发商前缀词 → 行号，
+  以及按品类、地区的行号倒排表，页面用集合求交代替全量扫描
+- data/dashboard/shards/*.series.*.json  每个分片内应用最近 N 天的排名序列（差分编码），
+  行顺序与分片一致，供趋势小图使用
+- data/dashboard/shards/*.icons.*.json   每个分片的内联缩略图标（data URI，取自 reporter/icon_cache.py
+  的本地缓存，这里不联网），页面不再逐行请求商店 CDN 上的图标
+- data/dashboard/shares.json  开发商 / 品类曝光占比 Top 及 7 日变化（读取 scrapers.aggregates 的物化聚合）
 """
 
-import json
+import gzip
+import hashlib
+import re
 from pathlib import Path
 from datetime import datetime
 
+from pipeline import codec
+from reporter import artifacts
+from reporter.rank_series import SERIES_DAYS, delta_encode, update_rank_series
+from scrapers.chart_index import STORE_ORDER, ChartIndex
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 DATA_DIR = Path(__file__).parent.parent / "data"
+DASHBOARD_DIR = DATA_DIR / "dashboard"
+SHARD_DIR = DASHBOARD_DIR / "shards"
+
+# 分片只保留表格实际渲染的字段（商店/地区/榜单由清单给出）
+SHARD_FIELDS = ["rank", "name", "artist", "score"]
+
+# 搜索索引的前缀最大长度（更长的查询词由页面在候选行上再校验）
+INDEX_PREFIX_MAX = 8
+
+_WORD_RE = re.compile(r"\w+")
+# 中日韩文字没有空格分词，按单字建索引
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def _compact_json(obj) -> bytes:
+    return codec.dumps(obj)
+
+
+def _write_precompressed(path: Path, raw: bytes):
+    """写出原文件及 .gz / .br 预压缩版本（未安装 brotli 时跳过 .br），内容未变时跳过"""
+    if not artifacts.write_bytes(path, raw) and Path(f"{path}.gz").exists():
+        return
+    artifacts.write_bytes(Path(f"{path}.gz"), gzip.compress(raw, compresslevel=9, mtime=0))
+    if brotli is not None:
+        artifacts.write_bytes(Path(f"{path}.br"), brotli.compress(raw))
+
+
+def _tokenize(text: str) -> list[str]:
+    """小写分词：普通单词整体保留，中日韩文字拆成单字（需与仪表盘 JS 的 tokenize 保持一致）"""
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        pos = 0
+        for m in _CJK_RE.finditer(word):
+            if m.start() > pos:
+                tokens.append(word[pos:m.start()])
+            tokens.append(m.group())
+            pos = m.end()
+        if pos < len(word):
+            tokens.append(word[pos:])
+    return tokens
+
+
+def _delta_encode(ids: list[int]) -> list[int]:
+    """升序行号差分编码：[3, 5, 9] → [3, 2, 4]"""
+    return [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] if ids else []
+
+
+def build_search_index(rows: list[dict]) -> dict:
+    """
+    为按分片顺序排列的行构建搜索/筛选索引，行号即 rows 中的下标
+    - tokens:   名称/开发商单词的前缀（1..INDEX_PREFIX_MAX 字符）→ 条目号
+    - entities: 条目号（去重后的 名称+开发商）→ 行号；同一游戏在多地区/榜单出现，
+                两级索引避免前缀表按行重复膨胀
+    - genres:   品类 → 行号
+    - regions:  地区名 → 行号
+    所有倒排表升序并差分编码
+    """
+    tokens, entities, genres, regions = {}, {}, {}, {}
+    for row_id, app in enumerate(rows):
+        name, artist = app.get("name") or "", app.get("artist") or ""
+        entity_rows = entities.get((name, artist))
+        if entity_rows is None:
+            entity_id = len(entities)
+            entity_rows = entities[(name, artist)] = []
+            prefixes = set()
+            for token in _tokenize(f"{name} {artist}"):
+                for n in range(1, min(len(token), INDEX_PREFIX_MAX) + 1):
+                    prefixes.add(token[:n])
+            for prefix in prefixes:
+                tokens.setdefault(prefix, []).append(entity_id)
+        entity_rows.append(row_id)
+        genres.setdefault(app.get("genre") or "", []).append(row_id)
+        regions.setdefault(app.get("region_name") or "", []).append(row_id)
+
+    def encode(postings: dict) -> dict:
+        return {k: _delta_encode(v) for k, v in sorted(postings.items())}
+
+    return {
+        "prefix_max": INDEX_PREFIX_MAX,
+        "rows": len(rows),
+        "tokens": encode(tokens),
+        "entities": [_delta_encode(v) for v in entities.values()],
+        "genres": encode(genres),
+        "regions": encode(regions),
+    }
+
+
+def write_dashboard_shards(chart_data: list[dict], meta: dict) -> dict:
+    """
+    按 (store, region, chart_type) 拆分榜单并写出分片 + 清单
+    返回清单字典
+    """
+    from reporter import icon_cache
+
+    SHARD_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 保持原始数据中的地区/榜单顺序，商店按 App Store → Google Play
+    index = ChartIndex.of(chart_data)
+    keys = sorted(index.keys(), key=lambda k: STORE_ORDER.get(k[0], 9))
+    groups = {key: index.group(key) for key in keys}
+    series = update_rank_series(groups, meta["date"])
+    icon_index = icon_cache.load_index()  # 只读本地缓存，下载在 main_daily 的 icons 阶段
+
+    shards = []
+    ordered_rows = []
+    for store, region, chart_type in keys:
+        apps = groups[(store, region, chart_type)]
+        raw = _compact_json({
+            "fields": SHARD_FIELDS,
+            "rows": [[app.get(f) for f in SHARD_FIELDS] for app in apps],
+        })
+        digest = hashlib.sha256(raw).hexdigest()[:12]
+        filename = f"{store}_{region}_{chart_type}.{digest}.json"
+        shard_path = SHARD_DIR / filename
+        if not shard_path.exists():
+            _write_precompressed(shard_path, raw)
+
+        series_raw = _compact_json({
+            "end": meta["date"],
+            "days": SERIES_DAYS,
+            "series": [delta_encode(values) for values in series[(store, region, chart_type)]],
+        })
+        series_name = f"{store}_{region}_{chart_type}.series.{hashlib.sha256(series_raw).hexdigest()[:12]}.json"
+        if not (SHARD_DIR / series_name).exists():
+            _write_precompressed(SHARD_DIR / series_name, series_raw)
+
+        icons_raw = _compact_json(icon_cache.shard_icons(apps, icon_index))
+        icons_name = f"{store}_{region}_{chart_type}.icons.{hashlib.sha256(icons_raw).hexdigest()[:12]}.json"
+        if not (SHARD_DIR / icons_name).exists():
+            _write_precompressed(SHARD_DIR / icons_name, icons_raw)
+
+        shards.append({
+            "store": store,
+            "region": region,
+            "region_name": apps[0].get("region_name", region),
+            "chart_type": chart_type,
+            "chart_name": apps[0].get("chart_name", chart_type),
+            "rows": len(apps),
+            "base": len(ordered_rows),  # 该分片第一行的全局行号
+            "file": f"shards/{filename}",
+            "series": f"shards/{series_name}",
+            "icons": f"shards/{icons_name}",
+        })
+        ordered_rows.extend(apps)
+
+    # 搜索/筛选索引（同样按内容哈希命名）
+    index_raw = _compact_json(build_search_index(ordered_rows))
+    index_name = f"index.{hashlib.sha256(index_raw).hexdigest()[:12]}.json"
+    if not (SHARD_DIR / index_name).exists():
+        _write_precompressed(SHARD_DIR / index_name, index_raw)
+
+    genres = sorted({app.get("genre") for app in ordered_rows if app.get("genre")})
+    manifest = {
+        **meta,
+        "fields": SHARD_FIELDS,
+        "genres": genres,
+        "index": f"shards/{index_name}",
+        "shards": shards,
+    }
+    _write_precompressed(DASHBOARD_DIR / "manifest.json", _compact_json(manifest))
+
+    # 清理不再被清单引用的旧分片
+    keep = {Path(s[f]).name for s in shards for f in ("file", "series", "icons")} | {index_name}
+    for path in SHARD_DIR.iterdir():
+        if path.name.split(".json")[0] + ".json" not in keep:
+            artifacts.remove(path)
+
+    print(f"[Dashboard] 已输出 {len(shards)} 个分片到 {SHARD_DIR}")
+    return manifest
+
+
+def write_share_json(date_str: str, days: int = 7, top: int = 10):
+    """全部榜单平均的开发商 / 品类曝光占比 Top，附 days 天变化"""
+    from scrapers import aggregates
+
+    shares = {"date": date_str, "days": days}
+    for field in aggregates.FIELDS:
+        shares[field] = [{k: r[k] for k in ("value", "apps", "share", "exposure", "delta")}
+                         for r in aggregates.share_changes(date_str, days, field, top=top)]
+    artifacts.write_bytes(DASHBOARD_DIR / "shares.json", _compact_json(shares))
 
 
 def write_dashboard_json(
@@ -26,21 +228,29 @@ def write_dashboard_json(
     regions = set(a.get("region_name") for a in chart_data)
     new_entries = sum(1 for c in changes if c.get("change_type") == "新进榜")
 
-    # latest.json — 榜单数据
-    latest = {
+    meta = {
         "date": date_str,
         "total": len(chart_data),
         "regions": len(regions),
         "changes": len(changes),
         "new_entries": new_entries,
-        "data": chart_data,
     }
-    with open(DATA_DIR / "latest.json", "w", encoding="utf-8") as f:
-        json.dump(latest, f, ensure_ascii=False)
+
+    # latest.json — 榜单数据（完整版，保留给外部使用方）
+    latest = {**meta, "data": chart_data}
+    artifacts.write_bytes(DATA_DIR / "latest.json", _compact_json(latest))
+
+    # dashboard/ — 清单 + 分片（仪表盘按筛选条件按需加载）
+    write_dashboard_shards(chart_data, meta)
+
+    # dashboard/shares.json — 开发商 / 品类份额
+    write_share_json(date_str)
 
     # latest_changes.json — 异动数据
-    with open(DATA_DIR / "latest_changes.json", "w", encoding="utf-8") as f:
-        json.dump({"date": date_str, "changes": changes}, f, ensure_ascii=False)
+    artifacts.write_bytes(
+        DATA_DIR / "latest_changes.json",
+        _compact_json({"date": date_str, "changes": changes}),
+    )
 
     # latest_analysis.json — AI 异动分析（结构化）
     # ai_analysis 现在是一个字典，包含 highlights, regions, categories, industry
@@ -56,7 +266,9 @@ def write_dashboard_json(
     if isinstance(ai_analysis, str):
         analysis_data["raw_text"] = ai_analysis
     
-    with open(DATA_DIR / "latest_analysis.json", "w", encoding="utf-8") as f:
-        json.dump(analysis_data, f, ensure_ascii=False, indent=2)
+    artifacts.write_bytes(
+        DATA_DIR / "latest_analysis.json",
+        codec.dumps(analysis_data, indent=2),
+    )
 
     print(f"[Dashboard] JSON 文件已生成到 data/")
@@ -0,0 +1,211 @@
+"""
+企业微信投递队列
+- 超长 Markdown 按段落/行边界拆成有序分片并标注（1/3），不再截断
+- 每个 Webhook 独立限速（默认 20 条/分钟），失败按指数退避重试
+- 多个 Webhook 并发投递，同一 Webhook 内保持消息顺序
+- 重试后仍未送达的分片写入 data/outbox/wecom_pending.json，下次运行优先补发
+- 不可重试的错误（如内容非法）只丢弃出错的那一片并记录日志，其后的分片照常发送
+  （文件中只保存 Webhook 的哈希，不落地密钥）
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pipeline import codec, sessions
+from pipeline.ratelimit import RateLimiter, backoff_delays
+from reporter import artifacts
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+OUTBOX_FILE = DATA_DIR / "outbox" / "wecom_pending.json"
+
+# 企业微信单条 Markdown 上限 4096 字节（UTF-8），预留分片标注
+WECOM_MAX_BYTES = 4000
+PART_MARK_BYTES = 32
+
+RATE_LIMIT = int(os.environ.get("WECOM_RATE_LIMIT", "20"))  # 每分钟每个 Webhook
+MAX_RETRIES = 4
+PENDING_TTL_HOURS = 48
+
+# 频率超限 / 系统繁忙，值得重试
+RETRYABLE_ERRCODES = {-1, 45009, 45033}
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def configured_webhooks() -> list[str]:
+    """WECOM_WEBHOOK_URL + WECOM_WEBHOOK_URLS（逗号分隔），去重保序"""
+    urls = [os.environ.get("WECOM_WEBHOOK_URL", "")]
+    urls += os.environ.get("WECOM_WEBHOOK_URLS", "").split(",")
+    seen = []
+    for url in (u.strip() for u in urls):
+        if url and url not in seen:
+            seen.append(url)
+    return seen
+
+
+def webhook_id(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _hard_split(text: str, budget: int) -> list[str]:
+    """单行超长时按字符切分，保证每段不超过 budget 字节"""
+    parts, current = [], ""
+    for ch in text:
+        if _size(current + ch) > budget:
+            parts.append(current)
+            current = ""
+        current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_markdown(markdown: str, max_bytes: int = WECOM_MAX_BYTES) -> list[str]:
+    """
+    按 Markdown 边界拆分：优先段落（空行），其次单行，最后按字符
+    多于一片时在每片末尾标注（i/n）
+    """
+    if _size(markdown) <= max_bytes:
+        return [markdown]
+    budget = max_bytes - PART_MARK_BYTES
+
+    # (文本, 与前一单元的分隔符)
+    units = []
+    for paragraph in markdown.split("\n\n"):
+        if _size(paragraph) <= budget:
+            units.append((paragraph, "\n\n"))
+            continue
+        for i, line in enumerate(paragraph.split("\n")):
+            sep = "\n\n" if i == 0 else "\n"
+            for j, piece in enumerate(_hard_split(line, budget) if _size(line) > budget else [line]):
+                units.append((piece, sep if j == 0 else ""))
+
+    chunks, current = [], ""
+    for text, sep in units:
+        if not current:
+            current = text
+        elif _size(current + sep + text) <= budget:
+            current += sep + text
+        else:
+            chunks.append(current)
+            current = text
+    if current:
+        chunks.append(current)
+
+    total = len(chunks)
+    return [f"{chunk}\n\n（{i}/{total}）" for i, chunk in enumerate(chunks, start=1)]
+
+
+def _limiter(url: str) -> RateLimiter:
+    with _limiters_lock:
+        if url not in _limiters:
+            _limiters[url] = RateLimiter(RATE_LIMIT, 60)
+        return _limiters[url]
+
+
+def _post(url: str, chunk: str) -> tuple[bool, bool]:
+    """发送一片，返回 (是否成功, 是否值得重试)"""
+    payload = {"msgtype": "markdown", "markdown": {"content": chunk}}
+    try:
+        resp = sessions.session().post(url, json=payload, timeout=10)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            return False, True
+        result = codec.loads(resp.content)
+    except Exception as e:
+        print(f"[WeCom] 推送异常: {e}")
+        return False, True
+    if result.get("errcode") == 0:
+        return True, False
+    print(f"[WeCom] 推送失败: {result}")
+    return False, result.get("errcode") in RETRYABLE_ERRCODES
+
+
+def _deliver_to(url: str, chunks: list[str]) -> tuple[list[str], list[str]]:
+    """
+    按顺序投递到单个 Webhook，返回 (待补发的分片, 丢弃的分片)
+    可重试的错误重试耗尽后停止，从该片起留待下次补发；不可重试的错误丢弃该片，继续发送后续分片
+    """
+    limiter = _limiter(url)
+    dropped = []
+    for idx, chunk in enumerate(chunks):
+        limiter.acquire()
+        ok, retryable = _post(url, chunk)
+        if not ok and retryable:
+            for delay in backoff_delays(MAX_RETRIES, base=2.0):
+                time.sleep(delay)
+                limiter.acquire()
+                ok, retryable = _post(url, chunk)
+                if ok or not retryable:
+                    break
+        if ok:
+            continue
+        if retryable:
+            return chunks[idx:], dropped
+        dropped.append(chunk)
+        print(f"[WeCom] Webhook {webhook_id(url)[:6]} 丢弃无法发送的分片：{chunk[:60]!r}…")
+    return [], dropped
+
+
+def _load_pending() -> list[dict]:
+    if not OUTBOX_FILE.exists():
+        return []
+    pending = codec.load(OUTBOX_FILE)
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=PENDING_TTL_HOURS)).isoformat()
+    return [p for p in pending if p.get("created_at", "") >= cutoff]
+
+
+def _save_pending(pending: list[dict]):
+    if not pending and not OUTBOX_FILE.exists():
+        return
+    raw = codec.dumps(pending, indent=2)
+    artifacts.write_bytes(OUTBOX_FILE, raw)
+
+
+def deliver(messages: list[str], webhooks: list[str] | None = None) -> bool:
+    """
+    投递一组 Markdown 消息到多个 Webhook（默认为已配置的全部 Webhook）
+    先补发这些 Webhook 上次积压的分片，再按顺序发送本次消息
+    返回是否全部送达（有分片被丢弃或留待补发时为 False）
+    """
+    webhooks = configured_webhooks() if webhooks is None else webhooks
+    if not webhooks:
+        print("[WeCom] 未配置 Webhook URL，跳过推送")
+        return False
+
+    chunks = [chunk for message in messages for chunk in split_markdown(message)]
+    ids = {webhook_id(url): url for url in webhooks}
+    pending = _load_pending()
+    queues = {url: [] for url in webhooks}
+    remaining_pending = []
+    for entry in pending:
+        url = ids.get(entry.get("webhook_id"))
+        if url:
+            queues[url].extend(entry["chunks"])
+        else:
+            remaining_pending.append(entry)
+    for url in webhooks:
+        queues[url].extend(chunks)
+
+    with ThreadPoolExecutor(max_workers=min(len(webhooks), 8)) as pool:
+        results = dict(zip(webhooks, pool.map(lambda url: _deliver_to(url, queues[url]), webhooks)))
+
+    now = datetime.now(timezone.utc).isoformat()
+    for url, (undelivered, dropped) in results.items():
+        sent = len(queues[url]) - len(undelivered) - len(dropped)
+        print(f"[WeCom] Webhook {webhook_id(url)[:6]} 送达 {sent}/{len(queues[url])} 条"
+              + (f"，丢弃 {len(dropped)} 条" if dropped else "")
+              + (f"，{len(undelivered)} 条留待补发" if undelivered else ""))
+        if undelivered:
+            remaining_pending.append({"webhook_id": webhook_id(url), "created_at": now, "chunks": undelivered})
+    _save_pending(remaining_pending)
+    return not any(undelivered or dropped for undelivered, dropped in results.values())
@@ -1,15 +1,23 @@
 """
 Excel 输出模块
 生成格式化的 Excel 文件，保存到 data/ 目录，由 GitHub Actions 提交到仓库
+使用 XlsxWriter 的 constant_memory 模式逐行流式写入：表头、边框通过列级格式设置，
+不在内存中构建整张表，也不需要写完后再逐个单元格补样式
 """
 
+import hashlib
 import os
-import pandas as pd
+from itertools import chain, islice
 from pathlib import Path
 from datetime import datetime
 
+from reporter import artifacts
+from scrapers.chart_index import ChartIndex
+
 DATA_DIR = Path(__file__).parent.parent / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# 自动列宽只抽样前 N 行计算，保证写入过程内存恒定
+WIDTH_SAMPLE_ROWS = 500
 
 
 # 列名映射（英文字段 → 中文表头）
@@ -43,36 +51,117 @@ def _store_label(store_val: str) -> str:
     return "Google Play" if store_val == "google_play" else "App Store"
 
 
-def _apply_styles(writer, sheet_name: str, df: pd.DataFrame, header_color: str = "4472C4"):
-    """为 worksheet 添加基础样式：冻结首行、自动列宽、表头颜色"""
-    from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-    from openpyxl.utils import get_column_letter
-
-    ws = writer.sheets[sheet_name]
-    ws.freeze_panes = "A2"
+def _column_widths(headers: list[str], sample_rows: list[tuple]) -> list[int]:
+    """根据表头和抽样行估算列宽（上限 40）"""
+    widths = [len(str(h)) for h in headers]
+    for row in sample_rows:
+        for idx, value in enumerate(row):
+            if value is not None and len(str(value)) > widths[idx]:
+                widths[idx] = len(str(value))
+    return [min(w + 4, 40) for w in widths]
 
-    header_fill = PatternFill("solid", fgColor=header_color)
-    header_font = Font(bold=True, color="FFFFFF")
-    thin = Side(style="thin", color="CCCCCC")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
 
-    for col_idx, col_name in enumerate(df.columns, start=1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        # 自动列宽
-        max_len = max(
-            len(str(col_name)),
-            df[col_name].astype(str).str.len().max() if len(df) > 0 else 0
-        )
-        ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len + 4, 40)
-
-    # 数据行边框
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, max_col=ws.max_column):
-        for cell in row:
-            cell.border = border
+def _write_sheet(workbook, sheet_name: str, headers: list[str], rows, header_color: str = "4472C4") -> int:
+    """
+    流式写入一个 worksheet：冻结首行、自动列宽、表头颜色、数据行边框
+    rows 可以是任意可迭代对象（元组顺序与 headers 一致），返回写入的数据行数
+    """
+    ws = workbook.add_worksheet(sheet_name)
+    ws.freeze_panes(1, 0)
+
+    border = {"border": 1, "border_color": "#CCCCCC"}
+    header_fmt = workbook.add_format({
+        "bold": True, "font_color": "#FFFFFF", "bg_color": f"#{header_color}",
+        "align": "center", "valign": "vcenter", **border,
+    })
+    cell_fmt = workbook.add_format(border)
+
+    # constant_memory 模式下必须在写入数据前设置列宽；边框只加在写入的单元格上，不用列格式（否则整列百万行都有边框）
+    rows = iter(rows)
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+    for col_idx, width in enumerate(_column_widths(headers, sample)):
+        ws.set_column(col_idx, col_idx, width)
+
+    ws.write_row(0, 0, headers, header_fmt)
+    count = 0
+    for count, row in enumerate(chain(sample, rows), start=1):
+        ws.write_row(count, 0, row, cell_fmt)
+    return count
+
+
+def _open_workbook(filepath: Path):
+    import xlsxwriter  # 只在真正写文件时加载
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    return xlsxwriter.Workbook(str(filepath), {"constant_memory": True})
+
+
+def _rows_digest(*row_groups) -> str:
+    """对将要写入的各 sheet 行内容求哈希（流式，不保留行），用于判断是否需要重新生成"""
+    h = hashlib.sha256()
+    for rows in row_groups:
+        h.update(b"\x00sheet")
+        for row in rows:
+            h.update(repr(row).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _chart_row(app: dict, date_str: str) -> tuple:
+    return (
+        app.get("rank", ""),
+        app.get("name", ""),
+        app.get("artist", ""),
+        app.get("genre", ""),
+        app.get("region_name", app.get("region", "")),
+        _store_label(app.get("store", "")),
+        app.get("chart_name", ""),
+        app.get("score", ""),
+        app.get("installs", ""),
+        app.get("fetch_date", date_str),
+    )
+
+
+def _top10_row(app: dict) -> tuple:
+    return (
+        app.get("rank", ""),
+        app.get("name", ""),
+        app.get("artist", ""),
+        app.get("genre", ""),
+        app.get("region_name", ""),
+        _store_label(app.get("store", "")),
+        app.get("chart_name", ""),
+    )
+
+
+def _pct(value) -> str:
+    return "" if value is None else f"{value * 100:.1f}%"
+
+
+def _share_row(r: dict) -> tuple:
+    """scrapers.aggregates.region_shares 的一行"""
+    return (
+        "开发商" if r["field"] == "artist" else "品类",
+        r["value"],
+        r["region_name"],
+        _store_label(r["store"]),
+        r["apps"],
+        _pct(r["exposure"]),
+        _pct(r["exposure_before"]),
+        "" if r["delta"] is None else f"{r['delta'] * 100:+.1f}pp",
+    )
+
+
+def _change_row(c: dict) -> tuple:
+    return (
+        c.get("name", ""),
+        c.get("artist", ""),
+        c.get("region_name", c.get("region", "")),
+        _store_label(c.get("store", "")),
+        c.get("chart_name", ""),
+        c.get("change_type", ""),
+        c.get("rank_today", ""),
+        c.get("rank_yesterday", ""),
+        c.get("rank_delta", ""),
+    )
 
 
 def write_daily_excel(chart_data: list[dict], changes: list[dict], ai_analysis: str, date_str: str) -> str:
@@ -83,117 +172,76 @@ def write_daily_excel(chart_data: list[dict], changes: list[dict], ai_analysis:
     """
     filepath = DATA_DIR / f"榜单日报_{date_str}.xlsx"
 
-    # ── 今日榜单 ──────────────────────────────────────────
-    chart_rows = []
-    for app in chart_data:
-        chart_rows.append({
-            "排名":     app.get("rank", ""),
-            "应用名称": app.get("name", ""),
-            "开发商":   app.get("artist", ""),
-            "品类":     app.get("genre", ""),
-            "地区":     app.get("region_name", app.get("region", "")),
-            "商店":     _store_label(app.get("store", "")),
-            "榜单类型": app.get("chart_name", ""),
-            "评分":     app.get("score", ""),
-            "安装量":   app.get("installs", ""),
-            "采集日期": app.get("fetch_date", date_str),
-        })
-    df_charts = pd.DataFrame(chart_rows) if chart_rows else pd.DataFrame(columns=list(CHART_COLUMNS.values()))
-
-    # ── 异动记录 ──────────────────────────────────────────
-    change_rows = []
-    for c in changes:
-        change_rows.append({
-            "应用名称": c.get("name", ""),
-            "开发商":   c.get("artist", ""),
-            "地区":     c.get("region_name", c.get("region", "")),
-            "商店":     _store_label(c.get("store", "")),
-            "榜单类型": c.get("chart_name", ""),
-            "异动类型": c.get("change_type", ""),
-            "今日排名": c.get("rank_today", ""),
-            "昨日排名": c.get("rank_yesterday", ""),
-            "变化幅度": c.get("rank_delta", ""),
-        })
-    df_changes = pd.DataFrame(change_rows) if change_rows else pd.DataFrame(columns=list(CHANGE_COLUMNS.values()))
-
-    # ── AI 分析 ───────────────────────────────────────────
-    df_analysis = pd.DataFrame([{"日期": date_str, "AI市场解读": ai_analysis}])
+    # ── 今日榜单 / 异动记录 ────────────────────────────────
+    def chart_rows():
+        return (_chart_row(app, date_str) for app in chart_data)
+
+    def change_rows():
+        return (_change_row(c) for c in changes)
+
+    # 各 sheet 内容与上次生成时一致则跳过（说明页的更新时间不计入）
+    digest = _rows_digest(chart_rows(), change_rows(), [(date_str, ai_analysis)])
+    if artifacts.inputs_unchanged(filepath, digest):
+        print(f"[Excel] 内容未变化，跳过 {filepath}")
+        return str(filepath)
+
+    # ── 说明页 ────────────────────────────────────────────
+    info_rows = [
+        ("报告日期", date_str),
+        ("榜单条数", len(chart_data)),
+        ("异动数量", len(changes)),
+        ("覆盖地区", "美国/英国/德国/法国/日本/韩国/印尼/泰国/新加坡/越南"),
+        ("数据来源", "App Store RSS API / Google Play"),
+        ("更新时间", datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")),
+    ]
 
     # ── 写入 Excel ────────────────────────────────────────
-    with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
-        df_charts.to_excel(writer, sheet_name="今日榜单", index=False)
-        df_changes.to_excel(writer, sheet_name="今日异动", index=False)
-        df_analysis.to_excel(writer, sheet_name="AI分析", index=False)
-
-        # 写说明页
-        df_info = pd.DataFrame([
-            {"项目": "报告日期",    "内容": date_str},
-            {"项目": "榜单条数",    "内容": len(chart_data)},
-            {"项目": "异动数量",    "内容": len(changes)},
-            {"项目": "覆盖地区",    "内容": "美国/英国/德国/法国/日本/韩国/印尼/泰国/新加坡/越南"},
-            {"项目": "数据来源",    "内容": "App Store RSS API / Google Play"},
-            {"项目": "更新时间",    "内容": datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")},
-        ])
-        df_info.to_excel(writer, sheet_name="说明", index=False)
-
-        _apply_styles(writer, "今日榜单", df_charts, "4472C4")
-        _apply_styles(writer, "今日异动", df_changes, "C00000")
-        _apply_styles(writer, "AI分析",  df_analysis, "70AD47")
-        _apply_styles(writer, "说明",    df_info,     "7F7F7F")
+    workbook = _open_workbook(filepath)
+    _write_sheet(workbook, "今日榜单", list(CHART_COLUMNS.values()), chart_rows(), "4472C4")
+    _write_sheet(workbook, "今日异动", list(CHANGE_COLUMNS.values()), change_rows(), "C00000")
+    _write_sheet(workbook, "AI分析", ["日期", "AI市场解读"], [(date_str, ai_analysis)], "70AD47")
+    _write_sheet(workbook, "说明", ["项目", "内容"], info_rows, "7F7F7F")
+    workbook.close()
+    artifacts.record(filepath, inputs=digest)
 
     print(f"[Excel] 已生成 {filepath}")
     return str(filepath)
 
 
 def write_weekly_excel(all_week_changes: list[dict], latest_charts: list[dict],
-                       weekly_summary: str, date_str: str) -> str:
+                       weekly_summary: str, date_str: str, share_rows: list[dict] = ()) -> str:
     """
     生成每周 Excel 文件
-    包含：本周异动汇总、各地区当前榜单、AI周报
+    包含：本周异动汇总、各地区当前榜单、开发商/品类份额（share_rows，来自 scrapers.aggregates）、AI周报
     """
     filepath = DATA_DIR / f"手游周报_{date_str}.xlsx"
 
-    # 本周异动汇总
-    change_rows = []
-    for c in all_week_changes:
-        change_rows.append({
-            "应用名称": c.get("name", ""),
-            "开发商":   c.get("artist", ""),
-            "地区":     c.get("region_name", c.get("region", "")),
-            "商店":     _store_label(c.get("store", "")),
-            "榜单类型": c.get("chart_name", ""),
-            "异动类型": c.get("change_type", ""),
-            "今日排名": c.get("rank_today", ""),
-            "昨日排名": c.get("rank_yesterday", ""),
-            "变化幅度": c.get("rank_delta", ""),
-        })
-    df_changes = pd.DataFrame(change_rows) if change_rows else pd.DataFrame()
-
-    # 各地区 Top 10
-    top10_rows = [
-        {
-            "排名":     app.get("rank", ""),
-            "应用名称": app.get("name", ""),
-            "开发商":   app.get("artist", ""),
-            "品类":     app.get("genre", ""),
-            "地区":     app.get("region_name", ""),
-            "商店":     _store_label(app.get("store", "")),
-            "榜单类型": app.get("chart_name", ""),
-        }
-        for app in latest_charts if app.get("rank", 999) <= 10
-    ]
-    df_top10 = pd.DataFrame(top10_rows) if top10_rows else pd.DataFrame()
+    # 各地区 Top 10 / 本周异动汇总
+    index = ChartIndex.of(latest_charts)
+
+    def top10_rows():
+        return (_top10_row(app) for key in index.keys() for app in index.up_to_rank(key, 10))
+
+    def change_rows():
+        return (_change_row(c) for c in all_week_changes)
 
-    df_summary = pd.DataFrame([{"周报日期": date_str, "AI周报内容": weekly_summary}])
+    def share_sheet_rows():
+        return (_share_row(r) for r in share_rows)
 
-    with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
-        df_top10.to_excel(writer, sheet_name="各地区Top10", index=False)
-        df_changes.to_excel(writer, sheet_name="本周异动汇总", index=False)
-        df_summary.to_excel(writer, sheet_name="AI周报", index=False)
+    digest = _rows_digest(top10_rows(), change_rows(), share_sheet_rows(), [(date_str, weekly_summary)])
+    if artifacts.inputs_unchanged(filepath, digest):
+        print(f"[Excel] 内容未变化，跳过 {filepath}")
+        return str(filepath)
 
-        _apply_styles(writer, "各地区Top10",  df_top10,   "4472C4")
-        _apply_styles(writer, "本周异动汇总", df_changes, "C00000")
-        _apply_styles(writer, "AI周报",       df_summary, "70AD47")
+    workbook = _open_workbook(filepath)
+    _write_sheet(workbook, "各地区Top10", ["排名", "应用名称", "开发商", "品类", "地区", "商店", "榜单类型"],
+                 top10_rows(), "4472C4")
+    _write_sheet(workbook, "本周异动汇总", list(CHANGE_COLUMNS.values()), change_rows(), "C00000")
+    _write_sheet(workbook, "份额变化", ["维度", "名称", "地区", "商店", "上榜位", "曝光占比", "7日前", "变化"],
+                 share_sheet_rows(), "ED7D31")
+    _write_sheet(workbook, "AI周报", ["周报日期", "AI周报内容"], [(date_str, weekly_summary)], "70AD47")
+    workbook.close()
+    artifacts.record(filepath, inputs=digest)
 
     print(f"[Excel] 已生成 {filepath}")
     return str(filepath)
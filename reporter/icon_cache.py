@@ -0,0 +1,202 @@
+"""
+应用图标缓存
+仪表盘不再让每行直接引用 Apple / Google CDN 的 artwork 地址（每页上百个图片请求，且同一图标的地址随尺寸、地区变化），
+而是在报告阶段把图标下载到本地、按分片内联：
+- 下载：把 artwork 地址改写为 THUMB_PX 像素的缩略图地址（两家 CDN 都支持按地址参数缩放），
+  FETCH_WORKERS 个线程并发，经共享会话（pipeline/sessions.py）复用连接
+- 存储：按内容哈希存放在 data/icons/objects/<哈希前2位>/<哈希>.<扩展名>，多个应用共用同一图标时只存一份；
+  data/icons/index.json 记录 (store, app_id) → 哈希 与下载日期。
+  data/icons/ 是本地缓存，不进 git（.gitignore），也不登记到 changed_files.txt；
+  每日工作流用 Actions 缓存在运行间保留，只提交 / 发布各分片的图标文件
+- 只下载索引中没有的应用（新上榜）；已有图标 ICON_TTL_DAYS 天后重新下载一次，下载失败的 RETRY_DAYS 天后重试
+- 每次最多下载 FETCH_LIMIT 个（新应用优先、排名靠前优先），首次运行的全量下载分几天完成，不拖慢日报
+- 下载是日报中单独的 icons 阶段，仅在 ICON_FETCH=1 时运行（每日工作流开启；离线演练、基准测试、
+  手动 report 不联网）；仪表盘生成只读本地缓存，没有图标的行照常显示
+- 输出：每个分片一个图标文件（shards/*.icons.<哈希>.json），内容为去重后的 data URI 列表 + 每行下标，
+  页面每个分片只多一个请求
+- 地址不支持缩放且图片超过 MAX_ICON_BYTES 时，装有 Pillow 则本地缩小，否则跳过该图标
+"""
+
+import base64
+import hashlib
+import io
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pipeline import codec, metrics, sessions
+from scrapers.chart_index import MISSING_RANK, rank_of
+
+DATA_DIR = Path(__file__).parent.parent / "data" / "icons"
+INDEX_FILE = DATA_DIR / "index.json"
+OBJECT_DIR = DATA_DIR / "objects"
+
+THUMB_PX = 64  # 页面按 32px 显示，2 倍图
+MAX_ICON_BYTES = 24 * 1024
+ICON_TTL_DAYS = 30
+RETRY_DAYS = 3
+PRUNE_DAYS = 90  # 超过该天数未再下载（已不在榜）的索引条目删除，不再被引用的图标随之删除
+FETCH_WORKERS = 8
+FETCH_LIMIT = int(os.environ.get("ICON_FETCH_LIMIT", "1500"))
+FETCH_ENABLED = os.environ.get("ICON_FETCH", "") == "1"
+
+_APPLE_SIZE_RE = re.compile(r"/\d+x\d+[a-z]*\.(png|jpe?g|webp)$")
+_GOOGLE_SIZE_RE = re.compile(r"=[a-z0-9-]+$")
+
+_MIME = {b"\x89PNG": ("image/png", "png"), b"\xff\xd8\xff": ("image/jpeg", "jpg"),
+         b"RIFF": ("image/webp", "webp"), b"GIF8": ("image/gif", "gif")}
+
+
+def thumbnail_url(url: str) -> str:
+    """artwork 地址 → THUMB_PX 缩略图地址；无法识别的地址原样返回"""
+    if "mzstatic.com" in url and _APPLE_SIZE_RE.search(url):
+        return _APPLE_SIZE_RE.sub(f"/{THUMB_PX}x{THUMB_PX}bb.jpg", url)
+    if "googleusercontent.com" in url:
+        return _GOOGLE_SIZE_RE.sub("", url) + f"=s{THUMB_PX}"
+    return url
+
+
+def _sniff(data: bytes) -> tuple[str, str] | None:
+    for magic, kind in _MIME.items():
+        if data.startswith(magic):
+            return kind
+    return None
+
+
+def _shrink(data: bytes) -> bytes | None:
+    """用 Pillow 缩小到 THUMB_PX（未安装 Pillow 或无法解码时返回 None）"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert("RGB")
+            img.thumbnail((THUMB_PX, THUMB_PX))
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=85)
+            return out.getvalue()
+    except Exception:
+        return None
+
+
+def _object_path(digest: str, ext: str) -> Path:
+    return OBJECT_DIR / digest[:2] / f"{digest}.{ext}"
+
+
+def _download(url: str) -> tuple[bytes, str] | None:
+    """下载一个图标（必要时缩小），返回 (内容, 扩展名)；失败时返回 None"""
+    try:
+        resp = sessions.session().get(thumbnail_url(url), timeout=15)
+        resp.raise_for_status()
+        data = resp.content
+    except Exception:
+        return None
+    if len(data) > MAX_ICON_BYTES:
+        data = _shrink(data)
+    kind = _sniff(data) if data else None
+    return (data, kind[1]) if kind else None
+
+
+def _write(path: Path, data: bytes):
+    """缓存文件直接写盘（不经 reporter.artifacts，不进入 changed_files.txt）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def load_index() -> dict:
+    return codec.load(INDEX_FILE) if INDEX_FILE.exists() else {}
+
+
+def _due(entry: dict | None, today: datetime) -> bool:
+    if entry is None:
+        return True
+    age = (today - datetime.strptime(entry["ts"], "%Y-%m-%d")).days
+    return age >= (ICON_TTL_DAYS if entry.get("sha") else RETRY_DAYS)
+
+
+def _key(app) -> str:
+    return f"{app.get('store') or 'appstore'}|{app.get('app_id', '')}"
+
+
+def update(chart_data, date_str: str) -> dict:
+    """下载 chart_data 中新上榜（或到期）应用的图标，返回 {cached, fetched, failed, deferred}"""
+    today = datetime.strptime(date_str, "%Y-%m-%d")
+    index = load_index()
+    wanted, best_rank = {}, {}
+    for app in chart_data:
+        if app.get("artwork") and app.get("app_id"):
+            key = _key(app)
+            wanted.setdefault(key, app["artwork"])
+            best_rank[key] = min(best_rank.get(key, MISSING_RANK), rank_of(app))
+    due_keys = sorted((key for key in wanted if _due(index.get(key), today)),
+                      key=lambda k: (k in index, best_rank[k]))
+    deferred = max(0, len(due_keys) - FETCH_LIMIT)
+    due = {key: wanted[key] for key in due_keys[:FETCH_LIMIT]}
+
+    fetched = failed = 0
+    if due:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="icons") as pool:
+            for key, result in zip(due, pool.map(_download, due.values())):
+                entry = {"ts": date_str}
+                if result is None:
+                    failed += 1
+                    old = index.get(key)
+                    if old and old.get("sha"):  # 重新下载失败时沿用旧图标
+                        entry.update(sha=old["sha"], ext=old["ext"])
+                else:
+                    fetched += 1
+                    data, ext = result
+                    digest = hashlib.sha256(data).hexdigest()
+                    if not _object_path(digest, ext).exists():
+                        _write(_object_path(digest, ext), data)
+                    entry.update(sha=digest, ext=ext)
+                index[key] = entry
+
+    cutoff = (today - timedelta(days=PRUNE_DAYS)).strftime("%Y-%m-%d")
+    for key in [k for k, e in index.items() if e["ts"] < cutoff]:
+        del index[key]
+    if due:
+        _write(INDEX_FILE, codec.dumps(index, sort_keys=True))
+        _remove_unreferenced(index)
+
+    metrics.count("icons.fetched", fetched)
+    cached = len(wanted) - len(due) - deferred
+    print(f"[Icons] 图标 {len(wanted)} 个：缓存命中 {cached}，新下载 {fetched}，失败 {failed}，"
+          f"留待下次 {deferred}")
+    return {"cached": cached, "fetched": fetched, "failed": failed, "deferred": deferred}
+
+
+def _remove_unreferenced(index: dict):
+    referenced = {f"{e['sha']}.{e['ext']}" for e in index.values() if e.get("sha")}
+    if OBJECT_DIR.exists():
+        for path in OBJECT_DIR.glob("*/*"):
+            if path.name not in referenced:
+                path.unlink()
+
+
+def shard_icons(apps: list, index: dict) -> dict:
+    """
+    一个分片的内联图标：{"size", "icons": [data URI], "rows": [每行在 icons 中的下标，无图标为 -1]}
+    index 为 load_index() 的结果；同一分片内相同的图标只出现一次
+    """
+    uris, positions, rows = [], {}, []
+    for app in apps:
+        entry = index.get(_key(app))
+        if not entry or not entry.get("sha"):
+            rows.append(-1)
+            continue
+        pos = positions.get(entry["sha"])
+        if pos is None:
+            path = _object_path(entry["sha"], entry["ext"])
+            if not path.exists():
+                rows.append(-1)
+                continue
+            data = path.read_bytes()
+            pos = positions[entry["sha"]] = len(uris)
+            uris.append(f"data:{_sniff(data)[0]};base64,{base64.b64encode(data).decode('ascii')}")
+        rows.append(pos)
+    return {"size": THUMB_PX, "icons": uris, "rows": rows}
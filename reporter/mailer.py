@@ -0,0 +1,156 @@
+"""
+批量邮件发送模块
+- 一次运行只建立一个 SMTP 会话（STARTTLS + 登录一次），依次发送多封个性化邮件
+- 支持附件（每日/每周 Excel）
+- 连接断开、4xx 临时错误按指数退避重连重试；5xx、认证失败、收件人全部被拒等永久错误不重试，记录后跳过该封
+- 配置了账号密码且非 465 端口时必须 STARTTLS，服务器未声明则报错而不明文登录；
+  未配置账号（本地替身 offline/smtp_server.py）时 STARTTLS / AUTH 按服务器声明可选
+"""
+
+import mimetypes
+import os
+import smtplib
+import time
+from email.message import EmailMessage
+from pathlib import Path
+
+from pipeline.ratelimit import backoff_delays
+
+# 工作流中未设置的 Secret 会以空字符串传入，空值同样取默认
+EMAIL_SMTP_HOST = os.environ.get("EMAIL_SMTP_HOST") or "smtp.gmail.com"
+EMAIL_SMTP_PORT = int(os.environ.get("EMAIL_SMTP_PORT") or "587")
+EMAIL_USER = os.environ.get("EMAIL_USER", "")
+EMAIL_PASS = os.environ.get("EMAIL_PASS", "")
+EMAIL_FROM = os.environ.get("EMAIL_FROM", "") or EMAIL_USER
+
+MAX_RETRIES = 3
+SMTP_TIMEOUT = 30
+MAX_ATTACHMENT_BYTES = 20 * 1024 * 1024  # 常见邮箱单封上限约 25MB
+
+
+def build_message(to: list[str], subject: str, html_body: str,
+                  attachments: list | None = None, sender: str | None = None) -> EmailMessage:
+    """构造 HTML 邮件，附件按扩展名推断 MIME 类型，超限或不存在的附件跳过"""
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = sender or EMAIL_FROM
+    msg["To"] = ", ".join(to)
+    msg.set_content("请使用支持 HTML 的邮件客户端查看。")
+    msg.add_alternative(html_body, subtype="html", charset="utf-8")
+    for path in attachments or []:
+        path = Path(path)
+        if not path.exists():
+            print(f"[Email] 附件不存在，跳过: {path.name}")
+            continue
+        data = path.read_bytes()
+        if len(data) > MAX_ATTACHMENT_BYTES:
+            print(f"[Email] 附件过大（{len(data) // 1024} KB），跳过: {path.name}")
+            continue
+        ctype, _ = mimetypes.guess_type(path.name)
+        maintype, subtype = (ctype or "application/octet-stream").split("/", 1)
+        msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=path.name)
+    return msg
+
+
+class SMTPSession:
+    """可复用的 SMTP 会话：首次发送时连接，断开后自动重连"""
+
+    def __init__(self, host: str = None, port: int = None, user: str = None, password: str = None):
+        self.host = host or EMAIL_SMTP_HOST
+        self.port = port or EMAIL_SMTP_PORT
+        self.user = EMAIL_USER if user is None else user
+        self.password = EMAIL_PASS if password is None else password
+        self._smtp = None
+
+    def _connect(self):
+        if self.port == 465:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=SMTP_TIMEOUT)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        credentials = bool(self.user and self.password)
+        try:
+            smtp.ehlo()
+            if self.port != 465:
+                if smtp.has_extn("starttls"):
+                    smtp.starttls()
+                    smtp.ehlo()
+                elif credentials:
+                    raise smtplib.SMTPNotSupportedError(f"{self.host} 未声明 STARTTLS，拒绝明文发送登录密码")
+            if credentials and smtp.has_extn("auth"):
+                smtp.login(self.user, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        self._smtp = smtp
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, msg: EmailMessage):
+        """发送一封，临时错误重连重试；永久错误抛出 SMTPException"""
+        delays = backoff_delays(MAX_RETRIES, base=2.0, cap=30.0)
+        while True:
+            try:
+                if self._smtp is None:
+                    self._connect()
+                refused = self._smtp.send_message(msg)
+                if refused:
+                    print(f"[Email] 部分收件人被拒: {', '.join(refused)}")
+                return
+            # SMTPException 是 OSError 的子类，须先区分 SMTP 应答错误，再把其余 OSError 视为网络问题
+            except smtplib.SMTPResponseException as e:
+                if not 400 <= e.smtp_code < 500:
+                    raise  # 5xx、认证失败等永久错误
+                if isinstance(e, smtplib.SMTPConnectError) or e.smtp_code == 421:
+                    self.close()  # 服务器关闭了会话，重连
+                error = e  # 其余 4xx：smtplib 已 RSET，会话可继续使用
+            except smtplib.SMTPServerDisconnected as e:
+                self._smtp = None
+                error = e
+            except smtplib.SMTPException:
+                raise  # 收件人全部被拒、不支持的扩展等，重试无意义
+            except OSError as e:
+                self._smtp = None
+                error = e
+            delay = next(delays, None)
+            if delay is None:
+                raise error
+            print(f"[Email] 临时错误，{delay:.1f}s 后重试: {error}")
+            time.sleep(delay)
+
+
+def send_batch(messages: list[dict]) -> int:
+    """
+    复用同一会话批量发送
+    messages: [{to: [收件人], subject, html, attachments: [路径]}]
+    返回成功发送的封数
+    """
+    messages = [m for m in messages if m.get("to")]
+    if not messages:
+        return 0
+    if not EMAIL_FROM:
+        print("[Email] 未配置发件人（EMAIL_USER / EMAIL_FROM），跳过")
+        return 0
+
+    sent = 0
+    with SMTPSession() as session:
+        for m in messages:
+            msg = build_message(m["to"], m["subject"], m["html"], m.get("attachments"))
+            try:
+                session.send(msg)
+                sent += 1
+                print(f"[Email] 已发送至 {msg['To']}")
+            except (smtplib.SMTPException, OSError) as e:
+                print(f"[Email] 发送失败（{msg['To']}）: {e}")
+    return sent
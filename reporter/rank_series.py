@@ -0,0 +1,119 @@
+"""
+排名时间序列模块
+为仪表盘的趋势小图（sparkline）维护每个 (商店, 地区, 榜单) 下各应用最近 N 天的排名
+- 状态文件 data/history/rank_series.json 保存窗口内所有应用的排名序列（差分编码）
+- 每日运行只把窗口右移并写入当天排名；状态缺失的日期才回读 history/ 下的日 JSON
+- 排名 0 表示当天未上榜
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pipeline import codec
+from reporter import artifacts
+from scrapers.change_detector import load_chart_rows
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+STATE_FILE = DATA_DIR / "history" / "rank_series.json"
+
+SERIES_DAYS = 30
+
+
+def group_key(store: str, region: str, chart_type: str) -> str:
+    return f"{store}_{region}_{chart_type}"
+
+
+def delta_encode(values: list[int]) -> list[int]:
+    """[12, 10, 0, 7] → [12, -2, -10, 7]"""
+    return [values[0]] + [b - a for a, b in zip(values, values[1:])] if values else []
+
+
+def delta_decode(deltas: list[int]) -> list[int]:
+    values, acc = [], 0
+    for d in deltas:
+        acc += d
+        values.append(acc)
+    return values
+
+
+def _day_ranks(chart_data: list[dict]) -> dict[str, dict[str, int]]:
+    """把一天的榜单整理成 {group_key: {app_id: rank}}"""
+    ranks = {}
+    for app in chart_data:
+        key = group_key(app.get("store", "appstore"), app.get("region", ""), app.get("chart_type", ""))
+        ranks.setdefault(key, {})[app["app_id"]] = app["rank"]
+    return ranks
+
+
+def _load_state() -> dict | None:
+    if not STATE_FILE.exists():
+        return None
+    return codec.load(STATE_FILE)
+
+
+def _save_state(end: str, series: dict[str, dict[str, list[int]]]):
+    groups = {
+        key: {app_id: delta_encode(values) for app_id, values in apps.items()}
+        for key, apps in series.items()
+    }
+    raw = codec.dumps({"end": end, "days": SERIES_DAYS, "groups": groups}, sort_keys=True)
+    artifacts.write_bytes(STATE_FILE, raw)
+
+
+def update_rank_series(groups: dict[tuple, list[dict]], date_str: str) -> dict[tuple, list[list[int]]]:
+    """
+    用当天分组后的榜单更新排名序列
+    groups: {(store, region, chart_type): [按排名排序的应用]}
+    返回 {(store, region, chart_type): [每个应用最近 SERIES_DAYS 天的排名]}，顺序与组内应用一致
+    """
+    end = datetime.strptime(date_str, "%Y-%m-%d")
+    window = [(end - timedelta(days=SERIES_DAYS - 1 - i)).strftime("%Y-%m-%d") for i in range(SERIES_DAYS)]
+
+    # 状态中已有的日期直接复用，其余日期从 history 回填
+    state = _load_state()
+    known = {}
+    if state and state.get("days") == SERIES_DAYS:
+        state_end = datetime.strptime(state["end"], "%Y-%m-%d")
+        state_dates = [(state_end - timedelta(days=SERIES_DAYS - 1 - i)).strftime("%Y-%m-%d")
+                       for i in range(SERIES_DAYS)]
+        known = {d: i for i, d in enumerate(state_dates)}
+    old_series = {
+        key: {app_id: delta_decode(values) for app_id, values in apps.items()}
+        for key, apps in (state or {}).get("groups", {}).items()
+    }
+
+    day_ranks = {date_str: _day_ranks([app for apps in groups.values() for app in apps])}
+    for d in window[:-1]:
+        if d not in known:
+            history = load_chart_rows(d)
+            if history:
+                day_ranks[d] = _day_ranks(history)
+
+    # 合并：新窗口内每个位置取 当天数据 / 回填数据 / 旧状态
+    series: dict[str, dict[str, list[int]]] = {}
+    keys = set(old_series) | {k for ranks in day_ranks.values() for k in ranks}
+    for key in keys:
+        app_ids = set(old_series.get(key, {}))
+        for ranks in day_ranks.values():
+            app_ids.update(ranks.get(key, {}))
+        for app_id in app_ids:
+            old = old_series.get(key, {}).get(app_id)
+            values = []
+            for d in window:
+                if d in day_ranks:
+                    values.append(day_ranks[d].get(key, {}).get(app_id, 0))
+                elif d in known and old:
+                    values.append(old[known[d]])
+                else:
+                    values.append(0)
+            if any(values):
+                series.setdefault(key, {})[app_id] = values
+
+    if not state or state["end"] <= date_str:
+        _save_state(date_str, series)
+
+    result = {}
+    for (store, region, chart_type), apps in groups.items():
+        key_series = series.get(group_key(store, region, chart_type), {})
+        result[(store, region, chart_type)] = [key_series.get(app["app_id"], [0] * SERIES_DAYS) for app in apps]
+    return result
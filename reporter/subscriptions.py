@@ -0,0 +1,182 @@
+"""
+订阅推送模块
+各团队按地区 / 商店 / 榜单 / 应用 / 发行商 / 品类 / 异动类型订阅异动，按订阅分别推送摘要
+- 订阅配置来自环境变量 SUBSCRIPTIONS_JSON（JSON 字符串，适合放在 Secrets），
+  或 SUBSCRIPTIONS_FILE 指向的文件（默认仓库根目录 subscriptions.json，不提交），格式见 subscriptions.example.json
+- 企业微信群用 wecom_webhook 直接写 Webhook 地址（订阅配置本身就放在 Secrets 中）；
+  wecom_webhook_env 指向存放地址的环境变量，供本地运行使用
+- 同一字段内多个取值为“或”，不同字段之间为“且”，未填写的字段不限制
+- 编译时把每个订阅挂到其最有区分度的一个字段（锚点）的倒排表上；
+  路由时每条异动只查自身取值对应的候选订阅，再校验完整条件，
+  耗时与命中数成正比，而不是 订阅数 × 异动数
+"""
+
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from pipeline import codec
+from reporter.delivery import deliver
+from reporter.mailer import send_batch
+from reporter.notifier import GITHUB_PAGES_URL, _markdown_to_html, format_change_line
+
+ROOT_DIR = Path(__file__).parent.parent
+SUBSCRIPTIONS_FILE = Path(os.environ.get("SUBSCRIPTIONS_FILE", "") or ROOT_DIR / "subscriptions.json")
+
+DEFAULT_MAX_ITEMS = 30
+
+# 字段 → 异动记录中参与匹配的取值（地区可写代码或中文名，榜单可写 chart_type 或中文名）
+FIELDS = {
+    "app_ids":      ("app_id",),
+    "publishers":   ("artist",),
+    "regions":      ("region", "region_name"),
+    "charts":       ("chart_type", "chart_name"),
+    "stores":       ("store",),
+    "genres":       ("genre",),
+    "change_types": ("change_type",),
+}
+
+# 锚点优先级：越靠前通常命中越少
+ANCHOR_ORDER = ["app_ids", "publishers", "regions", "charts", "stores", "genres", "change_types"]
+
+STORE_ALIASES = {"as": "appstore", "app_store": "appstore", "gp": "google_play", "googleplay": "google_play"}
+
+
+def _norm(value) -> str:
+    return str(value).strip().lower()
+
+
+def _change_values(change: dict, field: str) -> list[str]:
+    return [_norm(change[key]) for key in FIELDS[field] if change.get(key) not in (None, "")]
+
+
+def load_subscriptions() -> list[dict]:
+    """读取订阅配置，未配置时返回空列表"""
+    raw = os.environ.get("SUBSCRIPTIONS_JSON", "")
+    if not raw and SUBSCRIPTIONS_FILE.exists():
+        raw = SUBSCRIPTIONS_FILE.read_text(encoding="utf-8")
+    if not raw.strip():
+        return []
+    try:
+        config = codec.loads(raw)
+    except json.JSONDecodeError as e:
+        print(f"[Subscriptions] 订阅配置解析失败: {e}")
+        return []
+    return config.get("subscribers", []) if isinstance(config, dict) else config
+
+
+def compile_subscriptions(subscribers: list[dict]) -> dict:
+    """
+    把订阅编译成倒排索引
+    返回 {"subscribers": [...], "rules": [{字段: 取值集合}], "index": {字段: {取值: [订阅下标]}}, "wildcard": [订阅下标]}
+    """
+    rules, index, wildcard = [], {field: defaultdict(list) for field in FIELDS}, []
+    for i, sub in enumerate(subscribers):
+        filters = sub.get("filters", {})
+        rule = {}
+        for field in FIELDS:
+            values = filters.get(field)
+            if values in (None, "", []):
+                continue
+            if isinstance(values, (str, int)):
+                values = [values]
+            normed = {_norm(v) for v in values}
+            if field == "stores":
+                normed = {STORE_ALIASES.get(v, v) for v in normed}
+            rule[field] = normed
+        rules.append(rule)
+
+        anchor = next((field for field in ANCHOR_ORDER if field in rule), None)
+        if anchor is None:
+            wildcard.append(i)
+            continue
+        for value in rule[anchor]:
+            index[anchor][value].append(i)
+
+    return {
+        "subscribers": subscribers,
+        "rules": rules,
+        "index": {field: dict(table) for field, table in index.items() if table},
+        "wildcard": wildcard,
+    }
+
+
+def _matches(rule: dict, change: dict) -> bool:
+    for field, allowed in rule.items():
+        if not any(v in allowed for v in _change_values(change, field)):
+            return False
+    return True
+
+
+def route_changes(compiled: dict, changes: list[dict]) -> dict[int, list[dict]]:
+    """把异动分发给命中的订阅，返回 {订阅下标: [异动]}，保持异动原有顺序"""
+    routed = defaultdict(list)
+    rules, index, wildcard = compiled["rules"], compiled["index"], compiled["wildcard"]
+    for change in changes:
+        candidates = set(wildcard)
+        for field, table in index.items():
+            for value in _change_values(change, field):
+                candidates.update(table.get(value, ()))
+        for i in candidates:
+            if _matches(rules[i], change):
+                routed[i].append(change)
+    return dict(routed)
+
+
+def build_digest(subscriber: dict, changes: list[dict], date_str: str) -> str:
+    """订阅摘要 Markdown：按异动幅度取前 max_items 条"""
+    max_items = int(subscriber.get("max_items", DEFAULT_MAX_ITEMS))
+    name = subscriber.get("name", "订阅")
+    lines = [format_change_line(c) for c in changes[:max_items]]
+    more = len(changes) - len(lines)
+    if more > 0:
+        lines.append(f"> …… 另有 {more} 条，完整数据见仪表盘")
+    link_line = f"\n\n[📊 查看完整仪表盘]({GITHUB_PAGES_URL})" if GITHUB_PAGES_URL else ""
+    return (
+        f"## 🔔 榜单订阅 · {name} · {date_str}\n\n"
+        f"**命中异动（共{len(changes)}个）**\n" + "\n".join(lines) + link_line
+    )
+
+
+def send_subscription_digests(changes: list[dict], date_str: str, excel_path=None) -> int:
+    """
+    按订阅推送当日异动摘要，返回推送的订阅数
+    邮件订阅汇总后复用同一 SMTP 会话发送；订阅设置 attach_excel 时附上当日 Excel
+    """
+    subscribers = load_subscriptions()
+    if not subscribers:
+        print("[Subscriptions] 未配置订阅，跳过")
+        return 0
+    compiled = compile_subscriptions(subscribers)
+    routed = route_changes(compiled, changes)
+
+    sent, emails_out = 0, []
+    for i, sub in enumerate(subscribers):
+        matched = routed.get(i, [])
+        name = sub.get("name", f"#{i}")
+        if not matched and not sub.get("notify_empty"):
+            continue
+        digest = build_digest(sub, matched, date_str)
+
+        webhook_env = sub.get("wecom_webhook_env")
+        webhook = sub.get("wecom_webhook") or (os.environ.get(webhook_env, "") if webhook_env else "")
+        if webhook_env and not webhook:
+            print(f"[Subscriptions] {name}: 环境变量 {webhook_env} 未设置，跳过企业微信")
+        if webhook:
+            deliver([digest], [webhook])
+        emails = sub.get("email") or []
+        if isinstance(emails, str):
+            emails = [emails]
+        if emails:
+            emails_out.append({
+                "to": emails,
+                "subject": f"榜单订阅 · {name} · {date_str}",
+                "html": _markdown_to_html(digest),
+                "attachments": [excel_path] if excel_path and sub.get("attach_excel") else None,
+            })
+        if webhook or emails:
+            sent += 1
+        print(f"[Subscriptions] {name}: 命中 {len(matched)} 条异动")
+    send_batch(emails_out)
+    return sent
@@ -0,0 +1,172 @@
+"""
+开发商 / 品类份额聚合（物化）
+每天的日快照保存时（change_detector.save_chart_data）顺带计算当天的聚合，写入 data/aggregates/<date>.json，
+周报 Excel、仪表盘、AI 提示词、查询 API 直接读取，不再扫描历史榜单：
+- 每组 (store, region, chart_type) 内，每个开发商（artist）/ 品类（subgenre）一条 [apps, share, exposure]，
+  另记 names：[地区名, 榜单名]
+  品类取 scrapers/enrichment.py 补充的细分品类：榜单自带的 genre 全是 "Games"，份额恒为 100%，没有信息量；
+  尚未补充的应用品类为空，空值不进入报告、仪表盘和提示词
+  apps：上榜应用数；share：apps / 组内记录数；exposure：按排名加权（权重 1/rank）的曝光占比，组内归一化
+- 历史日期缺聚合文件（或文件的字段与 FIELDS 不一致）时，第一次读取从 history/ 补算一次并落盘
+- 跨组汇总（某地区、某商店或全部）取各组平均，每个榜单权重相同
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pipeline import codec
+from reporter import artifacts
+from scrapers.chart_index import ChartIndex, rank_of
+
+DATA_DIR = Path(__file__).parent.parent / "data" / "aggregates"
+
+FIELDS = ("artist", "subgenre")
+FIELDS_LABEL = {"artist": "开发商", "subgenre": "品类"}
+
+
+def _key_str(key: tuple) -> str:
+    return "|".join(key)
+
+
+def compute_day(chart_data) -> dict:
+    """{group: {"names": [...], field: {取值: [apps, share, exposure]}}}，各取值按 exposure 降序"""
+    index = ChartIndex.of(chart_data)
+    groups = {}
+    for key, apps in index.items():
+        weights = [1 / rank_of(app) for app in apps]
+        total_weight = sum(weights)
+        group = {"names": list(index.names(key))}
+        for field in FIELDS:
+            counts = defaultdict(int)
+            exposure = defaultdict(float)
+            for app, weight in zip(apps, weights):
+                value = app.get(field) or ""
+                counts[value] += 1
+                exposure[value] += weight
+            group[field] = {
+                value: [counts[value], round(counts[value] / len(apps), 4), round(exposure[value] / total_weight, 4)]
+                for value in sorted(counts, key=lambda v: -exposure[v])
+            }
+        groups[_key_str(key)] = group
+    return groups
+
+
+def update_day(chart_data, date_str: str) -> dict:
+    """计算并保存当天的聚合（日快照保存时调用；内容不变时不重写）"""
+    groups = compute_day(chart_data)
+    artifacts.write_bytes(DATA_DIR / f"{date_str}.json",
+                          codec.dumps({"date": date_str, "fields": list(FIELDS), "groups": groups}))
+    return groups
+
+
+def load_day(date_str: str, persist: bool = True) -> dict | None:
+    """
+    当天的聚合；缺文件时从 history/ 补算，当天无榜单时返回 None
+    persist=False 时补算结果只在内存中使用、不落盘（只读查询 API 用）
+    """
+    path = DATA_DIR / f"{date_str}.json"
+    if path.exists():
+        saved = codec.load(path)
+        if saved.get("fields") == list(FIELDS):
+            return saved["groups"]
+    from scrapers.change_detector import load_chart_data
+
+    chart_data = load_chart_data(date_str)
+    if not chart_data:
+        return None
+    return update_day(chart_data, date_str) if persist else compute_day(chart_data)
+
+
+def summarize(groups: dict, field: str, store: str | None = None, region: str | None = None,
+              chart_type: str | None = None) -> list[dict]:
+    """
+    把匹配的组汇总为 [{value, apps, share, exposure}]（各组平均），按 exposure 降序
+    空取值（尚未补充细分品类的应用）不参与排序，调用方取前 N 个时不会被它占位
+    """
+    matched = [g[field] for k, g in groups.items()
+               if _matches(k, store, region, chart_type)]
+    if not matched:
+        return []
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for values in matched:
+        for value, (apps, share, exposure) in values.items():
+            if not value:
+                continue
+            t = totals[value]
+            t[0] += apps
+            t[1] += share
+            t[2] += exposure
+    n = len(matched)
+    rows = [{"value": value, "apps": apps, "share": round(share / n, 4), "exposure": round(exposure / n, 4)}
+            for value, (apps, share, exposure) in totals.items()]
+    rows.sort(key=lambda r: -r["exposure"])
+    return rows
+
+
+def _matches(key: str, store, region, chart_type) -> bool:
+    s, r, c = key.split("|")
+    return (store is None or s == store) and (region is None or r == region) and (chart_type is None or c == chart_type)
+
+
+def _days_before(date_str: str, days: int) -> str:
+    return (datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def share_changes(end: str, days: int, field: str, top: int = 10, **filters) -> list[dict]:
+    """
+    期末 exposure 前 top 的取值及其相对 days 天前的变化
+    [{value, apps, share, exposure, exposure_before, delta}]；期初无数据时 exposure_before 为 None
+    """
+    current = load_day(end)
+    if current is None:
+        return []
+    return _compare(current, load_day(_days_before(end, days)), field, top, **filters)
+
+
+def _compare(current: dict, before: dict | None, field: str, top: int, **filters) -> list[dict]:
+    before_rows = {r["value"]: r for r in summarize(before, field, **filters)} if before else {}
+    rows = []
+    for row in summarize(current, field, **filters)[:top]:
+        prev = before_rows.get(row["value"])
+        exposure_before = prev["exposure"] if prev else (0.0 if before else None)
+        delta = None if exposure_before is None else round(row["exposure"] - exposure_before, 4)
+        rows.append({**row, "exposure_before": exposure_before, "delta": delta})
+    return rows
+
+
+def region_shares(end: str, days: int = 7, top: int = 10) -> list[dict]:
+    """
+    按 (商店, 地区) 汇总各榜单的份额及 days 天变化（周报 Excel、仪表盘用）
+    [{field, store, region, region_name, value, apps, share, exposure, exposure_before, delta}]
+    """
+    groups = load_day(end)
+    if not groups:
+        return []
+    before = load_day(_days_before(end, days))
+    regions = {}
+    for key, group in groups.items():
+        store, region, _ = key.split("|")
+        regions.setdefault((store, region), group["names"][0])
+    rows = []
+    for field in FIELDS:
+        for (store, region), region_name in regions.items():
+            for row in _compare(groups, before, field, top, store=store, region=region):
+                rows.append({"field": field, "store": store, "region": region,
+                             "region_name": region_name, **row})
+    return rows
+
+
+def prompt_text(date_str: str, days: int = 7, top: int = 8) -> str:
+    """供 AI 提示词使用的份额摘要（全部榜单平均的曝光占比及 days 天变化）"""
+    lines = []
+    for field in FIELDS:
+        rows = share_changes(date_str, days, field, top=top)
+        if not rows:
+            continue
+        parts = []
+        for r in rows:
+            change = "" if r["delta"] is None else f"，{days}日 {r['delta'] * 100:+.1f}pp"
+            parts.append(f"{r['value']} {r['exposure'] * 100:.1f}%（{r['apps']} 个上榜位{change}）")
+        lines.append(f"- {FIELDS_LABEL[field]}：" + "；".join(parts))
+    return "\n".join(lines)
@@ -3,11 +3,13 @@ App Store 榜单爬虫
 使用苹果 iTunes RSS API（稳定，官方支持）
 """
 
-import requests
 from datetime import datetime, timezone
 from datetime import timezone as tz
 import time
 
+from pipeline import codec, sessions
+from scrapers.records import ChartRecord
+
 UTC = timezone.utc
 
 # 目标地区配置
@@ -34,19 +36,33 @@ CHART_TYPES = {
 GAME_GENRE_ID = "6014"
 
 
-def fetch_appstore_chart(region: str, chart_type: str, limit: int = 100) -> list[dict]:
+def fetch_appstore_chart(region: str, chart_type: str, limit: int = 100,
+                         validators: dict | None = None) -> list[dict] | None:
     """
     从苹果 iTunes RSS API 拉取榜单
     接口：https://itunes.apple.com/{country}/rss/{chart}/limit={n}/genre=6014/json
+    validators：条件请求用的 {"etag", "last_modified"}（小时级采集用，见 scrapers/intraday.py），
+    请求后就地更新；服务器返回 304（榜单未变化）时返回 None
     """
     url = (
         f"https://itunes.apple.com/{region}/rss/{chart_type}"
         f"/limit={limit}/genre={GAME_GENRE_ID}/json"
     )
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
     try:
-        resp = requests.get(url, timeout=15)
+        resp = sessions.session().get(url, headers=headers, timeout=15)
+        if resp.status_code == 304 and headers:
+            return None
         resp.raise_for_status()
-        data = resp.json()
+        if validators is not None:
+            validators["etag"] = resp.headers.get("ETag", "")
+            validators["last_modified"] = resp.headers.get("Last-Modified", "")
+        data = codec.loads(resp.content)
         entries = data.get("feed", {}).get("entry", [])
 
         apps = []
@@ -57,25 +73,25 @@ def fetch_appstore_chart(region: str, chart_type: str, limit: int = 100) -> list
                 link_field = link_field[0] if link_field else {}
             url = link_field.get("attributes", {}).get("href", "")
 
-            apps.append({
-                "rank": rank,
-                "app_id": entry.get("id", {}).get("attributes", {}).get("im:id", ""),
-                "name": entry.get("im:name", {}).get("label", ""),
-                "artist": entry.get("im:artist", {}).get("label", ""),
-                "genre": entry.get("category", {}).get("attributes", {}).get("label", ""),
-                "genre_id": entry.get("category", {}).get("attributes", {}).get("im:id", ""),
-                "url": url,
-                "artwork": entry.get("im:image", [{}])[-1].get("label", ""),
-                "price": entry.get("im:price", {}).get("label", ""),
-                "release_date": entry.get("im:releaseDate", {}).get("label", ""),
-                "region": region,
-                "region_name": REGIONS.get(region, region),
-                "chart_type": chart_type,
-                "chart_name": CHART_TYPES.get(chart_type, chart_type),
-                "store": "appstore",
-                "fetch_date": datetime.now(UTC).strftime("%Y-%m-%d"),
-                "fetch_ts": datetime.now(UTC).isoformat(),
-            })
+            apps.append(ChartRecord(
+                rank=rank,
+                app_id=entry.get("id", {}).get("attributes", {}).get("im:id", ""),
+                name=entry.get("im:name", {}).get("label", ""),
+                artist=entry.get("im:artist", {}).get("label", ""),
+                genre=entry.get("category", {}).get("attributes", {}).get("label", ""),
+                genre_id=entry.get("category", {}).get("attributes", {}).get("im:id", ""),
+                url=url,
+                artwork=entry.get("im:image", [{}])[-1].get("label", ""),
+                price=entry.get("im:price", {}).get("label", ""),
+                release_date=entry.get("im:releaseDate", {}).get("label", ""),
+                region=region,
+                region_name=REGIONS.get(region, region),
+                chart_type=chart_type,
+                chart_name=CHART_TYPES.get(chart_type, chart_type),
+                store="appstore",
+                fetch_date=datetime.now(UTC).strftime("%Y-%m-%d"),
+                fetch_ts=datetime.now(UTC).isoformat(),
+            ))
         return apps
 
     except Exception as e:
@@ -83,16 +99,27 @@ def fetch_appstore_chart(region: str, chart_type: str, limit: int = 100) -> list
         return []
 
 
-def fetch_all_appstore_charts() -> list[dict]:
-    """拉取所有地区、所有榜单类型"""
-    all_data = []
+def iter_appstore_charts(validators: dict | None = None):
+    """
+    逐个榜单拉取，每拉完一个就产出 ((store, region, chart_type), apps)，供流式异动检测
+    传入 validators（key → 条件请求信息）时发条件请求，榜单未变化的组 apps 为 None
+    """
     for region in REGIONS:
         for chart_type in CHART_TYPES:
+            key = ("appstore", region, chart_type)
             print(f"[AppStore] 正在拉取 {REGIONS[region]} {CHART_TYPES[chart_type]}...")
-            apps = fetch_appstore_chart(region, chart_type)
-            all_data.extend(apps)
-            print(f"  → 获取 {len(apps)} 条")
+            chart_validators = None if validators is None else validators.setdefault(key, {})
+            apps = fetch_appstore_chart(region, chart_type, validators=chart_validators)
+            print("  → 未变化（304）" if apps is None else f"  → 获取 {len(apps)} 条")
+            yield key, apps
             time.sleep(0.5)
+
+
+def fetch_all_appstore_charts() -> list[dict]:
+    """拉取所有地区、所有榜单类型"""
+    all_data = []
+    for _, apps in iter_appstore_charts():
+        all_data.extend(apps)
     return all_data
 
 
@@ -3,120 +3,147 @@
 对比今日和昨日榜单，找出新进榜、上升、下降、退榜的应用
 """
 
-import json
 import os
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from pipeline import codec
+from scrapers.chart_index import ChartIndex, rank_of
+from scrapers.records import ChartSnapshot
+
 DATA_DIR = Path(__file__).parent.parent / "data" / "history"
 
+CACHE_DAYS = 16  # 周报对比 8 天、run_daily 读昨日，留有余量
+
+_cache: OrderedDict | None = None  # 日期 → ((路径, mtime, 大小), ChartSnapshot)；enable_cache 后启用
+_cache_days = CACHE_DAYS
+
+
+def enable_cache(max_days: int = CACHE_DAYS):
+    """
+    缓存最近读取的日快照（连同其上的 ChartIndex），常驻调度（pipeline/scheduler.py）下在任务之间复用
+    以文件的修改时间与大小判断是否失效；调用方不应修改读到的记录
+    """
+    global _cache, _cache_days
+    if _cache is None:
+        _cache = OrderedDict()
+    _cache_days = max_days
 
-def load_chart_data(date_str: str) -> list[dict]:
-    """读取指定日期的榜单数据"""
+
+def load_chart_data(date_str: str) -> ChartSnapshot:
+    """读取指定日期的榜单数据（ChartRecord 列表，可按 dict 使用）；无数据时为空"""
     filepath = DATA_DIR / f"{date_str}.json"
     if not filepath.exists():
-        return []
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return ChartSnapshot(date=date_str)
+    if _cache is None:
+        return ChartSnapshot.from_rows(codec.load(filepath), date_str)
+    stat = filepath.stat()
+    stamp = (str(filepath), stat.st_mtime_ns, stat.st_size)
+    hit = _cache.get(date_str)
+    if hit is not None and hit[0] == stamp:
+        _cache.move_to_end(date_str)
+        return hit[1]
+    snapshot = ChartSnapshot.from_rows(codec.load(filepath), date_str)
+    _cache[date_str] = (stamp, snapshot)
+    _cache.move_to_end(date_str)
+    while len(_cache) > _cache_days:
+        _cache.popitem(last=False)
+    return snapshot
+
+
+def load_chart_rows(date_str: str) -> list[dict]:
+    """读取指定日期的原始 dict 行，不转换为 ChartRecord；只读取少数字段的批量回填用"""
+    filepath = DATA_DIR / f"{date_str}.json"
+    return codec.load(filepath) if filepath.exists() else []
 
 
 def save_chart_data(data: list[dict], date_str: str):
-    """保存榜单数据到 JSON 文件"""
+    """保存榜单数据到 JSON 文件，并同步更新当天的开发商 / 品类份额聚合（scrapers/aggregates.py）"""
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     filepath = DATA_DIR / f"{date_str}.json"
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    codec.dump(data, filepath, indent=2)
     print(f"[Storage] 已保存 {len(data)} 条记录到 {filepath}")
+    from scrapers import aggregates
+    aggregates.update_day(data, date_str)
+
+
+def _change(app, key: tuple, change_type: str, rank_today, rank_yesterday, delta) -> dict:
+    store, region, chart_type = key
+    return {
+        "app_id": app["app_id"],
+        "name": app["name"],
+        "artist": app.get("artist", ""),
+        "genre": app.get("genre", ""),
+        "region": region,
+        "region_name": app.get("region_name", region),
+        "store": store,
+        "chart_type": chart_type,
+        "chart_name": app.get("chart_name", ""),
+        "change_type": change_type,
+        "rank_today": rank_today,
+        "rank_yesterday": rank_yesterday,
+        "rank_delta": delta,
+    }
+
+
+def _group_changes(key: tuple, today_map: dict, yesterday_map: dict) -> list[dict]:
+    """单个 (store, region, chart_type) 组的异动，组内按排名顺序输出（未按幅度排序）"""
+    changes = []
+
+    # 新进榜
+    for app_id, app in today_map.items():
+        if app_id not in yesterday_map:
+            changes.append(_change(app, key, "新进榜", app["rank"], None, None))
+
+    # 退榜
+    for app_id, app in yesterday_map.items():
+        if app_id not in today_map:
+            changes.append(_change(app, key, "退榜", None, app["rank"], None))
+
+    # 排名变化（上升/下降超过5位）
+    for app_id, app in today_map.items():
+        previous = yesterday_map.get(app_id)
+        if previous is None:
+            continue
+        delta = previous["rank"] - app["rank"]  # 正数=上升，负数=下降
+        if abs(delta) >= 5:
+            changes.append(_change(app, key, "上升" if delta > 0 else "下降",
+                                   app["rank"], previous["rank"], delta))
+    return changes
+
+
+def sort_changes(changes: list[dict]) -> list[dict]:
+    """按变化幅度排序（稳定排序，幅度相同时保持分组顺序）"""
+    changes.sort(key=lambda x: abs(x.get("rank_delta") or 0), reverse=True)
+    return changes
 
 
 def detect_changes(today_data: list[dict], yesterday_data: list[dict]) -> list[dict]:
     """
     检测榜单异动
-    返回格式：[{app_id, name, region, store, chart_type, change_type, rank_today, rank_yesterday, rank_delta}]
+    返回格式：[{app_id, name, artist, genre, region, store, chart_type, change_type, rank_today, rank_yesterday, rank_delta}]
+    两天的数据都经 ChartIndex 分组（ChartSnapshot 上的索引会被后续的概要、推送、仪表盘复用）
     """
     changes = []
+    today_index = ChartIndex.of(today_data)
+    yesterday_index = ChartIndex.of(yesterday_data)
 
-    # 按 (store, region, chart_type) 分组处理
-    groups = {}
-    for app in today_data:
-        key = (app.get("store", "appstore"), app["region"], app["chart_type"])
-        groups.setdefault(key, {"today": [], "yesterday": []})
-        groups[key]["today"].append(app)
-
-    for app in yesterday_data:
-        key = (app.get("store", "appstore"), app["region"], app["chart_type"])
-        if key in groups:
-            groups[key]["yesterday"].append(app)
-
-    for (store, region, chart_type), group in groups.items():
-        today_map = {a["app_id"]: a for a in group["today"]}
-        yesterday_map = {a["app_id"]: a for a in group["yesterday"]}
-
-        today_ids = set(today_map.keys())
-        yesterday_ids = set(yesterday_map.keys())
-
-        # 新进榜
-        for app_id in today_ids - yesterday_ids:
-            app = today_map[app_id]
-            changes.append({
-                "app_id": app_id,
-                "name": app["name"],
-                "artist": app.get("artist", ""),
-                "region": region,
-                "region_name": app.get("region_name", region),
-                "store": store,
-                "chart_type": chart_type,
-                "chart_name": app.get("chart_name", ""),
-                "change_type": "新进榜",
-                "rank_today": app["rank"],
-                "rank_yesterday": None,
-                "rank_delta": None,
-            })
-
-        # 退榜
-        for app_id in yesterday_ids - today_ids:
-            app = yesterday_map[app_id]
-            changes.append({
-                "app_id": app_id,
-                "name": app["name"],
-                "artist": app.get("artist", ""),
-                "region": region,
-                "region_name": app.get("region_name", region),
-                "store": store,
-                "chart_type": chart_type,
-                "chart_name": app.get("chart_name", ""),
-                "change_type": "退榜",
-                "rank_today": None,
-                "rank_yesterday": app["rank"],
-                "rank_delta": None,
-            })
-
-        # 排名变化（上升/下降超过5位）
-        for app_id in today_ids & yesterday_ids:
-            today_rank = today_map[app_id]["rank"]
-            yesterday_rank = yesterday_map[app_id]["rank"]
-            delta = yesterday_rank - today_rank  # 正数=上升，负数=下降
-
-            if abs(delta) >= 5:
-                app = today_map[app_id]
-                changes.append({
-                    "app_id": app_id,
-                    "name": app["name"],
-                    "artist": app.get("artist", ""),
-                    "region": region,
-                    "region_name": app.get("region_name", region),
-                    "store": store,
-                    "chart_type": chart_type,
-                    "chart_name": app.get("chart_name", ""),
-                    "change_type": "上升" if delta > 0 else "下降",
-                    "rank_today": today_rank,
-                    "rank_yesterday": yesterday_rank,
-                    "rank_delta": delta,
-                })
-
-    # 按变化幅度排序
-    changes.sort(key=lambda x: abs(x.get("rank_delta") or 0), reverse=True)
-    return changes
+    # 按 (store, region, chart_type) 分组处理，组内按排名顺序输出
+    for key in today_index.keys():
+        changes.extend(_group_changes(key, today_index.rank_map(key), yesterday_index.rank_map(key)))
+    return sort_changes(changes)
+
+
+def detect_group_changes(key: tuple, apps: list[dict], yesterday_data) -> list[dict]:
+    """
+    单组异动（流式检测用，见 pipeline/streaming.py）：apps 为今日该组的全部记录
+    yesterday_data 可为昨日榜单或其 ChartIndex，只取同组数据；结果未按幅度排序
+    """
+    today_map = {}
+    for app in sorted(apps, key=rank_of):
+        today_map.setdefault(app["app_id"], app)
+    return _group_changes(key, today_map, ChartIndex.of(yesterday_data).rank_map(key))
 
 
 def get_top_movers(changes: list[dict], top_n: int = 20) -> list[dict]:
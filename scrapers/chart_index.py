@@ -0,0 +1,111 @@
+"""
+榜单分组索引
+一天的榜单按 (store, region, chart_type) 分组、组内按排名排序，只构建一次，供
+异动检测、榜单概要、企业微信推送、仪表盘分片、周报 Top10 等共用，不再各自全量扫描、重复排序
+- ChartIndex.of(chart_data)：ChartSnapshot 上缓存索引（快照构建后不应再增删记录）；普通列表每次新建
+- group(key)：组内按排名排序的列表；top(key, n)：前 n 条；up_to_rank(key, r)：排名 ≤ r 的前缀
+- rank_map(key)：app_id → 记录（按需构建并缓存）
+- names(key)：该组的 (地区名, 榜单名)
+"""
+
+from bisect import bisect_right
+
+from scrapers.records import ChartSnapshot
+
+STORE_ORDER = {"appstore": 0, "google_play": 1}
+CHART_ORDER = {"免费游戏榜": 0, "付费游戏榜": 1, "畅销榜": 2}
+MISSING_RANK = 999
+
+
+def rank_of(app) -> int:
+    return app.get("rank") or MISSING_RANK
+
+
+def group_key(app) -> tuple[str, str, str]:
+    return app.get("store") or "appstore", app.get("region", ""), app.get("chart_type", "")
+
+
+class ChartIndex:
+    """(store, region, chart_type) → 按排名排序的记录列表；键保持数据中首次出现的顺序"""
+
+    __slots__ = ("groups", "size", "_rank_maps", "_ranks")
+
+    def __init__(self, chart_data):
+        groups: dict[tuple, list] = {}
+        size = 0
+        for app in chart_data:
+            key = group_key(app)
+            apps = groups.get(key)
+            if apps is None:
+                apps = groups[key] = []
+            apps.append(app)
+            size += 1
+        for apps in groups.values():
+            apps.sort(key=rank_of)  # 各数据源本就按排名输出，timsort 对已排序输入为线性
+        self.groups = groups
+        self.size = size
+        self._rank_maps: dict[tuple, dict] = {}
+        self._ranks: dict[tuple, list[int]] = {}
+
+    @classmethod
+    def of(cls, chart_data) -> "ChartIndex":
+        """取（或构建并缓存）chart_data 的索引"""
+        if isinstance(chart_data, ChartIndex):
+            return chart_data
+        if isinstance(chart_data, ChartSnapshot):
+            index = chart_data.index
+            if index is None or index.size != len(chart_data):
+                index = chart_data.index = cls(chart_data)
+            return index
+        return cls(chart_data)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __contains__(self, key):
+        return key in self.groups
+
+    def keys(self):
+        return self.groups.keys()
+
+    def items(self):
+        return self.groups.items()
+
+    def sorted_keys(self) -> list[tuple]:
+        """按 商店 → 榜单类型 → 地区名 排序的键（概要文本的输出顺序）"""
+        def order(key):
+            region_name, chart_name = self.names(key)
+            return STORE_ORDER.get(key[0], 9), CHART_ORDER.get(chart_name, 9), region_name
+        return sorted(self.groups, key=order)
+
+    def group(self, key) -> list:
+        return self.groups.get(key, [])
+
+    def top(self, key, n: int) -> list:
+        return self.groups.get(key, [])[:n]
+
+    def up_to_rank(self, key, max_rank: int) -> list:
+        apps = self.groups.get(key)
+        if not apps:
+            return []
+        ranks = self._ranks.get(key)
+        if ranks is None:
+            ranks = self._ranks[key] = [rank_of(a) for a in apps]
+        return apps[:bisect_right(ranks, max_rank)]
+
+    def rank_map(self, key) -> dict:
+        """app_id → 记录；同一组内重复的 app_id 以排名靠前者为准"""
+        mapping = self._rank_maps.get(key)
+        if mapping is None:
+            mapping = {}
+            for app in self.groups.get(key, ()):
+                mapping.setdefault(app["app_id"], app)
+            self._rank_maps[key] = mapping
+        return mapping
+
+    def names(self, key) -> tuple[str, str]:
+        apps = self.groups.get(key)
+        if not apps:
+            return key[1], key[2]
+        first = apps[0]
+        return first.get("region_name", key[1]), first.get("chart_name", key[2])
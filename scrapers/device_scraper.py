@@ -4,10 +4,13 @@
 - 输出 data/device.json（供仪表盘读取）
 """
 
-import json
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 
+sys.path.insert(0, str(Path(__file__).parent.parent))  # 作为脚本运行时导入 pipeline
+from pipeline import codec
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 STATIC_FILE = DATA_DIR / "device_static.json"
 OUTPUT_FILE = DATA_DIR / "device.json"
@@ -20,7 +23,7 @@ REGION_NAMES = {
 
 def build_device_data() -> dict:
     """从静态 JSON 构建设备数据"""
-    static = json.loads(STATIC_FILE.read_text(encoding="utf-8"))
+    static = codec.load(STATIC_FILE)
     regions_out = []
     for region_code, region_name in REGION_NAMES.items():
         s = static.get(region_code, {})
@@ -39,11 +42,14 @@ def build_device_data() -> dict:
     }
 
 
-if __name__ == "__main__":
+def main():
+    """写出 data/device.json"""
     print("[Device Scraper] 开始处理设备数据...")
     data = build_device_data()
     DATA_DIR.mkdir(exist_ok=True)
-    OUTPUT_FILE.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    codec.dump(data, OUTPUT_FILE, indent=2)
     print(f"[Device Scraper] 已写出 {OUTPUT_FILE}（{len(data['regions'])} 个地区）")
+
+
+if __name__ == "__main__":
+    main()
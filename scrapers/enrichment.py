@@ -0,0 +1,226 @@
+"""
+应用元数据补充
+榜单接口只给出名称、开发商、品类等基础字段，这里为每个上榜应用补充：
+上架日期 release_date、评分数 ratings、评分 score、安装包大小 size_bytes、内容分级 content_rating、最近更新 updated、
+细分品类 subgenre（榜单自带的 genre 只是 "Games" / "GAME"；两家商店的游戏子类统一为 SUBGENRES 中的英文名，可跨商店汇总）
+- App Store：iTunes lookup 接口一次查询 LOOKUP_BATCH 个 id（按应用所在地区分批），
+  最多 LOOKUP_WORKERS 个批次并发，经 RateLimiter 控制在 LOOKUP_RATE 次/分钟以内
+- Google Play：googleplay_scraper.js --details 逐个拉取应用详情（Node 内部限制并发），与 App Store 查询同时进行
+- 结果按 (store, app_id) 缓存在 data/enrichment/apps.json，超过 TTL_DAYS 天才重新查询；
+  查不到的应用同样缓存空结果，不会每天重复查询
+每天只查询新上榜或缓存过期的应用，请求量随榜单变动而不是榜单规模增长；
+榜单自带的字段不会被覆盖，只填补缺失字段
+"""
+
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pipeline import codec, metrics, sessions
+from pipeline.ratelimit import RateLimiter
+from reporter import artifacts
+
+UTC = timezone.utc
+
+DATA_DIR = Path(__file__).parent.parent / "data" / "enrichment"
+CACHE_FILE = DATA_DIR / "apps.json"
+
+TTL_DAYS = int(os.environ.get("ENRICH_TTL_DAYS", "7"))
+PRUNE_DAYS = 90  # 超过该天数未再查询（即已不在榜）的缓存条目删除
+
+LOOKUP_URL = "https://itunes.apple.com/lookup"
+LOOKUP_BATCH = 100
+LOOKUP_WORKERS = 4
+LOOKUP_RATE = int(os.environ.get("ENRICH_LOOKUP_RATE", "20"))  # 每分钟请求数（iTunes Search API 公开限额约 20 次/分钟）
+
+DETAILS_TIMEOUT = 600
+
+JS_SCRIPT = Path(__file__).parent / "googleplay_scraper.js"
+
+# App Store 游戏子类 id → 细分品类；Google Play 的 GAME_ROLE_PLAYING 等按同一套名称转换
+SUBGENRES = {
+    "7001": "Action", "7002": "Adventure", "7003": "Arcade", "7004": "Board", "7005": "Card",
+    "7006": "Casino", "7007": "Dice", "7008": "Educational", "7009": "Family", "7011": "Music",
+    "7012": "Puzzle", "7013": "Racing", "7014": "Role Playing", "7015": "Simulation", "7016": "Sports",
+    "7017": "Strategy", "7018": "Trivia", "7019": "Word",
+}
+
+_limiter = RateLimiter(LOOKUP_RATE, 60)
+
+
+def _cache_key(store: str, app_id: str) -> str:
+    return f"{store}|{app_id}"
+
+
+def _load_cache() -> dict:
+    return codec.load(CACHE_FILE) if CACHE_FILE.exists() else {}
+
+
+def _stale(entry: dict | None, today: str) -> bool:
+    if entry is None:
+        return True
+    age = datetime.strptime(today, "%Y-%m-%d") - datetime.strptime(entry["ts"], "%Y-%m-%d")
+    return age.days >= TTL_DAYS
+
+
+def _appstore_subgenre(result: dict) -> str:
+    """lookup 结果的 genreIds 中第一个游戏子类（主品类 6014 Games 之外）"""
+    for genre_id in result.get("genreIds") or []:
+        if genre_id in SUBGENRES:
+            return SUBGENRES[genre_id]
+    return ""
+
+
+def _googleplay_subgenre(genre_id: str) -> str:
+    """GAME_ROLE_PLAYING → Role Playing；非游戏子类为空"""
+    if not (genre_id or "").startswith("GAME_"):
+        return ""
+    return genre_id[len("GAME_"):].replace("_", " ").title()
+
+
+def _appstore_meta(result: dict) -> dict:
+    meta = {
+        "release_date": result.get("releaseDate", ""),
+        "ratings": result.get("userRatingCount"),
+        "score": round(result["averageUserRating"], 2) if result.get("averageUserRating") is not None else None,
+        "size_bytes": int(result["fileSizeBytes"]) if result.get("fileSizeBytes") else None,
+        "content_rating": result.get("trackContentRating") or result.get("contentAdvisoryRating", ""),
+        "updated": result.get("currentVersionReleaseDate", ""),
+        "subgenre": _appstore_subgenre(result),
+    }
+    return {k: v for k, v in meta.items() if v not in (None, "")}
+
+
+def _parse_size(size: str) -> int | None:
+    """Google Play 的 "45M" / "1.2G" → 字节数；"Varies with device" 等无法解析时为 None"""
+    units = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    size = (size or "").strip().lower()
+    if size[-1:] in units:
+        try:
+            return int(float(size[:-1].replace(",", "")) * units[size[-1]])
+        except ValueError:
+            return None
+    return None
+
+
+def _googleplay_meta(result: dict) -> dict:
+    meta = {
+        "release_date": result.get("release_date", ""),
+        "ratings": result.get("ratings"),
+        "score": round(result["score"], 2) if result.get("score") is not None else None,
+        "size_bytes": _parse_size(result.get("size", "")),
+        "content_rating": result.get("content_rating", ""),
+        "updated": result.get("updated", ""),
+        "subgenre": _googleplay_subgenre(result.get("genre_id", "")),
+    }
+    return {k: v for k, v in meta.items() if v not in (None, "")}
+
+
+def lookup_appstore(region: str, app_ids: list[str]) -> dict[str, dict] | None:
+    """一次 lookup 查询一批 id，返回 {app_id: 元数据}（未找到的 id 为空字典）；请求失败时返回 None"""
+    _limiter.acquire()
+    try:
+        resp = sessions.session().get(
+            LOOKUP_URL, params={"id": ",".join(app_ids), "country": region, "entity": "software"}, timeout=30)
+        resp.raise_for_status()
+        results = codec.loads(resp.content).get("results", [])
+    except Exception as e:
+        print(f"[Enrich] App Store lookup 失败 region={region}（{len(app_ids)} 个）: {e}")
+        return None
+    metrics.count("enrich.appstore_requests")
+    found = {str(r.get("trackId")): _appstore_meta(r) for r in results}
+    return {app_id: found.get(app_id, {}) for app_id in app_ids}
+
+
+def fetch_googleplay_details(items: list[dict]) -> dict[str, dict]:
+    """items 为 [{app_id, region}]；返回 {app_id: 元数据}，拉取失败（非下架）的应用不在结果中"""
+    try:
+        result = subprocess.run(
+            ["node", str(JS_SCRIPT), "--details"],
+            input=codec.dumps_text(items),
+            capture_output=True, text=True, timeout=DETAILS_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[Enrich] Google Play 详情调用失败: {e}")
+        return {}
+    if result.stderr:
+        print(result.stderr, end="")
+    details = {}
+    for line in result.stdout.splitlines():
+        if line.strip():
+            row = codec.loads(line)
+            details[row["app_id"]] = _googleplay_meta(row)
+    return details
+
+
+def _batches(pending: dict[str, str]):
+    """{app_id: region} → 按地区分组、每批最多 LOOKUP_BATCH 个的 (region, [app_id])"""
+    by_region: dict[str, list] = {}
+    for app_id, region in pending.items():
+        by_region.setdefault(region, []).append(app_id)
+    for region, ids in by_region.items():
+        for i in range(0, len(ids), LOOKUP_BATCH):
+            yield region, ids[i:i + LOOKUP_BATCH]
+
+
+def enrich(chart_data, today: str | None = None) -> dict:
+    """
+    为 chart_data 中的记录就地补充元数据，返回 {cached, fetched, failed}（按应用数）
+    同一应用在多个地区上榜时只查询一次（取首次出现的地区）
+    """
+    today = today or datetime.now(UTC).strftime("%Y-%m-%d")
+    cache = _load_cache()
+
+    wanted: dict[str, dict[str, str]] = {"appstore": {}, "google_play": {}}
+    for app in chart_data:
+        store = app.get("store") or "appstore"
+        if store in wanted and app.get("app_id"):
+            wanted[store].setdefault(app["app_id"], app.get("region", "us"))
+    pending = {store: {app_id: region for app_id, region in apps.items()
+                       if _stale(cache.get(_cache_key(store, app_id)), today)}
+               for store, apps in wanted.items()}
+
+    # Google Play 经 Node 子进程拉取（离线回放模式下没有 Node 数据源，跳过）
+    play_items = [{"app_id": app_id, "region": region} for app_id, region in pending["google_play"].items()]
+    if os.environ.get("GOOGLEPLAY_CHARTS_URL"):
+        play_items = []
+
+    fetched: dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=LOOKUP_WORKERS + 1, thread_name_prefix="enrich") as pool:
+        play = pool.submit(fetch_googleplay_details, play_items) if play_items else None
+        lookups = [pool.submit(lookup_appstore, region, ids) for region, ids in _batches(pending["appstore"])]
+        for future in lookups:
+            for app_id, meta in (future.result() or {}).items():
+                fetched[_cache_key("appstore", app_id)] = meta
+        if play is not None:
+            for app_id, meta in play.result().items():
+                fetched[_cache_key("google_play", app_id)] = meta
+
+    for key, meta in fetched.items():
+        cache[key] = {"ts": today, "meta": meta}
+    cutoff = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=PRUNE_DAYS)).strftime("%Y-%m-%d")
+    for key in [k for k, e in cache.items() if e["ts"] < cutoff]:
+        del cache[key]
+    if fetched:
+        artifacts.write_bytes(CACHE_FILE, codec.dumps(cache))
+
+    filled = 0
+    for app in chart_data:
+        entry = cache.get(_cache_key(app.get("store") or "appstore", app.get("app_id", "")))
+        if not entry:
+            continue
+        for field, value in entry["meta"].items():
+            if app.get(field) in (None, ""):
+                app[field] = value
+                filled += 1
+
+    total = sum(len(w) for w in wanted.values())
+    requested = len(pending["appstore"]) + len(play_items)
+    stats = {"cached": total - sum(len(p) for p in pending.values()),
+             "fetched": len(fetched), "failed": requested - len(fetched)}
+    metrics.count("enrich.fetched", len(fetched))
+    print(f"[Enrich] 应用 {total} 个：缓存命中 {stats['cached']}，新查询 {stats['fetched']}，"
+          f"失败 {stats['failed']}，补充字段 {filled} 个")
+    return stats
@@ -2,6 +2,11 @@
  * Google Play 榜单爬虫（Node.js）
  * 使用 google-play-scraper 包，输出 JSON 到 stdout
  * 由 Python 主程序调用：node scrapers/googleplay_scraper.js > /tmp/gplay_data.json
+ * --ndjson：每拉完一个榜单立即输出一行 JSON（该榜单的记录数组），供流式异动检测边拉边算
+ * --worker：常驻进程（pipeline/scheduler.py 使用），从 stdin 每读到一行 fetch 就按 --ndjson 格式
+ *           拉取一轮，结束时输出一行 null；进程与已加载的依赖在多次采集间复用
+ * --details：从 stdin 读取 [{app_id, region}] 数组，逐个拉取应用详情（最多 DETAILS_CONCURRENCY 个并发），
+ *            每完成一个输出一行 JSON；供 scrapers/enrichment.py 补充上架日期、评分数、内容分级、细分品类等
  */
 
 const gplay = require('google-play-scraper').default;
@@ -25,7 +30,7 @@ const CHARTS = [
   { collection: 'GROSSING',  name: '畅销榜' },
 ];
 
-const today = new Date().toISOString().slice(0, 10);
+const utcDate = () => new Date().toISOString().slice(0, 10);
 
 // 延迟函数
 const sleep = ms => new Promise(r => setTimeout(r, ms));
@@ -60,7 +65,7 @@ async function fetchChart(regionCode, chartCfg) {
       chart_type: chartCfg.collection,
       chart_name: chartCfg.name,
       store: 'google_play',
-      fetch_date: today,
+      fetch_date: utcDate(),
       fetch_ts: new Date().toISOString(),
     }));
   } catch (e) {
@@ -69,22 +74,89 @@ async function fetchChart(regionCode, chartCfg) {
   }
 }
 
-async function main() {
+async function fetchAll(ndjson) {
   const allData = [];
 
   for (const regionCode of Object.keys(REGIONS)) {
     for (const chartCfg of CHARTS) {
       process.stderr.write(`[GooglePlay] 拉取 ${REGIONS[regionCode].name} ${chartCfg.name}...\n`);
       const apps = await fetchChart(regionCode, chartCfg);
-      allData.push(...apps);
+      if (ndjson) {
+        process.stdout.write(JSON.stringify(apps) + '\n');
+      } else {
+        allData.push(...apps);
+      }
       process.stderr.write(`  → 获取 ${apps.length} 条\n`);
       await sleep(1500); // 避免请求过快
     }
   }
 
-  process.stderr.write(`\n[GooglePlay] 总计 ${allData.length} 条\n`);
-  // 结果输出到 stdout，Python 读取
-  process.stdout.write(JSON.stringify(allData));
+  if (!ndjson) {
+    process.stderr.write(`\n[GooglePlay] 总计 ${allData.length} 条\n`);
+    // 结果输出到 stdout，Python 读取
+    process.stdout.write(JSON.stringify(allData));
+  }
 }
 
-main();
+const DETAILS_CONCURRENCY = parseInt(process.env.DETAILS_CONCURRENCY || '4', 10);
+const DETAILS_DELAY_MS = parseInt(process.env.DETAILS_DELAY_MS || '500', 10);
+
+const isoDate = value => {
+  if (!value) return '';
+  const d = new Date(value);
+  return isNaN(d) ? '' : d.toISOString().slice(0, 10);
+};
+
+async function fetchDetails(item) {
+  const region = REGIONS[item.region] || REGIONS.us;
+  try {
+    const app = await gplay.app({ appId: item.app_id, country: region.country, lang: 'en' });
+    return {
+      app_id: item.app_id,
+      release_date: isoDate(app.released),
+      ratings: app.ratings,
+      score: app.score,
+      size: app.size || '',
+      content_rating: app.contentRating || '',
+      updated: isoDate(app.updated),
+      genre_id: app.genreId || '',
+    };
+  } catch (e) {
+    process.stderr.write(`[GooglePlay] 详情失败 ${item.app_id}: ${e.message}\n`);
+    // 下架 / 地区不可用（404）记为空结果，由调用方按有效期缓存；其他错误不输出，下次重试
+    return e.status === 404 ? { app_id: item.app_id } : null;
+  }
+}
+
+async function details() {
+  let input = '';
+  for await (const chunk of process.stdin) input += chunk;
+  const items = JSON.parse(input || '[]');
+  let next = 0;
+  const run = async () => {
+    while (next < items.length) {
+      const result = await fetchDetails(items[next++]);
+      if (result) process.stdout.write(JSON.stringify(result) + '\n');
+      await sleep(DETAILS_DELAY_MS);
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(DETAILS_CONCURRENCY, items.length) }, run));
+  process.stderr.write(`[GooglePlay] 详情 ${items.length} 个\n`);
+}
+
+function worker() {
+  const rl = require('readline').createInterface({ input: process.stdin });
+  let queue = Promise.resolve();
+  rl.on('line', line => {
+    if (line.trim() !== 'fetch') return;
+    queue = queue.then(() => fetchAll(true)).then(() => process.stdout.write('null\n'));
+  });
+}
+
+if (process.argv.includes('--worker')) {
+  worker();
+} else if (process.argv.includes('--details')) {
+  details();
+} else {
+  fetchAll(process.argv.includes('--ndjson'));
+}
@@ -1,24 +1,50 @@
 """
 Google Play 榜单爬虫
 调用 scrapers/googleplay_scraper.js（Node.js）获取数据
+设置 GOOGLEPLAY_CHARTS_URL 时改为从该地址读取同格式的 JSON（离线回放，见 offline/replay.py）
+iter_googleplay_charts() 以 --ndjson 运行脚本，每拉完一个榜单即产出一组，供流式异动检测
 """
 
-import json
+import os
 import subprocess
+import threading
 from pathlib import Path
 
 
+from pipeline import codec, metrics, sessions
+from scrapers.chart_index import ChartIndex
+from scrapers.records import ChartSnapshot
+
+
 JS_SCRIPT = Path(__file__).parent / "googleplay_scraper.js"
+TIMEOUT = 300  # 最多等5分钟
+
+_worker: subprocess.Popen | None = None
+
+
+def _fetch_from_url(url: str) -> list[dict]:
+    try:
+        resp = sessions.session().get(url, timeout=60)
+        resp.raise_for_status()
+        return ChartSnapshot.from_rows(codec.loads(resp.content))
+    except Exception as e:
+        print(f"[GooglePlay] 读取 {url} 失败: {e}")
+        return []
 
 
 def fetch_all_googleplay_charts() -> list[dict]:
     """调用 Node.js 脚本拉取所有地区 Google Play 榜单"""
+    charts_url = os.environ.get("GOOGLEPLAY_CHARTS_URL", "")
+    if charts_url:
+        return _fetch_from_url(charts_url)
+    if _worker is not None and _worker.poll() is None:
+        return ChartSnapshot([app for _, apps in iter_googleplay_charts() for app in apps])
     try:
         result = subprocess.run(
             ["node", str(JS_SCRIPT)],
             capture_output=True,
             text=True,
-            timeout=300,  # 最多等5分钟
+            timeout=TIMEOUT,
         )
         # stderr 是进度日志，打印出来
         if result.stderr:
@@ -28,7 +54,11 @@ def fetch_all_googleplay_charts() -> list[dict]:
             print(f"[GooglePlay] Node.js 脚本异常退出 code={result.returncode}")
             return []
 
-        data = json.loads(result.stdout)
+        metrics.count("googleplay.stdout_bytes", len(result.stdout.encode("utf-8")))
+        data = ChartSnapshot.from_rows(codec.loads(result.stdout))
+        if os.environ.get("OFFLINE_MODE") == "record":
+            from offline import replay
+            replay.record_googleplay(result.stdout)
         return data
 
     except subprocess.TimeoutExpired:
@@ -39,6 +69,100 @@ def fetch_all_googleplay_charts() -> list[dict]:
         return []
 
 
+def start_worker():
+    """启动常驻 Node 进程（--worker），之后的 iter_googleplay_charts 复用它，省去每次启动 Node、加载依赖"""
+    global _worker
+    if _worker is None or _worker.poll() is not None:
+        _worker = subprocess.Popen(["node", str(JS_SCRIPT), "--worker"], stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, text=True, encoding="utf-8")
+        print(f"[GooglePlay] 常驻 Node 进程已启动 pid={_worker.pid}")
+    return _worker
+
+
+def stop_worker():
+    global _worker
+    if _worker is None:
+        return
+    worker, _worker = _worker, None
+    if worker.poll() is None:
+        worker.stdin.close()
+        try:
+            worker.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+            worker.wait()
+
+
+def iter_googleplay_charts():
+    """
+    逐个榜单产出 ((store, region, chart_type), apps)：Node 脚本每输出一行（一个榜单）就交给调用方，
+    不必等全部地区拉完；stderr 进度日志直接透传到控制台
+    GOOGLEPLAY_CHARTS_URL 模式下整体读取后按组产出；已 start_worker() 时复用常驻进程
+    """
+    charts_url = os.environ.get("GOOGLEPLAY_CHARTS_URL", "")
+    if charts_url:
+        yield from ChartIndex(_fetch_from_url(charts_url)).items()
+        return
+    recording = os.environ.get("OFFLINE_MODE") == "record"
+    recorded = []
+    worker = _worker if _worker is not None and _worker.poll() is None else None
+    try:
+        if worker is not None:
+            proc = worker
+            proc.stdin.write("fetch\n")
+            proc.stdin.flush()
+        else:
+            proc = subprocess.Popen(["node", str(JS_SCRIPT), "--ndjson"],
+                                    stdout=subprocess.PIPE, text=True, encoding="utf-8")
+    except Exception as e:
+        print(f"[GooglePlay] 调用失败: {e}")
+        return
+    timed_out = threading.Event()
+    finished = False
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(TIMEOUT, kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            if not line.strip():
+                continue
+            if worker is not None and line.strip() == "null":
+                break  # 常驻进程本轮结束
+            metrics.count("googleplay.stdout_bytes", len(line.encode("utf-8")))
+            try:
+                rows = codec.loads(line)
+            except ValueError as e:
+                print(f"[GooglePlay] 输出解析失败，跳过该榜单: {e}")
+                continue
+            if recording:
+                recorded.extend(rows)
+            yield from ChartIndex(ChartSnapshot.from_rows(rows)).items()
+        else:
+            proc.wait()
+        finished = True
+    finally:
+        timer.cancel()
+        if worker is not None:
+            if not finished:
+                stop_worker()  # 中途退出：本轮剩余输出会错位到下一轮，直接重启
+        elif proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if timed_out.is_set():
+        print("[GooglePlay] 超时，跳过剩余榜单")
+    elif worker is None and proc.returncode != 0:
+        print(f"[GooglePlay] Node.js 脚本异常退出 code={proc.returncode}")
+    elif worker is not None and proc.poll() is not None:
+        print(f"[GooglePlay] 常驻 Node 进程已退出 code={proc.returncode}，下次采集时重新启动")
+    elif recording:
+        from offline import replay
+        replay.record_googleplay(codec.dumps_text(recorded))
+
+
 if __name__ == "__main__":
     data = fetch_all_googleplay_charts()
     print(f"\n总计获取 {len(data)} 条记录")
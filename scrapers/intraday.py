@@ -0,0 +1,213 @@
+"""
+小时级榜单快照（intraday）
+每日 UTC 00:00 采样一次会漏掉推荐位、集中买量带来的日内冲榜，intraday 模式每小时采集一次，
+为控制 24 倍采样下的存储与请求量：
+- 每组 (store, region, chart_type) 的排名向量（按排名排列的 app_id）做哈希，与上次采集相同的组不落盘
+- App Store 请求带 If-None-Match / If-Modified-Since，304 的组不下载、不解析，直接视为未变化
+- Google Play 需整体跑 Node 脚本，每 INTRADAY_GOOGLEPLAY_EVERY 小时采集一次（默认 3）
+存储（data/intraday/）：
+- state.json：各组上次采集的哈希、精简记录 [rank, app_id, name, artist] 与 HTTP 校验信息
+- <date>/HH.json：本小时排名有变化的组的精简记录；每天第一次采集写入全部组作为当日基线
+- <date>/deltas.jsonl：每次采集一行，只记录变化组内排名变动的 [app_id, 上次排名, 本次排名]（0 = 不在榜）
+汇总（rollup）：日终把当天各小时快照汇总为每个应用的 最好/最差排名、在榜小时数，写入 <date>/rollup.json，
+并给 history/<date>.json 中对应记录加上 rank_best / rank_worst / intraday_hours；之后删除小时快照，
+只保留 deltas.jsonl 与 rollup.json（超过 KEEP_DAYS 天的整目录删除）
+
+    python -m pipeline intraday                      # 采集一次（每小时由定时任务调用）
+    python -m pipeline intraday --rollup 2026-03-01  # 汇总某天（run_daily 会自动汇总前一天）
+"""
+
+import hashlib
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pipeline import codec
+from reporter import artifacts
+from scrapers.change_detector import load_chart_rows, save_chart_data, DATA_DIR as HISTORY_DIR
+
+UTC = timezone.utc
+
+DATA_DIR = Path(__file__).parent.parent / "data" / "intraday"
+STATE_FILE = DATA_DIR / "state.json"
+
+KEEP_DAYS = 14
+GOOGLEPLAY_EVERY = int(os.environ.get("INTRADAY_GOOGLEPLAY_EVERY", "3"))
+
+
+def _key_str(key: tuple) -> str:
+    return "|".join(key)
+
+
+def _entries(apps: list) -> list[list]:
+    """精简记录，按排名排序"""
+    return [[app["rank"], app["app_id"], app.get("name", ""), app.get("artist", "")]
+            for app in sorted(apps, key=lambda a: a["rank"])]
+
+
+def rank_hash(entries: list[list]) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    for rank, app_id, *_ in entries:
+        h.update(f"{rank}:{app_id}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _rank_moves(previous: list[list], current: list[list]) -> list[list]:
+    """[app_id, 上次排名, 本次排名]，只含排名有变化（含进出榜）的应用"""
+    before = {app_id: rank for rank, app_id, *_ in previous}
+    after = {app_id: rank for rank, app_id, *_ in current}
+    moves = [[app_id, before.get(app_id, 0), rank] for app_id, rank in after.items()
+             if before.get(app_id) != rank]
+    moves += [[app_id, rank, 0] for app_id, rank in before.items() if app_id not in after]
+    return moves
+
+
+def _load_state() -> dict:
+    return codec.load(STATE_FILE) if STATE_FILE.exists() else {"groups": {}}
+
+
+def _sources(hour: int, validators: dict):
+    from scrapers.appstore_scraper import iter_appstore_charts
+
+    yield from iter_appstore_charts(validators)
+    if hour % GOOGLEPLAY_EVERY == 0:
+        from scrapers.googleplay_scraper import iter_googleplay_charts
+        yield from iter_googleplay_charts()
+
+
+def capture(now: datetime | None = None, sources=None) -> dict:
+    """
+    采集一次并落盘，返回本次摘要 {date, hour, changed, unchanged, not_modified}
+    sources 为产出 (key, apps) 的可迭代对象（默认 App Store + 按间隔的 Google Play）；apps 为 None 表示 304
+    """
+    artifacts.use_manifest("intraday")  # 与每日采集分开记录，两个工作流提交时不争用同一清单
+    now = now or datetime.now(UTC)
+    date_str, hour = now.strftime("%Y-%m-%d"), now.strftime("%H")
+    state = _load_state()
+    groups = state["groups"]
+    new_day = state.get("date") != date_str
+
+    # 只对已有记录的组发条件请求；未见过的组由 setdefault 新建
+    validators = {tuple(k.split("|")): g.setdefault("http", {}) for k, g in groups.items() if g.get("entries")}
+    if sources is None:
+        sources = _sources(int(hour), validators)
+
+    changed, moves = {}, {}
+    unchanged = not_modified = 0
+    for key, apps in sources:
+        name = _key_str(key)
+        group = groups.setdefault(name, {})
+        if key in validators:
+            group["http"] = validators[key]
+        if apps is None:
+            not_modified += 1
+            continue
+        if not apps:
+            group.pop("http", None)  # 拉取失败：下次不带校验信息，保证能拿到完整榜单
+            continue
+        entries = _entries(apps)
+        digest = rank_hash(entries)
+        if digest == group.get("hash"):
+            unchanged += 1
+            continue
+        moves[name] = _rank_moves(group.get("entries", []), entries)
+        group.update(hash=digest, entries=entries)
+        changed[name] = entries
+
+    day_dir = DATA_DIR / date_str
+    snapshot = ({k: g["entries"] for k, g in groups.items() if g.get("entries")} if new_day else changed)
+    if snapshot:
+        artifacts.write_bytes(day_dir / f"{hour}.json",
+                              codec.dumps({"date": date_str, "hour": hour, "baseline": new_day, "groups": snapshot}))
+    day_dir.mkdir(parents=True, exist_ok=True)
+    line = {"hour": hour, "ts": now.isoformat(timespec="seconds"), "moves": moves,
+            "unchanged": unchanged, "not_modified": not_modified}
+    with open(day_dir / "deltas.jsonl", "ab") as f:
+        f.write(codec.dumps(line) + b"\n")
+    artifacts.record(day_dir / "deltas.jsonl")
+
+    state.update(date=date_str, hour=hour)
+    artifacts.write_bytes(STATE_FILE, codec.dumps(state))
+
+    summary = {"date": date_str, "hour": hour, "changed": len(changed),
+               "unchanged": unchanged, "not_modified": not_modified}
+    print(f"[Intraday] {date_str} {hour}:00 变化 {len(changed)} 组，未变化 {unchanged} 组，"
+          f"304 {not_modified} 组，快照 {len(snapshot)} 组")
+    return summary
+
+
+def _sampled_hours(day_dir: Path) -> list[str]:
+    path = day_dir / "deltas.jsonl"
+    if not path.exists():
+        return []
+    return sorted({codec.loads(line)["hour"] for line in path.read_bytes().splitlines() if line.strip()})
+
+
+def rollup(date_str: str) -> dict | None:
+    """
+    汇总一天的小时快照：{group: {app_id: [最好排名, 最差排名, 在榜小时数, 名称]}}
+    未变化的组沿用上一次的排名；没有 intraday 数据时返回 None
+    """
+    day_dir = DATA_DIR / date_str
+    hours = _sampled_hours(day_dir)
+    if not hours:
+        return None
+    rollup_file = day_dir / "rollup.json"
+    snapshots = {p.stem: codec.load(p)["groups"] for p in sorted(day_dir.glob("[0-2][0-9].json"))}
+    if not snapshots:
+        return codec.load(rollup_file) if rollup_file.exists() else None  # 已汇总过
+
+    current: dict[str, list] = {}
+    stats: dict[str, dict[str, list]] = {}
+    for hour in hours:
+        current.update(snapshots.get(hour, {}))
+        for name, entries in current.items():
+            group = stats.setdefault(name, {})
+            for rank, app_id, app_name, _ in entries:
+                s = group.get(app_id)
+                if s is None:
+                    group[app_id] = [rank, rank, 1, app_name]
+                else:
+                    s[0] = min(s[0], rank)
+                    s[1] = max(s[1], rank)
+                    s[2] += 1
+
+    result = {"date": date_str, "hours": hours, "groups": stats}
+    artifacts.write_bytes(rollup_file, codec.dumps(result))
+    _annotate_history(date_str, stats)
+    for path in day_dir.glob("[0-2][0-9].json"):
+        artifacts.remove(path)
+    _prune(date_str)
+    print(f"[Intraday] 已汇总 {date_str}：{len(hours)} 次采集，{len(stats)} 组")
+    return result
+
+
+def _annotate_history(date_str: str, stats: dict):
+    """给当天日快照中的记录加上日内最好/最差排名与在榜小时数"""
+    rows = load_chart_rows(date_str)
+    if not rows:
+        return
+    for row in rows:
+        key = _key_str((row.get("store") or "appstore", row.get("region", ""), row.get("chart_type", "")))
+        s = stats.get(key, {}).get(row["app_id"])
+        if s:
+            row["rank_best"], row["rank_worst"], row["intraday_hours"] = s[0], s[1], s[2]
+    save_chart_data(rows, date_str)
+    artifacts.record(HISTORY_DIR / f"{date_str}.json")
+
+
+def _prune(date_str: str):
+    cutoff = (datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=KEEP_DAYS)).strftime("%Y-%m-%d")
+    for day_dir in DATA_DIR.glob("????-??-??"):
+        if day_dir.name < cutoff:
+            for path in day_dir.iterdir():
+                artifacts.remove(path)
+            shutil.rmtree(day_dir, ignore_errors=True)
+
+
+def rollup_pending(before: str):
+    """汇总 before 之前所有还留有小时快照的日期（run_daily 调用）"""
+    for day_dir in sorted(DATA_DIR.glob("????-??-??")):
+        if day_dir.name < before and any(day_dir.glob("[0-2][0-9].json")):
+            rollup(day_dir.name)
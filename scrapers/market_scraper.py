@@ -1,16 +1,18 @@
 """
 市场概况数据采集
-- 从 World Bank Open Data API 拉取 4 个宏观指标
+- 从 World Bank Open Data API 拉取 4 个宏观指标（经共享会话并发请求）
 - 与 data/market_static.json 的静态数据合并
-- 输出 data/market.json
+- 输出 data/market.json（通常经 pipeline/static_build.py 按输入变化增量构建）
 """
 
-import json
-import ssl
-import urllib.request
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
 
+sys.path.insert(0, str(Path(__file__).parent.parent))  # 作为脚本运行时导入 pipeline
+from pipeline import codec, sessions
+
 REGIONS = ["US", "GB", "DE", "FR", "JP", "KR", "ID", "TH", "SG", "VN"]
 REGION_MAP = {  # World Bank 代码 → 项目 region 代码
     "US": "us", "GB": "gb", "DE": "de", "FR": "fr", "JP": "jp",
@@ -33,21 +35,21 @@ STATIC_FILE = DATA_DIR / "market_static.json"
 OUTPUT_FILE = DATA_DIR / "market.json"
 
 
-def fetch_wb_indicator(indicator: str) -> dict:
-    """从 World Bank API 拉取单个指标，返回 {country_code: value} 字典"""
+def fetch_wb_indicator(indicator: str) -> tuple[dict, str]:
+    """
+    从 World Bank API 拉取单个指标，返回 ({country_code: value}, 数据版本)
+    数据版本取响应元信息中的 lastupdated（缺失时为各地区最新数据年份）
+    """
     codes = ";".join(REGIONS)
     url = (
         f"https://api.worldbank.org/v2/country/{codes}"
         f"/indicator/{indicator}?format=json&mrv=1&per_page=20"
     )
-    # 创建不验证证书的 SSL 上下文（macOS Python 需要）
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-
-    with urllib.request.urlopen(url, timeout=15, context=ssl_context) as resp:
-        raw = json.loads(resp.read().decode())
-    result = {}
+    # 走 requests（自带 certifi 证书，macOS 无需关闭校验），也便于离线回放与指标统计
+    resp = sessions.session().get(url, timeout=15)
+    resp.raise_for_status()
+    raw = codec.loads(resp.content)
+    result, years = {}, set()
     if len(raw) >= 2 and raw[1]:
         for entry in raw[1]:
             code = entry["countryiso3code"] or entry["country"]["id"]
@@ -55,7 +57,26 @@ def fetch_wb_indicator(indicator: str) -> dict:
             code2 = _iso3_to_iso2(code)
             if code2 and entry["value"] is not None:
                 result[code2] = entry["value"]
-    return result
+                years.add(entry.get("date", ""))
+    vintage = (raw[0] or {}).get("lastupdated") if raw and isinstance(raw[0], dict) else None
+    return result, vintage or ",".join(sorted(years))
+
+
+def fetch_wb_indicators() -> tuple[dict, dict]:
+    """
+    并发拉取全部指标（同一个连接池），返回 ({region: {field: value}}, {indicator: 数据版本})
+    任一指标失败时抛出异常
+    """
+    with ThreadPoolExecutor(max_workers=len(INDICATORS), thread_name_prefix="worldbank") as pool:
+        results = dict(zip(INDICATORS, pool.map(fetch_wb_indicator, INDICATORS)))
+    wb_data, vintages = {}, {}
+    for indicator, (values, vintage) in results.items():
+        print(f"  {indicator}：{len(values)} 个地区，数据版本 {vintage}")
+        vintages[indicator] = vintage
+        for iso2, val in values.items():
+            key = REGION_MAP.get(iso2, iso2.lower())
+            wb_data.setdefault(key, {})[INDICATORS[indicator]] = val
+    return wb_data, vintages
 
 
 _ISO3_MAP = {
@@ -67,17 +88,11 @@ def _iso3_to_iso2(code3: str) -> str | None:
     return _ISO3_MAP.get(code3.upper())
 
 
-def build_market_data() -> dict:
-    static = json.loads(STATIC_FILE.read_text(encoding="utf-8"))
-
-    # 拉取所有 World Bank 指标
-    wb_data = {}
-    for indicator, field in INDICATORS.items():
-        print(f"  拉取 {indicator}...")
-        values = fetch_wb_indicator(indicator)
-        for iso2, val in values.items():
-            key = REGION_MAP.get(iso2, iso2.lower())
-            wb_data.setdefault(key, {})[field] = val
+def build_market_data(wb_data: dict | None = None) -> dict:
+    """wb_data 为 fetch_wb_indicators() 的地区数据；不传时现拉"""
+    static = codec.load(STATIC_FILE)
+    if wb_data is None:
+        wb_data, _ = fetch_wb_indicators()
 
     # 合并静态 + 动态
     regions_out = []
@@ -107,11 +122,14 @@ def build_market_data() -> dict:
     }
 
 
-if __name__ == "__main__":
+def main():
+    """拉取 World Bank 指标，合并静态数据写出 data/market.json"""
     print("[Market Scraper] 开始拉取市场数据...")
     data = build_market_data()
     DATA_DIR.mkdir(exist_ok=True)
-    OUTPUT_FILE.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    codec.dump(data, OUTPUT_FILE, indent=2)
     print(f"[Market Scraper] 已写出 {OUTPUT_FILE}（{len(data['regions'])} 个地区）")
+
+
+if __name__ == "__main__":
+    main()
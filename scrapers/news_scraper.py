@@ -4,11 +4,12 @@
 """
 
 import re
-import requests
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone, timedelta
 from email.utils import parsedate_to_datetime
 
+from pipeline import sessions
+
 NEWS_SOURCES = [
     {"name": "PocketGamer.biz",       "url": "https://www.pocketgamer.biz/rss/"},
     {"name": "GameDeveloper",          "url": "https://www.gamedeveloper.com/rss.xml"},
@@ -37,7 +38,7 @@ def _strip_html(text: str) -> str:
 def fetch_rss(source: dict, hours: int = 48) -> list[dict]:
     """抓取单个 RSS 源，返回最近 N 小时内的新闻"""
     try:
-        resp = requests.get(source["url"], headers=HEADERS, timeout=10)
+        resp = sessions.session().get(source["url"], headers=HEADERS, timeout=10)
         resp.raise_for_status()
         root = ET.fromstring(resp.content)
 